@@ -1,13 +1,14 @@
 import os
 
-from flask import Flask, request
+from flask import Flask
 import click
 
 from app.extensions.extensions import register_extensions
-from app.extensions.request_tracking import setup_request_tracking
+from app.extensions.request_middleware import setup_request_middleware
 from app.extensions.structured_logging import setup_structured_logging
 from app.extensions.prometheus_metrics import setup_prometheus
-from app.extensions.security_headers import setup_security_headers
+from app.extensions.sql_instrumentation import setup_sql_instrumentation
+from app.extensions.db_pool_metrics import setup_pool_metrics
 from app.extensions.system_checks import run_system_checks
 from config import config_options
 
@@ -23,6 +24,52 @@ def register_cli_commands(app):
         if report["status"] == "fail":
             raise click.ClickException("system check failed")
 
+    @app.cli.command("bcrypt-calibrate")
+    @click.option("--target-ms", default=250.0, show_default=True, help="目标哈希耗时")
+    @click.option("--min-rounds", default=4, show_default=True)
+    @click.option("--max-rounds", default=16, show_default=True)
+    @click.option("--samples", default=3, show_default=True, help="每个 cost 采样次数")
+    def bcrypt_calibrate_command(target_ms, min_rounds, max_rounds, samples):
+        """测量当前机器各 bcrypt cost 的耗时并推荐 BCRYPT_LOG_ROUNDS"""
+        from app.extensions.password_hasher import calibrate_bcrypt_rounds
+
+        results, recommended = calibrate_bcrypt_rounds(
+            target_ms, min_rounds=min_rounds, max_rounds=max_rounds, samples=samples
+        )
+        for rounds, elapsed_ms in results:
+            click.echo(f"rounds={rounds} time={elapsed_ms:.1f}ms")
+        click.echo(
+            f"current BCRYPT_LOG_ROUNDS={app.config.get('BCRYPT_LOG_ROUNDS', 12)}"
+        )
+        click.echo(f"recommended BCRYPT_LOG_ROUNDS={recommended}")
+
+    @app.cli.command("prune-refresh-tokens")
+    @click.option("--grace-hours", type=float, default=None, help="宽限期（小时）")
+    @click.option("--batch-size", type=int, default=None, help="每批删除行数")
+    @click.option("--throttle-ms", type=float, default=None, help="批间隔（毫秒）")
+    @click.option("--max-batches", type=int, default=None, help="最多执行批数")
+    def prune_refresh_tokens_command(grace_hours, batch_size, throttle_ms, max_batches):
+        """分批删除已过期或已撤销超过宽限期的 refresh token"""
+        from datetime import timedelta
+
+        from app.services.refresh_token_pruner import (
+            prune_options,
+            prune_refresh_tokens,
+        )
+
+        options = prune_options(app.config)
+        if grace_hours is not None:
+            options["grace"] = timedelta(hours=grace_hours)
+        if batch_size is not None:
+            options["batch_size"] = batch_size
+        if throttle_ms is not None:
+            options["throttle"] = throttle_ms / 1000
+        result = prune_refresh_tokens(max_batches=max_batches, **options)
+        click.echo(
+            f"deleted={result['deleted']} batches={result['batches']} "
+            f"duration={result['duration_seconds']}s"
+        )
+
 
 def create_app():
     app = Flask(__name__)
@@ -37,14 +84,24 @@ def create_app():
 
     register_extensions(app)
 
-    # 注册请求追踪中间件
-    setup_request_tracking(app)
+    from app.services.user_cache import setup_user_cache
+    from app.services.permission_service import setup_permission_cache
+    from app.services.token_epoch import setup_token_epoch_cache
+    from app.utils.jwt_cache import setup_jwt_claims_cache
+
+    setup_user_cache(app)
+    setup_permission_cache(app)
+    setup_token_epoch_cache(app)
+    setup_jwt_claims_cache(app)
 
     # 注册 Prometheus 监控
     setup_prometheus(app)
 
-    # 注册安全响应头
-    setup_security_headers(app)
+    # 注册请求级 SQL 埋点
+    setup_sql_instrumentation(app)
+
+    # 注册数据库连接池指标
+    setup_pool_metrics(app)
 
     from app.controller import auth_bp, health_bp, poster_bp, message_bp
 
@@ -55,7 +112,7 @@ def create_app():
     app.register_blueprint(message_bp, url_prefix="")
     # app.register_blueprint(api_bp)
 
-    from .logger import app_logger, access_logger
+    from .logger import app_logger
 
     app.logger.handlers = app_logger.handlers
     app.logger.setLevel(app_logger.level)
@@ -63,10 +120,6 @@ def create_app():
     # 设置结构化日志
     setup_structured_logging(app)
 
-    @app.before_request
-    def log_request_info():
-        access_logger.info(f"访问路径: {request.path}, 方法: {request.method}")
-
     # 避免使用 `import app.models` 否则会在此作用域中覆盖 `app` 变量
     # 使用 importlib 动态导入模型包
     import importlib
@@ -78,4 +131,7 @@ def create_app():
     register_error_handler(app)
     register_cli_commands(app)
 
+    # 请求追踪、指标、安全头、访问日志统一由一层 WSGI 中间件完成
+    setup_request_middleware(app)
+
     return app
@@ -3,7 +3,7 @@
 """
 
 from flask import g, request
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import get_jwt, jwt_required
 from app.controller import auth_bp
 from app.exceptions.base import BusinessError
 from app.schemas.auth import Register, Login
@@ -13,7 +13,9 @@ from app.services.auth_service import (
     user_profile,
     rotate_refresh_token,
     revoke_refresh_token,
+    logout_all,
 )
+from app.services.token_epoch import TOKEN_VERSION_CLAIM
 from app.utils import success
 from app.utils.validators import validate_request, validate_json_content_type
 from app.utils.validators import login_required
@@ -51,7 +53,7 @@ def login():
     email = data.email
     username = data.username
     password = data.password
-    result = user_login(email, username, password)
+    result = user_login(email, username, password, device=data.device)
     return success(result)
 
 
@@ -77,7 +79,9 @@ def _get_bearer_token() -> str:
 @jwt_required(refresh=True)
 def refresh():
     raw_refresh_token = _get_bearer_token()
-    result = rotate_refresh_token(raw_refresh_token)
+    result = rotate_refresh_token(
+        raw_refresh_token, token_version=get_jwt().get(TOKEN_VERSION_CLAIM, 0)
+    )
     return success(result)
 
 
@@ -87,3 +91,11 @@ def logout():
     raw_refresh_token = _get_bearer_token()
     result = revoke_refresh_token(raw_refresh_token)
     return success(result)
+
+
+@auth_bp.route("/logout-all", methods=["POST"])
+@login_required()
+def logout_everywhere():
+    """注销全部设备：当前用户已签发的 access/refresh token 全部失效"""
+    result = logout_all()
+    return success(result)
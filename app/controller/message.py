@@ -11,4 +11,6 @@ from app.utils.validators import validate_query
 @validate_query(ListPosterQuery)
 def find_post():
     data = g.query_data
-    return success(list_messages(page=data.page, page_size=data.page_size))
+    return success(
+        list_messages(page=data.page, page_size=data.page_size, cursor=data.cursor)
+    )
@@ -36,7 +36,12 @@ def add():
 @validate_query(ListPosterQuery)
 def list():
     data = g.query_data
-    result = search_poster(page=data.page, page_size=data.page_size, status=data.status)
+    result = search_poster(
+        page=data.page,
+        page_size=data.page_size,
+        status=data.status,
+        cursor=data.cursor,
+    )
     return success(result)
 
 
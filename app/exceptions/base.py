@@ -67,3 +67,10 @@ class QueryError(BusinessError):
 
     def __init__(self, message="query参数有误", code=40003):
         super().__init__(message, code, http_code=400)
+
+
+class ServiceUnavailableError(BusinessError):
+    """服务暂时不可用（过载保护）"""
+
+    def __init__(self, message="服务繁忙，请稍后再试", code=50301):
+        super().__init__(message, code=code, http_code=503)
@@ -0,0 +1,101 @@
+"""
+数据库连接池指标
+- checkout/checkin/connect 事件发生时刷新 checked-out / overflow / idle 三个 gauge
+- 包装 pool.connect 统计取连接耗时（含排队），等待超时计入 db_pool_timeouts_total
+- engine.dispose() 会重建连接池，通过 engine_disposed 事件重新包装
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.extensions.extensions import db
+from app.extensions.prometheus_metrics import (
+    db_pool_checked_out,
+    db_pool_checkout_duration,
+    db_pool_idle,
+    db_pool_overflow,
+    db_pool_timeouts,
+)
+
+
+def pool_status(pool) -> dict | None:
+    """
+    连接池实时状态，仅 QueuePool 这类有容量上限的连接池可用，其他返回 None
+    capacity 为 None 表示 max_overflow=-1（不限溢出）
+    """
+    if not hasattr(pool, "checkedout"):
+        return None
+    size = pool.size()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    checked_out = pool.checkedout()
+    capacity = size + max_overflow if max_overflow > -1 else None
+    return {
+        "size": size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "idle": pool.checkedin(),
+        "capacity": capacity,
+        "saturation": checked_out / capacity if capacity else None,
+    }
+
+
+def _instrument_engine(engine, name: str):
+    def refresh_gauges(returning: bool = False):
+        status = pool_status(engine.pool)
+        if status is None:
+            return
+        checked_out, overflow, idle = (
+            status["checked_out"],
+            status["overflow"],
+            status["idle"],
+        )
+        # checkin 事件在连接归还队列之前触发，按归还后的状态上报：
+        # 队列已满时该连接会被关闭并减少 overflow，否则变为空闲
+        if returning:
+            checked_out -= 1
+            if idle >= status["size"]:
+                overflow = max(overflow - 1, 0)
+            else:
+                idle += 1
+        db_pool_checked_out.labels(engine=name).set(checked_out)
+        db_pool_overflow.labels(engine=name).set(overflow)
+        db_pool_idle.labels(engine=name).set(idle)
+
+    def wrap_connect(pool):
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                db_pool_timeouts.labels(engine=name).inc()
+                raise
+            finally:
+                db_pool_checkout_duration.labels(engine=name).observe(
+                    time.perf_counter() - start
+                )
+
+        pool.connect = timed_connect
+
+    # 通过 engine 注册的 pool 事件在 dispose 重建连接池后依然生效
+    event.listen(engine, "connect", lambda *_: refresh_gauges())
+    event.listen(engine, "checkout", lambda *_: refresh_gauges())
+    event.listen(engine, "checkin", lambda *_: refresh_gauges(returning=True))
+
+    @event.listens_for(engine, "engine_disposed")
+    def rewrap_pool(_engine):
+        wrap_connect(engine.pool)
+        refresh_gauges()
+
+    wrap_connect(engine.pool)
+    refresh_gauges()
+
+
+def setup_pool_metrics(app):
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            _instrument_engine(engine, bind_key or "default")
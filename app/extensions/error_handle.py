@@ -1,4 +1,6 @@
-from flask import jsonify, g, has_request_context
+import logging
+
+from flask import has_request_context, jsonify, request
 from app.exceptions.base import (
     BusinessError,
     ValidationError,
@@ -10,14 +12,50 @@ from app.exceptions.base import (
     InternalServerError,  # noqa: F401
 )
 from werkzeug.exceptions import HTTPException
+from app.extensions.prometheus_metrics import business_errors, error_logs_suppressed
+from app.extensions.request_tracking import get_request_id
 from app.logger import error_logger
+from app.utils.log_throttle import LogThrottle
 import traceback
 
 
-def _request_id():
-    if has_request_context():
-        return g.get("request_id", "N/A")
-    return "N/A"
+def _log_suppressed(key, count):
+    """key 空闲或被淘汰时，未随日志带出的压制条数单独输出一条"""
+    error, code, endpoint = key
+    error_logger.warning(
+        "%s (code=%s, endpoint=%s): %d similar suppressed",
+        error,
+        code,
+        endpoint,
+        count,
+    )
+
+
+# 按 (错误类型, code, endpoint) 限流错误日志
+error_log_throttle = LogThrottle(on_suppressed=_log_suppressed)
+
+
+def _log_error(level, error: str, code, msg, *args, throttled=True, **kwargs):
+    """
+    错误日志统一出口
+    Prometheus 计数不采样；日志按 (错误类型, code, endpoint) 令牌桶限流，
+    被压制的条数随下一条放行的日志输出；throttled=False 时每条都记录
+    """
+    business_errors.labels(error=error, code=str(code)).inc()
+    if not error_logger.isEnabledFor(level):
+        return
+    if not throttled:
+        error_logger.log(level, msg, *args, **kwargs)
+        return
+    endpoint = (request.endpoint if has_request_context() else None) or "unknown"
+    decision = error_log_throttle.hit((error, code, endpoint))
+    if not decision.allowed:
+        error_logs_suppressed.labels(error=error).inc()
+        return
+    if decision.suppressed:
+        msg += " (%d similar suppressed)"
+        args += (decision.suppressed,)
+    error_logger.log(level, msg, *args, **kwargs)
 
 
 def _error_response(code, message, http_code):
@@ -27,7 +65,7 @@ def _error_response(code, message, http_code):
                 "status": "error",
                 "code": code,
                 "message": message,
-                "request_id": _request_id(),
+                "request_id": get_request_id(),
                 "data": None,
             }
         ),
@@ -37,62 +75,94 @@ def _error_response(code, message, http_code):
 
 def register_error_handler(app):
     """注册统一的错误处理器"""
+    error_log_throttle.configure(
+        rate=app.config.get("ERROR_LOG_RATE_PER_SECOND"),
+        burst=app.config.get("ERROR_LOG_BURST"),
+    )
 
     # 业务错误处理
     @app.errorhandler(BusinessError)
     def handle_business_error(e):
-        error_logger.warning(
-            "业务错误: %s", e.message, extra={"code": e.code, "http_code": e.http_code}
+        _log_error(
+            logging.WARNING,
+            type(e).__name__,
+            e.code,
+            "业务错误: %s",
+            e.message,
+            extra={"code": e.code, "http_code": e.http_code},
         )
         return _error_response(e.code, e.message, e.http_code)
 
     # 验证错误
     @app.errorhandler(ValidationError)
     def handle_validation_error(e):
-        error_logger.warning("数据验证错误: %s", e.message)
+        _log_error(
+            logging.WARNING, "ValidationError", e.code, "数据验证错误: %s", e.message
+        )
         return _error_response(e.code, e.message, e.http_code)
 
     # 身份认证错误
     @app.errorhandler(AuthenticationError)
     def handle_auth_error(e):
-        error_logger.warning("身份认证失败: %s", e.message)
+        _log_error(
+            logging.WARNING,
+            "AuthenticationError",
+            e.code,
+            "身份认证失败: %s",
+            e.message,
+        )
         return _error_response(e.code, e.message, e.http_code)
 
     # 权限错误
     @app.errorhandler(AuthorizationError)
     def handle_auth_forbidden(e):
-        error_logger.warning("权限不足: %s", e.message)
+        _log_error(
+            logging.WARNING, "AuthorizationError", e.code, "权限不足: %s", e.message
+        )
         return _error_response(e.code, e.message, e.http_code)
 
     # 资源不存在
     @app.errorhandler(NotFoundError)
     def handle_not_found(e):
-        error_logger.warning("资源不存在: %s", e.message)
+        _log_error(
+            logging.WARNING, "NotFoundError", e.code, "资源不存在: %s", e.message
+        )
         return _error_response(e.code, e.message, e.http_code)
 
     # 资源冲突
     @app.errorhandler(ConflictError)
     def handle_conflict(e):
-        error_logger.warning("资源冲突: %s", e.message)
+        _log_error(logging.WARNING, "ConflictError", e.code, "资源冲突: %s", e.message)
         return _error_response(e.code, e.message, e.http_code)
 
     # 超过速率限制
     @app.errorhandler(RateLimitError)
     def handle_rate_limit(e):
-        error_logger.warning("速率限制: %s", e.message)
+        _log_error(logging.WARNING, "RateLimitError", e.code, "速率限制: %s", e.message)
         return _error_response(e.code, e.message, e.http_code)
 
     # HTTP 异常（404, 405, 等）
     @app.errorhandler(HTTPException)
     def handle_http_exception(e):
-        error_logger.warning("HTTP 异常: %s %s", e.code, e.name)
+        _log_error(
+            logging.WARNING, "HTTPException", e.code, "HTTP 异常: %s %s", e.code, e.name
+        )
         return _error_response(e.code, e.description or e.name, e.code)
 
     # 通用异常处理
     @app.errorhandler(Exception)
     def handle_general_exception(e):
         """捕获所有未处理的异常"""
-        error_logger.error("未处理的异常: %s\n%s", str(e), traceback.format_exc())
+        # 未处理异常的堆栈是排查依据，不参与限流
+        _log_error(
+            logging.ERROR,
+            type(e).__name__,
+            50001,
+            "未处理的异常: %s",
+            str(e),
+            throttled=False,
+            exc_info=e,
+        )
 
         # 开发环境下返回详细错误信息
         if app.debug or app.config.get("ENV") == "development":
@@ -102,7 +172,7 @@ def register_error_handler(app):
                         "status": "error",
                         "code": 50001,
                         "message": str(e),
-                        "request_id": _request_id(),
+                        "request_id": get_request_id(),
                         "traceback": traceback.format_exc(),
                     }
                 ),
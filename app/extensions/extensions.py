@@ -4,6 +4,7 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from app.extensions.rate_limiting import setup_rate_limiting
+from app.extensions.password_hasher import password_hasher
 
 db = SQLAlchemy()
 
@@ -17,6 +18,7 @@ jwt = JWTManager()
 def register_extensions(app):
     db.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     cors.init_app(app)
@@ -0,0 +1,79 @@
+"""
+独立的 metrics 监听
+采集请求不占用应用 worker，也不经过限流、请求追踪、安全头等请求钩子。
+- gunicorn 主进程在 when_ready 中绑定端口，交给独立的子进程提供服务（见 gunicorn.conf.py），
+  主进程内不运行任何线程；多进程模式下聚合所有 worker
+- 渲染结果按 METRICS_CACHE_TTL_SECONDS 缓存，TTL 内的重复采集直接复用
+"""
+
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.extensions.prometheus_metrics import render_metrics
+from app.utils.cache import TTLCache
+
+_EXPOSITION_KEY = "exposition"
+
+exposition_cache = TTLCache("metrics_exposition", maxsize=1, ttl=5.0)
+
+
+def cached_metrics() -> bytes:
+    payload = exposition_cache.get(_EXPOSITION_KEY)
+    if payload is None:
+        payload = render_metrics()
+        exposition_cache.set(_EXPOSITION_KEY, payload)
+    return payload
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        payload = cached_metrics()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE_LATEST)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # 采集请求频繁，不写访问日志
+        pass
+
+
+def create_metrics_server(bind: str, ttl: float | None = None) -> ThreadingHTTPServer:
+    """绑定 metrics 监听但不开始服务（bind 形如 "127.0.0.1:9101"）"""
+    host, _, port = bind.rpartition(":")
+    if ttl is not None:
+        exposition_cache.configure(ttl=ttl)
+    server = ThreadingHTTPServer((host or "0.0.0.0", int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    return server
+
+
+def start_metrics_server(bind: str, ttl: float | None = None) -> ThreadingHTTPServer:
+    """
+    在当前进程的后台线程中启动 metrics 监听
+    返回 server，调用 server.shutdown() 停止
+    """
+    server = create_metrics_server(bind, ttl)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
+
+
+def serve_metrics(server: ThreadingHTTPServer):
+    """独立 metrics 进程入口（gunicorn 主进程通过 start_service 启动），收到 SIGTERM 后退出"""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    stop.wait()
+    server.shutdown()
+    server.server_close()
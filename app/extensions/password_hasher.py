@@ -0,0 +1,362 @@
+"""
+密码哈希执行器
+bcrypt 是纯 CPU 计算，登录/注册洪峰会占满所有 worker，导致 /health 超时。
+- PASSWORD_HASH_MAX_CONCURRENCY：整台机器同时执行的哈希数（bcrypt 可用的 CPU 预算），
+  也是准入名额数；名额用完时立即返回 503，不排队
+- 名额只在哈希真正结束时（future 的 done 回调）归还，超时放弃等待的请求不会提前释放名额
+- 单进程（flask run / 测试）：进程内一个 ProcessPoolExecutor + 线程信号量
+- gunicorn：主进程启动一个共享的哈希进程池（见 start_hash_pool）并创建跨进程信号量，
+  worker 在 post_fork 中通过 use_shared_pool 接入，所有 worker 共用同一组哈希进程
+- 共享进程池中单个连接的失败不会让哈希进程退出；哈希进程意外退出时由监督进程补上，
+  worker 等待结果有超时（PASSWORD_HASH_TIMEOUT + 余量），卡住的哈希进程不会永久占用名额
+名额应小于 gunicorn worker 数，保证总有 worker 能处理 /health 等请求
+"""
+
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+
+from flask import current_app
+
+from app.exceptions.base import ServiceUnavailableError
+from app.extensions.prometheus_metrics import (
+    password_hash_duration,
+    password_hash_in_flight,
+    password_hash_rejected,
+)
+from app.utils.service_process import start_service, stop_service
+
+
+def _generate_password_hash(password, rounds):
+    from app.extensions.extensions import bcrypt
+
+    return bcrypt.generate_password_hash(password, rounds).decode("utf-8")
+
+
+def _check_password_hash(pw_hash, password):
+    from app.extensions.extensions import bcrypt
+
+    return bcrypt.check_password_hash(pw_hash, password)
+
+
+def get_hash_cost(pw_hash) -> int | None:
+    """解析 bcrypt 哈希中的 cost，例如 $2b$12$... -> 12"""
+    if isinstance(pw_hash, bytes):
+        pw_hash = pw_hash.decode("utf-8")
+    parts = (pw_hash or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 4, max_rounds: int = 16, samples: int = 3
+):
+    """
+    在当前机器上测量每个 cost 的哈希耗时
+    返回 (测量结果 [(rounds, 毫秒)], 不超过 target_ms 的最大 cost)
+    cost 每加 1 耗时翻倍，超过 2 倍目标后停止测量
+    """
+    import bcrypt as _bcrypt
+
+    password = b"calibration-password"
+    results = []
+    recommended = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        salt = _bcrypt.gensalt(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            _bcrypt.hashpw(password, salt)
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed_ms = sorted(timings)[len(timings) // 2]
+        results.append((rounds, elapsed_ms))
+        if elapsed_ms <= target_ms:
+            recommended = rounds
+        if elapsed_ms > target_ms * 2:
+            break
+    return results, recommended
+
+
+# worker 等待哈希结果时在 PASSWORD_HASH_TIMEOUT 之外多等的时间
+REMOTE_HASH_TIMEOUT_MARGIN = 2.0
+# 哈希进程意外退出后，监督进程补进程前的等待，避免启动即崩溃时反复 fork
+_RESPAWN_DELAY = 0.5
+
+
+def _serve_hashes(listener: Listener):
+    """
+    哈希进程主循环：一次处理一个连接，每个连接执行一次哈希
+    单个连接的错误（握手中断、认证失败、调用方中途断开）只丢弃该连接，进程继续服务
+    """
+    while True:
+        try:
+            conn = listener.accept()
+        except (EOFError, ConnectionError, AuthenticationError):
+            continue
+        except OSError:
+            # listener 已关闭
+            return
+        with conn:
+            try:
+                fn, args = conn.recv()
+            except (EOFError, OSError):
+                continue
+            try:
+                reply = (True, fn(*args))
+            except Exception as e:
+                reply = (False, e)
+            try:
+                conn.send(reply)
+            except Exception:
+                # 调用方已超时放弃或断开，结果无人接收
+                continue
+
+
+class _StopSupervisor(Exception):
+    pass
+
+
+def _raise_stop(signum, frame):
+    raise _StopSupervisor()
+
+
+def _supervise_hash_pool(listener: Listener, processes: int):
+    """
+    监督进程：启动哈希进程，回收意外退出的哈希进程并补上；收到 SIGTERM 时停止全部哈希进程
+    哈希进程是监督进程的子进程，gunicorn 主进程不会替它们回收（主进程只回收自己的子进程）
+    """
+    pids = set()
+    signal.signal(signal.SIGTERM, _raise_stop)
+    try:
+        for _ in range(processes):
+            pids.add(start_service(_serve_hashes, listener))
+        while True:
+            pid, status = os.wait()
+            if pid not in pids:
+                continue
+            pids.discard(pid)
+            print(
+                f"password hash process {pid} exited with status {status}, restarting",
+                file=sys.stderr,
+                flush=True,
+            )
+            time.sleep(_RESPAWN_DELAY)
+            pids.add(start_service(_serve_hashes, listener))
+    except _StopSupervisor:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in pids:
+            stop_service(pid)
+
+
+def start_hash_pool(processes: int, authkey: bytes):
+    """
+    启动共享哈希进程池（gunicorn 主进程在 fork worker 之前调用）
+    所有进程在同一个 Unix socket 上 accept，同时执行的哈希数不超过进程数
+    返回 (listener, 监督进程 pid)，地址为 listener.address
+    """
+    listener = Listener(family="AF_UNIX", authkey=authkey)
+    pid = start_service(_supervise_hash_pool, listener, max(processes, 1))
+    return listener, pid
+
+
+def stop_hash_pool(listener: Listener, pid: int):
+    # 监督进程退出前会停止它启动的全部哈希进程
+    stop_service(pid)
+    # 关闭时删除 socket 文件
+    listener.close()
+
+
+def _timeval(seconds: float) -> bytes:
+    whole = int(seconds)
+    return struct.pack("ll", whole, int((seconds - whole) * 1_000_000))
+
+
+class RemoteHashExecutor:
+    """
+    把哈希任务发给共享哈希进程池执行，submit 返回 Future
+    - 连接和认证握手最多等待 connect_timeout 秒（握手中的每次读取都受 SO_RCVTIMEO 限制）
+    - 发出任务后最多等待 timeout 秒，超时抛出 TimeoutError，future 结束后名额随之归还
+    """
+
+    def __init__(
+        self,
+        address,
+        authkey: bytes,
+        max_workers: int,
+        timeout: float = 10.0 + REMOTE_HASH_TIMEOUT_MARGIN,
+        connect_timeout: float = 1.0,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._threads = ThreadPoolExecutor(
+            max_workers=max(max_workers, 1), thread_name_prefix="password-hash"
+        )
+
+    def _connect(self) -> Connection:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.connect_timeout)
+            sock.connect(self.address)
+            # Connection 直接读写文件描述符，需要阻塞模式；读取超时改由 SO_RCVTIMEO 控制
+            sock.settimeout(None)
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVTIMEO, _timeval(self.connect_timeout)
+            )
+            conn = Connection(sock.detach())
+        except BaseException:
+            sock.close()
+            raise
+        try:
+            # 与 multiprocessing.connection.Client 相同的双向认证
+            answer_challenge(conn, self.authkey)
+            deliver_challenge(conn, self.authkey)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _call(self, fn, *args):
+        with self._connect() as conn:
+            conn.send((fn, args))
+            if not conn.poll(self.timeout):
+                raise TimeoutError("password hash process did not respond")
+            ok, result = conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def submit(self, fn, *args):
+        return self._threads.submit(self._call, fn, *args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class PasswordHasher:
+    def __init__(self):
+        # 未 init_app 时在请求线程内直接计算，不限流
+        self.max_concurrency = 0
+        self.use_process_pool = False
+        self.timeout = 10.0
+        self._slots = None
+        self._shared = False
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_concurrency = app.config.get("PASSWORD_HASH_MAX_CONCURRENCY", 0)
+        self.use_process_pool = app.config.get("PASSWORD_HASH_USE_PROCESS_POOL", False)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", 10.0)
+        if self._shared:
+            self._executor.timeout = self.timeout + REMOTE_HASH_TIMEOUT_MARGIN
+        else:
+            self._slots = (
+                threading.BoundedSemaphore(self.max_concurrency)
+                if self.max_concurrency > 0
+                else None
+            )
+        app.extensions["password_hasher"] = self
+
+    def use_shared_pool(self, slots, address, authkey: bytes, max_concurrency: int):
+        """
+        接入主进程创建的跨进程信号量和共享哈希进程池（gunicorn post_fork 中调用）
+        之后的 init_app 不会再覆盖这里的设置
+        """
+        self._slots = slots
+        self._executor = RemoteHashExecutor(
+            address,
+            authkey,
+            max_concurrency,
+            timeout=self.timeout + REMOTE_HASH_TIMEOUT_MARGIN,
+        )
+        self._executor_pid = os.getpid()
+        self._shared = True
+
+    def _get_executor(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(self.max_concurrency, 1)
+                )
+                self._executor_pid = pid
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._executor_pid = None
+            self._shared = False
+
+    def _run(self, op, fn, *args):
+        slots = self._slots
+        if slots is not None and not slots.acquire(False):
+            password_hash_rejected.inc()
+            raise ServiceUnavailableError()
+
+        password_hash_in_flight.inc()
+        start = time.perf_counter()
+
+        def _finished(_future=None):
+            password_hash_duration.labels(op=op).observe(time.perf_counter() - start)
+            password_hash_in_flight.dec()
+            if slots is not None:
+                slots.release()
+
+        if not self.use_process_pool:
+            try:
+                return fn(*args)
+            finally:
+                _finished()
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            _finished()
+            raise
+        # 名额随哈希结束归还；请求超时放弃等待时，仍在执行的哈希继续占用名额
+        future.add_done_callback(_finished)
+        try:
+            return future.result(timeout=self.timeout)
+        except (FutureTimeoutError, OSError, EOFError):
+            # 等待超时，或共享哈希进程池不可用 / 无响应
+            future.cancel()
+            password_hash_rejected.inc()
+            raise ServiceUnavailableError()
+
+    def generate_password_hash(self, password) -> str:
+        rounds = current_app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        return self._run("generate", _generate_password_hash, password, rounds)
+
+    def check_password_hash(self, pw_hash, password) -> bool:
+        return self._run("check", _check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash) -> bool:
+        """存量哈希的 cost 与当前 BCRYPT_LOG_ROUNDS 不一致时需要重新哈希"""
+        rounds = current_app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        cost = get_hash_cost(pw_hash)
+        return cost is not None and cost != rounds
+
+
+password_hasher = PasswordHasher()
@@ -3,11 +3,22 @@ Prometheus 监控指标
 method = GET / POST / PUT / DELETE
 endpoint = Flask 给每个路由起的“内部名字”，不是 URL
 status = 200 / 400 / 401 / 500
+
+多进程模式：设置 PROMETHEUS_MULTIPROC_DIR 后（gunicorn.conf.py 默认开启），
+各 worker 把指标写入该目录，/metrics 聚合所有 worker 的数据；
+Gauge 使用 livesum 模式，只累加存活 worker 的值
 """
 
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
-from flask import request, g
-import time
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    Gauge,
+    generate_latest,
+    multiprocess,
+)
 
 # 定义指标
 request_count = Counter(
@@ -26,64 +37,163 @@ response_size = Histogram(
     "flask_response_size_bytes", "Flask 响应大小（字节）", ["method", "endpoint"]
 )
 
-active_requests = Gauge("flask_active_requests", "Flask 当前活跃请求数")
+db_queries_per_request = Histogram(
+    "flask_request_db_queries",
+    "每个请求执行的 SQL 语句数",
+    ["method", "endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+db_duration_per_request = Histogram(
+    "flask_request_db_duration_seconds",
+    "每个请求的数据库累计耗时（秒）",
+    ["method", "endpoint"],
+)
+
+db_slow_queries = Counter("db_slow_queries_total", "慢查询次数", ["endpoint"])
+
+db_n_plus_one_suspected = Counter(
+    "db_n_plus_one_suspected_total", "疑似 N+1 查询次数", ["endpoint"]
+)
+
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "已借出的数据库连接数",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "超出 pool_size 的溢出连接数",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+db_pool_idle = Gauge(
+    "db_pool_idle", "连接池中空闲的连接数", ["engine"], multiprocess_mode="livesum"
+)
+
+db_pool_checkout_duration = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "从连接池获取连接的耗时（含排队等待，秒）",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+db_pool_timeouts = Counter("db_pool_timeouts_total", "等待连接池超时的次数", ["engine"])
+
+active_requests = Gauge(
+    "flask_active_requests", "Flask 当前活跃请求数", multiprocess_mode="livesum"
+)
 
 error_count = Counter("flask_errors_total", "Flask 错误总数", ["type", "status"])
 
+password_hash_in_flight = Gauge(
+    "password_hash_in_flight",
+    "已占用准入名额、尚未结束的密码哈希任务数（含等待超时后仍在执行的）",
+    multiprocess_mode="livesum",
+)
+
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "密码哈希耗时（含排队，秒）", ["op"]
+)
+
+password_hash_rejected = Counter(
+    "password_hash_rejected_total", "哈希执行器饱和或超时被拒绝的次数"
+)
+
+business_errors = Counter(
+    "app_errors_total",
+    "错误响应次数（按错误类型和业务 code，不采样）",
+    ["error", "code"],
+)
+
+error_logs_suppressed = Counter(
+    "app_error_logs_suppressed_total", "被限流压制的错误日志条数", ["error"]
+)
+
+log_records_dropped = Counter(
+    "log_records_dropped_total", "日志队列已满被丢弃的记录数", ["logger"]
+)
+
+rate_limit_decisions = Counter(
+    "rate_limit_decisions_total",
+    "限流判断次数（按限额和作用域，result=allowed/blocked）",
+    ["limit", "scope", "result"],
+)
+
+cache_requests = Counter(
+    "app_cache_requests_total", "进程内缓存查询次数", ["cache", "result"]
+)
+
+
+# (method, endpoint) -> 已绑定标签的子指标，避免每个请求重复 labels() 查找
+_request_children: dict = {}
+
+
+def _children_for(method: str, endpoint: str):
+    children = _request_children.get((method, endpoint))
+    if children is None:
+        children = _request_children[(method, endpoint)] = (
+            request_duration.labels(method=method, endpoint=endpoint),
+            db_queries_per_request.labels(method=method, endpoint=endpoint),
+            db_duration_per_request.labels(method=method, endpoint=endpoint),
+            request_size.labels(method=method, endpoint=endpoint),
+            response_size.labels(method=method, endpoint=endpoint),
+        )
+    return children
+
+
+def observe_request(
+    method: str,
+    endpoint: str,
+    status: int,
+    duration: float,
+    request_bytes: int,
+    response_bytes: int,
+    sql_stats=None,
+):
+    """上报一次请求的指标（由请求中间件在响应发送完毕后调用）"""
+    duration_metric, queries_metric, db_time_metric, req_size, resp_size = (
+        _children_for(method, endpoint)
+    )
+    request_count.labels(method=method, endpoint=endpoint, status=status).inc()
+    duration_metric.observe(duration)
+
+    # 请求内的 SQL 条数与数据库耗时
+    queries_metric.observe(sql_stats.count if sql_stats else 0)
+    db_time_metric.observe(sql_stats.duration if sql_stats else 0.0)
+
+    req_size.observe(request_bytes)
+    resp_size.observe(response_bytes)
+
+    if status >= 400:
+        error_count.labels(type="http_error", status=status).inc()
+
+
+def render_metrics() -> bytes:
+    """渲染 exposition，多进程模式下聚合 PROMETHEUS_MULTIPROC_DIR 中所有 worker 的指标"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
 
 def setup_prometheus(app):
-    """初始化 Prometheus 监控"""
-
-    @app.before_request
-    def before_request_metrics():
-        """记录请求开始时间和活跃请求数"""
-        g.metrics_start_time = time.time()
-        active_requests.inc()
-
-    @app.after_request
-    def after_request_metrics(response):
-        """记录请求指标"""
-        try:
-            # 计算耗时
-            duration = time.time() - getattr(g, "metrics_start_time", time.time())
-
-            # 获取端点信息
-            method = request.method
-            endpoint = request.endpoint or "unknown"
-            status = response.status_code
-
-            # 记录请求计数
-            request_count.labels(method=method, endpoint=endpoint, status=status).inc()
-
-            # 记录请求耗时
-            request_duration.labels(method=method, endpoint=endpoint).observe(duration)
-
-            # 记录请求大小
-            request_size.labels(method=method, endpoint=endpoint).observe(
-                request.content_length or 0
-            )
-
-            # 记录响应大小
-            try:
-                response_data_len = len(response.get_data())
-            except RuntimeError:
-                # 处理 passthrough 响应（如文件下载等）
-                response_data_len = 0
-            response_size.labels(method=method, endpoint=endpoint).observe(
-                response_data_len
-            )
-
-            # 错误统计
-            if status >= 400:
-                error_count.labels(type="http_error", status=status).inc()
-        finally:
-            # 减少活跃请求数
-            active_requests.dec()
-
-        return response
-
-    # 添加 /metrics 端点
+    """
+    初始化 Prometheus 监控
+    请求指标由 request_middleware 统一上报，这里只注册 /metrics 端点
+    """
+    # 添加 /metrics 端点（开发环境使用；gunicorn 下建议采集独立的 metrics 监听）
+    from app.extensions.metrics_server import cached_metrics, exposition_cache
+    from app.extensions.rate_limiting import limiter
+
+    exposition_cache.configure(ttl=app.config.get("METRICS_CACHE_TTL_SECONDS"))
+
     @app.route("/metrics")
+    @limiter.exempt
     def metrics():
         """Prometheus metrics 端点"""
-        return generate_latest(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+        return cached_metrics(), 200, {"Content-Type": "text/plain; charset=utf-8"}
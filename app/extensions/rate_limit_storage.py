@@ -0,0 +1,415 @@
+"""
+两级限流存储
+memory:// 每个 worker 各自计数，多 worker 下实际放行量是限额的 N 倍；
+redis:// 每次判断都要一次网络往返。这里在两者之间折中：
+- 本地：进程内按滑动窗口计数器（sliding-window-counter 策略）判断，不访问共享存储
+- 共享：后台线程每隔 sync_interval 秒把本地增量批量写入共享存储，并取回全局计数
+- over_admission：每个 worker 对每个 key 最多攒 limit * over_admission 次未同步的命中，
+  超出时这次命中同步写入共享存储再判断；多放行的上限约为 worker 数 * limit * over_admission，
+  设为 0 时每次放行都同步判断
+
+存储地址：tiered+sqlite:///path/to/ratelimit.db（同机多 worker 共享一个 SQLite 文件，无需网络）
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.errors import ConfigurationError
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+from app.logger import app_logger
+
+# SQLite 单条语句的参数个数有上限，按批查询
+_LOOKUP_BATCH_SIZE = 500
+# 过期计数的清理间隔（秒）
+_PURGE_INTERVAL = 60.0
+
+
+class SQLiteCounterStore:
+    """
+    共享计数存储：一张 key -> (count, expires_at) 的表
+    sync 在一个事务内累加一批增量并返回相关 key 的全局计数
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._last_purge = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # fork 出的子进程不能复用父进程的连接
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_counters ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def sync(self, deltas: dict, keys, now: float) -> dict:
+        """
+        deltas: key -> (增量, 过期时间)，key 不存在或已过期时以该增量和过期时间重新开始
+        keys: 额外需要取回全局计数的 key
+        返回 key -> (全局计数, 过期时间)，只包含未过期的 key
+        """
+        lookup = list(set(deltas).union(keys))
+        counts = {}
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE" if deltas else "BEGIN")
+            try:
+                if deltas:
+                    conn.executemany(
+                        "INSERT INTO rate_limit_counters (key, count, expires_at) "
+                        "VALUES (?, MAX(?, 0), ?) "
+                        "ON CONFLICT(key) DO UPDATE SET "
+                        "count = CASE WHEN expires_at <= ? THEN excluded.count "
+                        "ELSE MAX(count + ?, 0) END, "
+                        "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at "
+                        "ELSE expires_at END",
+                        [
+                            (key, amount, expires_at, now, amount, now)
+                            for key, (amount, expires_at) in deltas.items()
+                        ],
+                    )
+                    if now - self._last_purge >= _PURGE_INTERVAL:
+                        conn.execute(
+                            "DELETE FROM rate_limit_counters WHERE expires_at <= ?",
+                            (now,),
+                        )
+                        self._last_purge = now
+                for start in range(0, len(lookup), _LOOKUP_BATCH_SIZE):
+                    batch = lookup[start : start + _LOOKUP_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        "SELECT key, count, expires_at FROM rate_limit_counters "
+                        f"WHERE expires_at > ? AND key IN ({placeholders})",
+                        (now, *batch),
+                    )
+                    for key, count, expires_at in rows:
+                        counts[key] = (count, expires_at)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def clear(self, key: str):
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM rate_limit_counters WHERE key = ?", (key,)
+            )
+
+    def reset(self) -> int:
+        with self._lock:
+            return (
+                self._connection().execute("DELETE FROM rate_limit_counters").rowcount
+            )
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        with self._lock:
+            # 只关闭本进程打开的连接
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class _Counter:
+    """
+    本地计数
+    shared：上次同步取回的全局计数（已包含本进程同步过的命中）
+    pending：尚未同步的本地命中
+    """
+
+    __slots__ = ("shared", "pending", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.shared = 0
+        self.pending = 0
+        self.expires_at = expires_at
+
+    @property
+    def value(self) -> int:
+        return self.shared + self.pending
+
+
+class TieredStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """limits 存储后端：本地计数 + 批量同步到共享存储"""
+
+    STORAGE_SCHEME = ["tiered+sqlite"]
+
+    def __init__(
+        self,
+        uri: str | None = None,
+        wrap_exceptions: bool = False,
+        sync_interval: float = 0.01,
+        over_admission: float = 0.05,
+        **options,
+    ):
+        super().__init__(uri, wrap_exceptions, **options)
+        path = uri.split("://", 1)[1] if uri and "://" in uri else ""
+        if not path:
+            raise ConfigurationError("tiered+sqlite 需要指定数据库文件路径")
+        self.store = SQLiteCounterStore(path)
+        self.sync_interval = float(sync_interval)
+        self.over_admission = max(float(over_admission), 0.0)
+        self._counters: dict[str, _Counter] = {}
+        # 有未同步命中的 key / 上次同步后被读取过、需要刷新全局计数的 key
+        self._dirty: set[str] = set()
+        self._touched: set[str] = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._syncer_pid = None
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    # ---- 本地计数 ----
+
+    def _live_counter(self, key: str, now: float) -> _Counter | None:
+        """调用方持有 self._lock；过期的计数直接丢弃（包括未同步的命中）"""
+        counter = self._counters.get(key)
+        if counter is not None and counter.expires_at <= now:
+            del self._counters[key]
+            self._dirty.discard(key)
+            counter = None
+        return counter
+
+    def _read(self, key: str, now: float) -> int:
+        self._touched.add(key)
+        counter = self._live_counter(key, now)
+        return counter.value if counter is not None else 0
+
+    def _add(self, key: str, expiry: float, amount: int, now: float) -> int:
+        counter = self._live_counter(key, now)
+        if counter is None:
+            counter = self._counters[key] = _Counter(now + expiry)
+        counter.pending += amount
+        self._dirty.add(key)
+        return counter.value
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        self._ensure_syncer()
+        with self._lock:
+            return self._add(key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        self._ensure_syncer()
+        with self._lock:
+            return self._read(key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self._lock:
+            counter = self._live_counter(key, now)
+            return counter.expires_at if counter is not None else now
+
+    def check(self) -> bool:
+        return self.store.check()
+
+    def reset(self) -> int | None:
+        with self._sync_lock, self._lock:
+            count = len(self._counters)
+            self._counters.clear()
+            self._dirty.clear()
+            self._touched.clear()
+            self.store.reset()
+        return count
+
+    def clear(self, key: str) -> None:
+        with self._sync_lock:
+            with self._lock:
+                self._counters.pop(key, None)
+                self._dirty.discard(key)
+            self.store.clear(key)
+
+    # ---- 滑动窗口计数器（与 MemoryStorage 的算法一致）----
+
+    def _window(self, key: str, expiry: int, now: float):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._read(previous_key, now)
+        current_count = self._read(current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def _weighted_count(self, key: str, expiry: int, now: float) -> int:
+        previous_count, previous_ttl, current_count, _ = self._window(key, expiry, now)
+        return floor(previous_count * previous_ttl / expiry + current_count)
+
+    def get_sliding_window(self, key: str, expiry: int):
+        self._ensure_syncer()
+        with self._lock:
+            return self._window(key, expiry, time.time())
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        if amount > limit:
+            return False
+        self._ensure_syncer()
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        budget = floor(limit * self.over_admission)
+        with self._lock:
+            # 本地视图只会少算其他 worker 的命中，超限判断可以直接相信
+            if self._weighted_count(key, expiry, now) + amount > limit:
+                return False
+            counter = self._live_counter(current_key, now)
+            pending = counter.pending if counter is not None else 0
+            if pending + amount <= budget:
+                self._add(current_key, 2 * expiry, amount, now)
+                return True
+
+        # 本地预算用完：这次命中连同已攒的增量一起写入共享存储，按全局计数判断
+        expires_at = now + 2 * expiry
+        try:
+            self._sync({current_key: (amount, expires_at)}, (previous_key,))
+        except sqlite3.Error:
+            # 共享存储不可用时退化为本地计数，由后台线程稍后重试同步
+            with self._lock:
+                self._add(current_key, 2 * expiry, amount, now)
+            return True
+        with self._lock:
+            over_limit = self._weighted_count(key, expiry, now) > limit
+        if over_limit:
+            try:
+                self._sync({current_key: (-amount, expires_at)})
+            except sqlite3.Error:
+                # 撤回失败时与命中路径一样退化为本地计数，由后台线程稍后把撤回同步出去
+                with self._lock:
+                    self._add(current_key, 2 * expiry, -amount, now)
+            return False
+        return True
+
+    # ---- 同步 ----
+
+    def _sync(self, extra: dict | None = None, refresh=()):
+        """
+        把本地增量（和 extra 中直接写入共享存储的命中）批量同步，
+        并用返回的全局计数更新本地视图
+        """
+        with self._sync_lock:
+            with self._lock:
+                deltas = {}
+                for key in self._dirty:
+                    counter = self._counters.get(key)
+                    if counter is not None and counter.pending:
+                        deltas[key] = (counter.pending, counter.expires_at)
+                        # 同步期间仍计入本地视图
+                        counter.shared += counter.pending
+                        counter.pending = 0
+                keys = self._touched.union(refresh)
+                self._dirty.clear()
+                self._touched.clear()
+            flushed = dict(deltas)
+            for key, (amount, expires_at) in (extra or {}).items():
+                pending, pending_expires_at = deltas.get(key, (0, expires_at))
+                deltas[key] = (pending + amount, pending_expires_at)
+
+            try:
+                counts = self.store.sync(deltas, keys, time.time())
+            except BaseException:
+                with self._lock:
+                    for key, (amount, _) in flushed.items():
+                        counter = self._counters.get(key)
+                        if counter is not None:
+                            counter.shared -= amount
+                            counter.pending += amount
+                            self._dirty.add(key)
+                raise
+
+            with self._lock:
+                for key in keys.union(deltas):
+                    count, expires_at = counts.get(key, (0, None))
+                    counter = self._counters.get(key)
+                    if counter is None:
+                        if expires_at is None:
+                            continue
+                        counter = self._counters[key] = _Counter(expires_at)
+                    counter.shared = count
+                    if expires_at is not None:
+                        counter.expires_at = expires_at
+
+    def _ensure_syncer(self):
+        # fork 出的 worker 没有父进程的同步线程，按 pid 判断是否需要重新启动
+        if self._syncer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._syncer_pid == os.getpid():
+                return
+            self._syncer_pid = os.getpid()
+            threading.Thread(
+                target=self._run_syncer, name="rate-limit-sync", daemon=True
+            ).start()
+
+    def _purge_expired(self, now: float):
+        with self._lock:
+            for key in [k for k, c in self._counters.items() if c.expires_at <= now]:
+                self._live_counter(key, now)
+
+    def _run_syncer(self):
+        failing = False
+        last_purge = time.time()
+        while not self._stopped.wait(self.sync_interval):
+            now = time.time()
+            if now - last_purge >= _PURGE_INTERVAL:
+                self._purge_expired(now)
+                last_purge = now
+            if not self._dirty and not self._touched:
+                continue
+            try:
+                self._sync()
+            except sqlite3.Error:
+                # 共享存储不可用时继续按本地计数限流，只在故障开始时记一次日志
+                if not failing:
+                    app_logger.exception("限流计数同步失败，暂按本地计数限流")
+                failing = True
+            else:
+                failing = False
+
+    def flush(self):
+        """立即同步一次（测试和进程退出时使用）"""
+        self._sync()
+
+    def close(self):
+        """停止同步线程并写入剩余的本地命中（worker 退出时调用）"""
+        self._stopped.set()
+        try:
+            self.flush()
+        except sqlite3.Error:
+            app_logger.exception("退出时同步限流计数失败，未同步的本地命中被丢弃")
+        self.store.close()
@@ -1,24 +1,78 @@
 """
 API 速率限制
 防止 API 滥用，保护服务
+- memory://：每个 worker 独立计数，仅适合单进程
+- tiered+sqlite:///path.db：本地计数 + 批量同步到共享 SQLite 文件（见 rate_limit_storage）
+- redis://：每次判断访问 Redis
 """
 
-import os
-
+from flask import has_request_context, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-# 创建限制器实例
-limiter = Limiter(
+# 导入即向 limits 注册 tiered+sqlite 存储
+from app.extensions import rate_limit_storage
+
+# 本次请求的限流判断结果：{(限额, 作用域): "allowed" / "blocked"}，由请求中间件上报
+RATE_LIMIT_DECISIONS_ENVIRON_KEY = "app.rate_limit_decisions"
+
+
+class MeteredLimiter(Limiter):
+    """
+    Flask-Limiter 每完成一轮判断，就把结果写入 request.environ，
+    由请求中间件在响应结束时统一上报 rate_limit_decisions_total，不额外注册请求钩子。
+    deduct_when 限额在判断时只 test 不扣减，是否计数要等响应出来才知道，不计入判断次数。
+    依赖 Flask-Limiter 4.1 的 _check_request_limit / context，版本在 pyproject 中固定
+    """
+
+    def _check_request_limit(self, *args, **kwargs):
+        try:
+            return super()._check_request_limit(*args, **kwargs)
+        finally:
+            self._stash_decisions()
+
+    def _stash_decisions(self):
+        if not has_request_context() or not self.current_limits:
+            return
+        conditional = list(self.context.conditional_deductions.values())
+        decisions = request.environ.setdefault(RATE_LIMIT_DECISIONS_ENVIRON_KEY, {})
+        for request_limit in self.current_limits:
+            if any(request_limit.request_args is args for args in conditional):
+                continue
+            decisions[(str(request_limit.limit), request_limit.request_args[-1])] = (
+                "blocked" if request_limit.breached else "allowed"
+            )
+
+
+# 创建限制器实例，存储地址在 setup_rate_limiting 中从应用配置读取
+limiter = MeteredLimiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],  # 默认限制
-    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"),
 )
 
 
+def close_rate_limit_storage():
+    """gunicorn worker 退出时调用：两级存储写入尚未同步的命中并停止同步线程"""
+    if limiter.initialized and isinstance(
+        limiter.storage, rate_limit_storage.TieredStorage
+    ):
+        limiter.storage.close()
+
+
 def setup_rate_limiting(app):
     """初始化速率限制"""
     storage_uri = app.config.get("RATE_LIMIT_STORAGE_URI", "memory://")
     app.config["RATELIMIT_STORAGE_URI"] = storage_uri
+    if storage_uri.startswith("tiered+"):
+        # 两级存储只实现了滑动窗口计数器，多放行容忍度也依赖该策略拿到限额
+        app.config.setdefault("RATELIMIT_STRATEGY", "sliding-window-counter")
+        app.config.setdefault(
+            "RATELIMIT_STORAGE_OPTIONS",
+            {
+                "sync_interval": app.config.get("RATE_LIMIT_SYNC_INTERVAL_MS", 10)
+                / 1000,
+                "over_admission": app.config.get("RATE_LIMIT_OVER_ADMISSION", 0.05),
+            },
+        )
     limiter.init_app(app)
     return limiter
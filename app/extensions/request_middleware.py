@@ -0,0 +1,227 @@
+"""
+请求中间件
+用一层 WSGI 中间件完成原先分散在多个 before/after_request 钩子里的横切逻辑：
+- 一次 perf_counter 计时
+- 生成或透传 request ID，写入 environ，并回写 X-Request-ID / X-Response-Time
+- 追加启动时构建好的安全响应头
+- 响应体发送完毕（close）后统一上报 Prometheus 指标（含限流判断结果）并写一条结构化访问日志
+  （2xx/3xx 按 ACCESS_LOG_SAMPLE_RATE 采样，错误和慢请求始终记录）
+- wsgi.file_wrapper 响应（send_file）原样返回，服务器仍可使用 sendfile；
+  只替换其 close，响应字节数取 Content-Length
+限流仍由 Flask-Limiter 的 before_request 钩子负责
+"""
+
+import random
+import time
+
+from app.extensions.prometheus_metrics import (
+    active_requests,
+    observe_request,
+    rate_limit_decisions,
+)
+from app.extensions.rate_limiting import RATE_LIMIT_DECISIONS_ENVIRON_KEY
+from app.extensions.request_tracking import (
+    REQUEST_ID_ENVIRON_KEY,
+    USER_ID_ENVIRON_KEY,
+    generate_request_id,
+)
+from app.extensions.security_headers import build_security_headers
+from app.extensions.sql_instrumentation import SQL_STATS_ENVIRON_KEY
+from app.logger import access_logger
+
+# Flask 在请求结束时会清掉 environ["werkzeug.request"]，这里另存一份供中间件读取路由结果
+FLASK_REQUEST_ENVIRON_KEY = "app.flask_request"
+
+
+def _parse_length(value) -> int | None:
+    """解析 Content-Length，非法值按缺失处理"""
+    try:
+        length = int(value)
+    except (TypeError, ValueError):
+        return None
+    return length if length >= 0 else None
+
+
+class _ResponseBody:
+    """包装 WSGI 响应体，边发送边计数，close 时回调一次"""
+
+    def __init__(self, iterable, on_close):
+        self._iterable = iterable
+        self._on_close = on_close
+        self._size = 0
+        self._closed = False
+
+    def __iter__(self):
+        for chunk in self._iterable:
+            self._size += len(chunk)
+            yield chunk
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._iterable, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._on_close(self._size)
+
+
+def _hook_close(app_iter, on_close):
+    """
+    保留 wsgi.file_wrapper 对象本身（服务器按类型判断是否走 sendfile），只把 close 换成带回调的版本
+    无法替换时退回 _ResponseBody 包装
+    """
+    original = getattr(app_iter, "close", None)
+    closed = False
+
+    def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            if original is not None:
+                original()
+        finally:
+            on_close(0)
+
+    try:
+        app_iter.close = close
+    except AttributeError:
+        return _ResponseBody(app_iter, on_close)
+    return app_iter
+
+
+class RequestMiddleware:
+    def __init__(
+        self,
+        wsgi_app,
+        security_headers,
+        access_log_sample_rate: float = 1.0,
+        access_log_slow_seconds: float = 1.0,
+    ):
+        self.wsgi_app = wsgi_app
+        self.security_headers = tuple(security_headers)
+        self.access_log_sample_rate = access_log_sample_rate
+        self.access_log_slow_seconds = access_log_slow_seconds
+        # 这些头由中间件统一设置，视图返回的同名头会被覆盖
+        self._managed = frozenset(
+            [name.lower() for name, _ in self.security_headers]
+            + ["x-request-id", "x-response-time"]
+        )
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        request_id = environ.get("HTTP_X_REQUEST_ID") or generate_request_id()
+        environ[REQUEST_ID_ENVIRON_KEY] = request_id
+        state = {"status": 500, "content_length": None}
+        active_requests.inc()
+
+        def _start_response(status, headers, exc_info=None):
+            state["status"] = int(status.split(" ", 1)[0])
+            response_headers = []
+            for name, value in headers:
+                lowered = name.lower()
+                if lowered in self._managed:
+                    continue
+                if lowered == "content-length":
+                    state["content_length"] = _parse_length(value)
+                response_headers.append((name, value))
+            response_headers.extend(self.security_headers)
+            response_headers.append(("X-Request-ID", request_id))
+            response_headers.append(
+                ("X-Response-Time", f"{time.perf_counter() - start:.3f}s")
+            )
+            return start_response(status, response_headers, exc_info)
+
+        def _finish(sent_bytes):
+            try:
+                self._record(environ, state, start, sent_bytes)
+            finally:
+                active_requests.dec()
+
+        try:
+            app_iter = self.wsgi_app(environ, _start_response)
+        except BaseException:
+            _finish(0)
+            raise
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(app_iter, file_wrapper):
+            return _hook_close(app_iter, _finish)
+        return _ResponseBody(app_iter, _finish)
+
+    def _record(self, environ, state, start, sent_bytes):
+        duration = time.perf_counter() - start
+        method = environ.get("REQUEST_METHOD", "GET")
+        status = state["status"]
+        # 取出后即删除，断开 environ 与 Request 之间的循环引用
+        flask_request = environ.pop(FLASK_REQUEST_ENVIRON_KEY, None)
+        endpoint = getattr(flask_request, "endpoint", None) or "unknown"
+        url_rule = getattr(flask_request, "url_rule", None)
+        content_length = state["content_length"]
+        response_bytes = content_length if content_length is not None else sent_bytes
+
+        observe_request(
+            method=method,
+            endpoint=endpoint,
+            status=status,
+            duration=duration,
+            request_bytes=_parse_length(environ.get("CONTENT_LENGTH")) or 0,
+            response_bytes=response_bytes,
+            sql_stats=environ.get(SQL_STATS_ENVIRON_KEY),
+        )
+        for (limit, scope), result in environ.get(
+            RATE_LIMIT_DECISIONS_ENVIRON_KEY, {}
+        ).items():
+            rate_limit_decisions.labels(limit=limit, scope=scope, result=result).inc()
+
+        if not self._should_log(status, duration):
+            return
+        record = {
+            "method": method,
+            # 用路由模板而不是实际路径，避免日志字段基数过高
+            "route": url_rule.rule if url_rule is not None else None,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "bytes": response_bytes,
+            "request_id": environ.get(REQUEST_ID_ENVIRON_KEY),
+            "user_id": environ.get(USER_ID_ENVIRON_KEY),
+        }
+        access_logger.info(
+            "%s %s %s %.2fms %sB request_id=%s user_id=%s",
+            method,
+            record["route"] or "-",
+            status,
+            record["duration_ms"],
+            response_bytes,
+            record["request_id"],
+            record["user_id"] or "-",
+            extra={"access": record},
+        )
+
+    def _should_log(self, status: int, duration: float) -> bool:
+        """错误和慢请求始终记录，其余按采样率记录"""
+        if status >= 400 or duration >= self.access_log_slow_seconds:
+            return True
+        rate = self.access_log_sample_rate
+        return rate >= 1 or random.random() < rate
+
+
+def setup_request_middleware(app):
+    """在 Flask 的 wsgi_app 外层挂载请求中间件"""
+    base_request_class = app.request_class
+
+    class TrackedRequest(base_request_class):
+        def __init__(self, environ, *args, **kwargs):
+            super().__init__(environ, *args, **kwargs)
+            environ[FLASK_REQUEST_ENVIRON_KEY] = self
+
+    app.request_class = TrackedRequest
+    app.wsgi_app = RequestMiddleware(
+        app.wsgi_app,
+        build_security_headers(app),
+        access_log_sample_rate=app.config.get("ACCESS_LOG_SAMPLE_RATE", 1.0),
+        access_log_slow_seconds=app.config.get("ACCESS_LOG_SLOW_MS", 1000) / 1000,
+    )
@@ -1,11 +1,15 @@
 """
-请求追踪中间件
-为每个请求生成唯一的 request ID，用于日志追踪
+请求追踪
+request ID 由请求中间件（见 request_middleware.py）生成或从 X-Request-ID 透传，
+写入 WSGI environ，用于日志追踪和错误响应
 """
 
 import uuid
-import time
-from flask import request, g
+
+from flask import has_request_context, request
+
+REQUEST_ID_ENVIRON_KEY = "app.request_id"
+USER_ID_ENVIRON_KEY = "app.user_id"
 
 
 def generate_request_id():
@@ -13,34 +17,14 @@ def generate_request_id():
     return str(uuid.uuid4())
 
 
-def setup_request_tracking(app):
-    """
-    设置请求追踪中间件
-
-    在每个请求前生成追踪 ID，放入 g 对象和响应头
-    所有日志都会包含该 ID，便于追踪完整的请求链路
-    """
-
-    @app.before_request
-    def before_request():
-        # 从请求头获取或生成新的 request ID
-        request_id = request.headers.get("X-Request-ID") or generate_request_id()
-        g.request_id = request_id
-        g.start_time = time.time()
-
-    @app.after_request
-    def after_request(response):
-        # 在响应头中添加 request ID
-        response.headers["X-Request-ID"] = g.get("request_id", "")
-
-        # 记录请求耗时
-        if hasattr(g, "start_time"):
-            elapsed = time.time() - g.start_time
-            response.headers["X-Response-Time"] = f"{elapsed:.3f}s"
-
-        return response
+def get_request_id(default: str = "N/A"):
+    """获取当前请求的 ID，不在请求上下文时返回 default"""
+    if not has_request_context():
+        return default
+    return request.environ.get(REQUEST_ID_ENVIRON_KEY, default)
 
 
-def get_request_id():
-    """获取当前请求的 ID"""
-    return g.get("request_id", "unknown")
+def set_request_user(user_id):
+    """记录当前请求的登录用户，供请求结束后的访问日志使用"""
+    if has_request_context():
+        request.environ[USER_ID_ENVIRON_KEY] = user_id
@@ -4,9 +4,9 @@
 """
 
 
-def setup_security_headers(app):
+def build_security_headers(app) -> tuple[tuple[str, str], ...]:
     """
-    设置安全响应头
+    构建安全响应头（启动时计算一次，由请求中间件追加到每个响应）
 
     包括：
     - X-Content-Type-Options: 防止 MIME 嗅探
@@ -15,37 +15,30 @@ def setup_security_headers(app):
     - Strict-Transport-Security: HTTPS 强制
     - Content-Security-Policy: 防止 XSS 和注入攻击
     """
-
-    @app.after_request
-    def set_security_headers(response):
+    headers = [
         # 防止浏览器猜测 MIME 类型
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
+        ("X-Content-Type-Options", "nosniff"),
         # 防止网站被 iframe 嵌入（点击劫持防护）
-        response.headers["X-Frame-Options"] = "SAMEORIGIN"
-
+        ("X-Frame-Options", "SAMEORIGIN"),
         # 启用浏览器 XSS 防护
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-
+        ("X-XSS-Protection", "1; mode=block"),
         # 内容安全策略（防止 XSS、注入等攻击）
-        response.headers["Content-Security-Policy"] = (
+        (
+            "Content-Security-Policy",
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline'; "
             "style-src 'self' 'unsafe-inline'; "
             "img-src 'self' data: https:; "
-            "font-src 'self'"
-        )
-
-        # 禁用 MIME 类型嗅探
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
+            "font-src 'self'",
+        ),
         # 引荐人策略（隐私保护）
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ]
 
-        # 强制 HTTPS（仅生产环境）
-        if app.config.get("ENV") == "production":
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains"
-            )
+    # 强制 HTTPS（仅生产环境）
+    if app.config.get("ENV") == "production":
+        headers.append(
+            ("Strict-Transport-Security", "max-age=31536000; includeSubDomains")
+        )
 
-        return response
+    return tuple(headers)
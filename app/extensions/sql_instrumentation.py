@@ -0,0 +1,97 @@
+"""
+请求级 SQL 埋点
+通过 before/after_cursor_execute 事件统计每个请求的语句数和数据库耗时（存放在 WSGI environ 中），
+响应发送完毕后由请求中间件按 endpoint 上报。
+- 单条语句耗时超过 SQL_SLOW_QUERY_MS 记录慢查询日志（带 request_id）
+- 同一请求内同一条 SQL 执行次数达到 SQL_N_PLUS_ONE_THRESHOLD 时记录疑似 N+1
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from app.extensions.extensions import db
+from app.extensions.prometheus_metrics import db_n_plus_one_suspected, db_slow_queries
+from app.extensions.request_tracking import get_request_id
+from app.logger import app_logger
+
+_START_KEY = "query_start_time"
+
+SQL_STATS_ENVIRON_KEY = "app.sql_stats"
+
+
+@dataclass
+class SQLStats:
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+def get_sql_stats() -> SQLStats | None:
+    """当前请求的 SQL 统计，不在请求上下文或未执行过 SQL 时返回 None"""
+    if not has_request_context():
+        return None
+    return request.environ.get(SQL_STATS_ENVIRON_KEY)
+
+
+def _truncate(statement: str, limit: int = 500) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def setup_sql_instrumentation(app):
+    if not app.config.get("SQL_INSTRUMENTATION_ENABLED", True):
+        return
+
+    slow_threshold = app.config.get("SQL_SLOW_QUERY_MS", 200) / 1000
+    n_plus_one_threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        starts = conn.info.get(_START_KEY)
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        in_request = has_request_context()
+        endpoint = (request.endpoint or "unknown") if in_request else "none"
+        request_id = get_request_id()
+
+        if elapsed >= slow_threshold:
+            db_slow_queries.labels(endpoint=endpoint).inc()
+            app_logger.warning(
+                "slow query: request_id=%s endpoint=%s duration_ms=%.1f sql=%s",
+                request_id,
+                endpoint,
+                elapsed * 1000,
+                _truncate(statement),
+            )
+
+        if not in_request:
+            return
+        stats = request.environ.get(SQL_STATS_ENVIRON_KEY)
+        if stats is None:
+            stats = request.environ[SQL_STATS_ENVIRON_KEY] = SQLStats()
+        stats.count += 1
+        stats.duration += elapsed
+        stats.statements[statement] += 1
+        # 只在刚好达到阈值时记录一次，避免同一循环刷屏
+        if stats.statements[statement] == n_plus_one_threshold:
+            db_n_plus_one_suspected.labels(endpoint=endpoint).inc()
+            app_logger.warning(
+                "suspected N+1: request_id=%s endpoint=%s repeated=%d sql=%s",
+                request_id,
+                endpoint,
+                n_plus_one_threshold,
+                _truncate(statement),
+            )
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -3,11 +3,18 @@
 提供 JSON 格式的日志输出，便于日志聚合和分析
 """
 
+import importlib
 import json
 import logging
+import time
 from datetime import datetime, timezone
+from typing import Callable
 
-from flask import g, has_request_context, request
+from flask import has_request_context, request
+
+from app.extensions.request_tracking import get_request_id
+
+_LOG_CONTEXT_ENVIRON_KEY = "app.log_context"
 
 
 class JSONFormatter(logging.Formatter):
@@ -26,11 +33,16 @@ class JSONFormatter(logging.Formatter):
 
         # 添加请求上下文信息
         if has_request_context():
-            log_data["request_id"] = g.get("request_id", "N/A")
+            log_data["request_id"] = get_request_id()
             log_data["http_method"] = request.method
             log_data["http_path"] = request.path
             log_data["http_remote_addr"] = request.remote_addr
 
+        # 访问日志的结构化字段（见 request_middleware）
+        access = getattr(record, "access", None)
+        if access:
+            log_data.update(access)
+
         # 如果有异常信息，添加到日志
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
@@ -38,6 +50,102 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_data, ensure_ascii=False)
 
 
+def _stdlib_dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def resolve_json_encoder(name: str = "auto") -> Callable[[dict], str]:
+    """
+    选择日志 JSON 编码器
+    - auto：装了 orjson 就用 orjson，否则用标准库
+    - json / orjson：指定实现
+    - "module:callable"：自定义编码函数，接收 dict 返回 str
+    """
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            if name == "orjson":
+                raise
+        else:
+
+            def _orjson_dumps(data: dict) -> str:
+                return orjson.dumps(data, default=str).decode("utf-8")
+
+            return _orjson_dumps
+    if name in ("auto", "json"):
+        return _stdlib_dumps
+    module_name, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class FastJSONFormatter(logging.Formatter):
+    """
+    输出字段与 JSONFormatter 相同，减少每条记录的开销：
+    - 请求上下文字段每个请求只读取一次，缓存在 request.environ 中
+      （g 属于应用上下文，同一应用上下文内的多个请求会共用）
+    - 时间戳取自 record.created，按秒缓存 "YYYY-MM-DDTHH:MM:SS" 前缀
+    - JSON 编码器可替换（默认优先 orjson）
+    """
+
+    def __init__(self, dumps: Callable[[dict], str] | None = None):
+        super().__init__()
+        self.dumps = dumps or resolve_json_encoder()
+        # (秒, 前缀) 作为一个元组整体替换，多线程下不会读到不匹配的组合
+        self._second_prefix = (None, "")
+
+    def _timestamp(self, created: float) -> str:
+        # 与 datetime.fromtimestamp 一样按微秒四舍五入
+        second, micros = divmod(round(created * 1_000_000), 1_000_000)
+        cached_second, prefix = self._second_prefix
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_prefix = (second, prefix)
+        return f"{prefix}.{micros:06d}+00:00"
+
+    @staticmethod
+    def _request_context() -> dict | None:
+        if not has_request_context():
+            return None
+        environ = request.environ
+        context = environ.get(_LOG_CONTEXT_ENVIRON_KEY)
+        if context is None:
+            context = environ[_LOG_CONTEXT_ENVIRON_KEY] = {
+                "http_method": request.method,
+                "http_path": request.path,
+                "http_remote_addr": request.remote_addr,
+            }
+        return context
+
+    def format(self, record):
+        log_data = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+
+        context = self._request_context()
+        if context is not None:
+            # request_id 可能在请求中途才写入，每次从 environ 读取
+            log_data["request_id"] = get_request_id()
+            log_data.update(context)
+
+        access = getattr(record, "access", None)
+        if access:
+            log_data.update(access)
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            log_data["exception"] = record.exc_text
+
+        return self.dumps(log_data)
+
+
 def setup_structured_logging(app):
     """
     设置结构化日志
@@ -48,7 +156,9 @@ def setup_structured_logging(app):
 
     if env == "production":
         # 生产环境使用 JSON 格式
-        json_formatter = JSONFormatter()
+        json_formatter = FastJSONFormatter(
+            resolve_json_encoder(app.config.get("LOG_JSON_ENCODER", "auto"))
+        )
 
         for handler in app.logger.handlers:
             handler.setFormatter(json_formatter)
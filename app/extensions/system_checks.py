@@ -11,6 +11,7 @@ from typing import Any
 from flask import current_app
 from sqlalchemy import text
 
+from app.extensions.db_pool_metrics import pool_status
 from app.extensions.extensions import db
 
 
@@ -86,12 +87,37 @@ def _check_sqlalchemy_pool() -> CheckResult:
     )
 
 
+def _check_sqlalchemy_pool_saturation() -> CheckResult:
+    """连接池实时饱和度：已借出连接数 / (pool_size + max_overflow)"""
+    status = pool_status(db.engine.pool)
+    if status is None:
+        return CheckResult(
+            "sqlalchemy_pool_saturation",
+            "pass",
+            f"{type(db.engine.pool).__name__} has no fixed capacity",
+        )
+    detail = (
+        f"checked_out={status['checked_out']}, overflow={status['overflow']}, "
+        f"idle={status['idle']}, capacity={status['capacity'] or 'unbounded'}"
+    )
+    saturation = status["saturation"]
+    if saturation is None:
+        return CheckResult("sqlalchemy_pool_saturation", "pass", detail)
+
+    detail = f"{detail}, saturation={saturation:.0%}"
+    threshold = current_app.config.get("DB_POOL_SATURATION_WARN", 0.8)
+    if saturation >= threshold:
+        return CheckResult("sqlalchemy_pool_saturation", "warn", detail)
+    return CheckResult("sqlalchemy_pool_saturation", "pass", detail)
+
+
 def run_system_checks() -> dict[str, Any]:
     checks = [
         _check_database_connection(),
         _check_required_production_secrets(),
         _check_rate_limit_storage(),
         _check_sqlalchemy_pool(),
+        _check_sqlalchemy_pool_saturation(),
     ]
 
     summary = {"pass": 0, "warn": 0, "fail": 0}
@@ -1,7 +1,10 @@
+import atexit
 import logging
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 import os
 
+from app.utils.log_pipeline import LogPipeline, RoutingHandler, gzip_rotation
+
 # 日志路径按环境区分
 ENV = os.getenv("FLASK_ENV", "development")  # development / production
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,12 +24,9 @@ class RequestIDFilter(logging.Filter):
 
     def filter(self, record):
         try:
-            from flask import g, has_request_context
+            from app.extensions.request_tracking import get_request_id
 
-            if has_request_context():
-                record.request_id = g.get("request_id", "N/A")
-            else:
-                record.request_id = "N/A"
+            record.request_id = get_request_id()
         except RuntimeError:
             # 在应用启动阶段，没有请求上下文
             record.request_id = "N/A"
@@ -42,17 +42,60 @@ simple_formatter = logging.Formatter(
     "%(asctime)s [%(levelname)s] [%(name)s] [%(filename)s:%(lineno)d] %(message)s"
 )
 
+# ================= 写入线程侧的文件 handler =================
+# 格式化在 QueueHandler 中完成（请求上下文只在调用线程可用），文件 handler 只写入消息
+_passthrough_formatter = logging.Formatter("%(message)s")
+
+# 队列长度上限，超过后新日志直接丢弃并计入 log_records_dropped_total
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+def _build_writer():
+    app_handler = gzip_rotation(
+        RotatingFileHandler(
+            os.path.join(LOG_DIR, "app.log"),
+            maxBytes=10 * 1024 * 1024,  # 10MB
+            backupCount=5,
+            encoding="utf-8",
+            delay=True,
+        )
+    )
+    access_handler = gzip_rotation(
+        TimedRotatingFileHandler(
+            os.path.join(LOG_DIR, "access.log"),
+            when="midnight",  # 每天新文件
+            interval=1,
+            backupCount=30,
+            encoding="utf-8",
+            delay=True,
+        )
+    )
+    error_handler = gzip_rotation(
+        RotatingFileHandler(
+            os.path.join(LOG_DIR, "error.log"),
+            maxBytes=10 * 1024 * 1024,
+            backupCount=5,
+            encoding="utf-8",
+            delay=True,
+        )
+    )
+    for handler in (app_handler, access_handler, error_handler):
+        handler.setFormatter(_passthrough_formatter)
+    # 未列出的 logger（如 Flask 的 app.logger）写入 app.log
+    return RoutingHandler(
+        routes={"access_logger": access_handler, "error_logger": error_handler},
+        default=app_handler,
+    )
+
+
+log_pipeline = LogPipeline(_build_writer, queue_size=LOG_QUEUE_SIZE)
+
 # ================= 应用/业务日志 =================
 app_logger = logging.getLogger("app_logger")
 app_logger.setLevel(logging.INFO)
 app_logger.addFilter(RequestIDFilter())
 
-app_handler = RotatingFileHandler(
-    os.path.join(LOG_DIR, "app.log"),
-    maxBytes=10 * 1024 * 1024,  # 10MB
-    backupCount=5,
-    encoding="utf-8",
-)
+app_handler = log_pipeline.queue_handler()
 app_handler.setFormatter(formatter)
 if not app_logger.handlers:
     app_logger.addHandler(app_handler)
@@ -63,13 +106,7 @@ access_logger.setLevel(logging.INFO)
 # 不添加 RequestIDFilter，避免日志格式错误
 access_logger.propagate = False  # 不传播给根logger
 
-access_handler = TimedRotatingFileHandler(
-    os.path.join(LOG_DIR, "access.log"),
-    when="midnight",  # 每天新文件
-    interval=1,
-    backupCount=30,
-    encoding="utf-8",
-)
+access_handler = log_pipeline.queue_handler()
 access_handler.setFormatter(simple_formatter)
 if not access_logger.handlers:
     access_logger.addHandler(access_handler)
@@ -79,16 +116,15 @@ error_logger = logging.getLogger("error_logger")
 error_logger.setLevel(logging.ERROR)
 error_logger.addFilter(RequestIDFilter())
 
-error_handler = RotatingFileHandler(
-    os.path.join(LOG_DIR, "error.log"),
-    maxBytes=10 * 1024 * 1024,
-    backupCount=5,
-    encoding="utf-8",
-)
+error_handler = log_pipeline.queue_handler()
 error_handler.setFormatter(formatter)
 if not error_logger.handlers:
     error_logger.addHandler(error_handler)
 
+# 单进程模式直接在本进程启动写入线程；gunicorn 主进程会在 fork 前改为独立的日志进程
+log_pipeline.start()
+atexit.register(log_pipeline.stop)
+
 # # ================= 控制台日志（可选开发用） =================
 # console_handler = logging.StreamHandler()
 # console_handler.setFormatter(formatter)
@@ -1,5 +1,6 @@
 from app.extensions.extensions import db
 from datetime import datetime
+from sqlalchemy.orm import load_only
 
 
 class Poster(db.Model):
@@ -19,6 +20,23 @@ class Poster(db.Model):
     )
     user = db.relationship("User", back_populates="posters")
 
+    __table_args__ = (
+        # list_messages: status == 256 ORDER BY id DESC
+        db.Index("ix_posters_status_id", "status", "id"),
+        # search_poster / get_poster_detail: user_id (+ status) ORDER BY id DESC
+        db.Index("ix_posters_user_id_status_id", "user_id", "status", "id"),
+    )
+
+    @classmethod
+    def list_columns(cls):
+        """to_dict 用到的列"""
+        return (cls.id, cls.title, cls.status, cls.created_at)
+
+    @classmethod
+    def list_options(cls):
+        """列表查询只加载 to_dict 用到的列，不读取 content 大字段"""
+        return load_only(*cls.list_columns())
+
     def to_dict(self):
         return {
             "id": self.id,
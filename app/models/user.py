@@ -8,6 +8,14 @@ user_role = db.Table(
     db.Column("role_id", db.Integer, db.ForeignKey("role.id")),  # 关联 role.id
 )
 
+role_permission = db.Table(
+    "role_permission",
+    db.Column("role_id", db.Integer, db.ForeignKey("role.id"), primary_key=True),
+    db.Column(
+        "permission_id", db.Integer, db.ForeignKey("permission.id"), primary_key=True
+    ),
+)
+
 
 class User(db.Model):
     __tablename__ = "users"
@@ -19,6 +27,9 @@ class User(db.Model):
     username = db.Column(db.String(64), nullable=False)
     password = db.Column(db.String(128))
 
+    # token 版本：+1 后该用户之前签发的所有 token 失效（logout-all）
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -73,6 +84,9 @@ class Refresh(db.Model):
     # 是否有效（核心字段）
     is_revoked = db.Column(db.Boolean, default=False)
 
+    # 撤销时间（清理任务按宽限期删除已撤销记录）
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
     # 过期时间
     expires_at = db.Column(db.DateTime, nullable=False)
 
@@ -85,9 +99,31 @@ class Refresh(db.Model):
     # 反向关系
     user = db.relationship("User", back_populates="refresh_tokens")
 
+    __table_args__ = (
+        # prune_refresh_tokens: is_revoked + expires_at 范围批量删除
+        db.Index("ix_refresh_tokens_revoked_expires", "is_revoked", "expires_at"),
+    )
+
 
 class Role(db.Model):
     __tablename__ = "role"
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50))
+
+    permissions = db.relationship(
+        "Permission",
+        secondary=role_permission,
+        backref="roles",
+    )
+
+
+class Permission(db.Model):
+    __tablename__ = "permission"
+
+    # id 同时作为权限位图中的位序号（bit = id - 1），删除后不要复用
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(64), nullable=False)
+    name = db.Column(db.String(100))
+
+    __table_args__ = (db.Index("uq_permission_code", "code", unique=True),)
@@ -42,6 +42,9 @@ class Login(BaseModel):
     email: Optional[EmailStr] = Field(None, description="邮箱地址")
     username: Optional[str] = Field(None, description="用户名")
     password: str = Field(..., description="密码")
+    device: Optional[str] = Field(
+        None, max_length=64, description="设备标识，同一设备重复登录会替换旧会话"
+    )
 
     @field_validator("email", "username")
     @classmethod
@@ -25,3 +25,6 @@ class ListPosterQuery(BaseModel):
     page: int = Field(1, ge=1, description="当前页数")
     page_size: int = Field(10, ge=1, le=100, description="每页数量")
     status: Optional[int] = Field(None, description="状态筛选")
+    cursor: Optional[str] = Field(
+        None, max_length=128, description="游标分页：传空串取第一页，之后传 next_cursor"
+    )
@@ -1,16 +1,35 @@
 import hashlib
 from datetime import timedelta, datetime
 
-from app.exceptions.base import BusinessError, ConflictError, ValidationError
+from app.exceptions.base import (
+    BusinessError,
+    ConflictError,
+    ServiceUnavailableError,
+    ValidationError,
+)
 from app.models.user import User, Refresh
-from app.extensions.extensions import db, bcrypt
+from app.extensions.extensions import db
+from app.extensions.password_hasher import password_hasher
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     get_jwt_identity,
 )
-from sqlalchemy import or_
+from flask import current_app
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.utils.db import supports_update_returning
+from app.utils.jwt_cache import current_jwt_identity
 from app.utils.snowflake import snowflake
+from app.services.identity_filter import identity_filter
+from app.services.user_cache import require_cached_user
+from app.services.permission_service import permission_claims
+from app.services.token_epoch import (
+    bump_token_version,
+    current_token_version,
+    push_token_version,
+    token_version_claims,
+)
 
 
 def _hash_refresh_token(token: str) -> str:
@@ -25,11 +44,26 @@ def _commit_or_raise(message: str, code: int, http_code: int = 500) -> None:
         raise BusinessError(message, code=code, http_code=http_code) from exc
 
 
+def _create_access_token(user_pk: int, user_id, token_version) -> str:
+    return create_access_token(
+        identity=str(user_id),
+        additional_claims={
+            **permission_claims(user_pk),
+            **token_version_claims(token_version),
+        },
+    )
+
+
+def _create_refresh_token(user_id, token_version) -> str:
+    return create_refresh_token(
+        identity=str(user_id),
+        expires_delta=timedelta(days=30),
+        additional_claims=token_version_claims(token_version),
+    )
+
+
 def _find_user_by_identity(user_identity):
-    user = User.query.filter(User.user_id == user_identity).first()
-    if not user:
-        raise BusinessError("用户不存在", code=40004, http_code=404)
-    return user
+    return require_cached_user(user_identity)
 
 
 def register_user(data):
@@ -39,17 +73,82 @@ def register_user(data):
         raise ValidationError("邮箱不能为空")
     if not username:
         raise ValidationError("用户名不能为空")
-    if User.query.filter(or_(User.email == email, User.username == username)).first():
+    # Bloom 过滤器判定一定不存在时跳过预检查，由唯一索引兜底
+    if identity_filter.might_exist(username, email) and (
+        User.query.filter(or_(User.email == email, User.username == username)).first()
+    ):
         raise ConflictError("用户名或邮箱已存在")
-    password_hash = bcrypt.generate_password_hash(data.password).decode("utf-8")
+    password_hash = password_hasher.generate_password_hash(data.password)
     user_id = snowflake.generate()
     user = User(username=username, password=password_hash, email=email, user_id=user_id)
     db.session.add(user)
-    _commit_or_raise("注册失败，请重试", code=500, http_code=500)
-    return user.to_dict()
+    try:
+        # flush 后 Python 端默认值已回填到对象上，提交前序列化，避免提交后过期重载
+        db.session.flush()
+        profile = user.to_dict()
+        db.session.commit()
+    except IntegrityError as exc:
+        db.session.rollback()
+        raise ConflictError("用户名或邮箱已存在") from exc
+    except Exception as exc:
+        db.session.rollback()
+        raise BusinessError("注册失败，请重试", code=500, http_code=500) from exc
+    identity_filter.add(username, email)
+    return profile
 
 
-def user_login(email, username, password):
+def _rehash_if_needed(user, password):
+    """
+    存量哈希的 cost 与配置不一致时，用明文重新哈希，随本次登录一起提交
+    执行器繁忙时跳过，下次登录再迁移，不影响登录本身
+    """
+    if not password_hasher.needs_rehash(user.password):
+        return
+    try:
+        user.password = password_hasher.generate_password_hash(password)
+    except ServiceUnavailableError:
+        return
+
+
+def _enforce_session_limits(user_pk: int, device: str | None) -> None:
+    """
+    登录前整理该用户的 refresh 会话（与新会话在同一事务中提交）：
+    - 同一 device 重复登录：撤销该设备原有会话
+    - 有效会话数达到 REFRESH_SESSION_CAP：撤销最旧的会话，为新会话腾出位置
+    """
+    now = datetime.utcnow()
+    live = (Refresh.user_id == user_pk, Refresh.is_revoked.is_(False))
+    if device:
+        db.session.execute(
+            update(Refresh)
+            .where(*live, Refresh.device == device)
+            .values(is_revoked=True, revoked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    cap = current_app.config.get("REFRESH_SESSION_CAP", 0)
+    if cap <= 0:
+        return
+    evict_ids = (
+        db.session.execute(
+            select(Refresh.id)
+            .where(*live, Refresh.expires_at > now)
+            .order_by(Refresh.id.desc())
+            .offset(cap - 1)
+        )
+        .scalars()
+        .all()
+    )
+    if evict_ids:
+        db.session.execute(
+            update(Refresh)
+            .where(Refresh.id.in_(evict_ids))
+            .values(is_revoked=True, revoked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def user_login(email, username, password, device=None):
     if not email and not username:
         raise BusinessError("邮箱或用户名至少填写一个", code=40002, http_code=400)
     user = (
@@ -61,72 +160,111 @@ def user_login(email, username, password):
         raise BusinessError("用户不存在", code=40004, http_code=404)
 
     # 验证密码
-    if not bcrypt.check_password_hash(user.password, password):
+    if not password_hasher.check_password_hash(user.password, password):
         raise BusinessError("密码错误", code=40005)
+    _rehash_if_needed(user, password)
 
-    access_token = create_access_token(identity=str(user.user_id))
-    refresh_token = create_refresh_token(
-        identity=str(user.user_id), expires_delta=timedelta(days=30)
-    )
+    access_token = _create_access_token(user.id, user.user_id, user.token_version)
+    refresh_token = _create_refresh_token(user.user_id, user.token_version)
+    try:
+        _enforce_session_limits(user.id, device)
+    except Exception as exc:
+        db.session.rollback()
+        raise BusinessError("获取token失败请重试", code=40006, http_code=500) from exc
     refresh_data = Refresh(
         user_id=user.id,
         token=_hash_refresh_token(refresh_token),
         is_revoked=False,
         expires_at=datetime.utcnow() + timedelta(days=30),
+        device=device,
     )
     db.session.add(refresh_data)
+    try:
+        db.session.flush()
+        profile = user.to_dict()
+    except Exception as exc:
+        db.session.rollback()
+        raise BusinessError("获取token失败请重试", code=40006, http_code=500) from exc
     _commit_or_raise("获取token失败请重试", code=40006, http_code=500)
-    return {**user.to_dict(), "token": access_token, "refresh": refresh_token}
+    return {**profile, "token": access_token, "refresh": refresh_token}
 
 
 def user_profile(user_id):
-    user = User.query.filter(User.user_id == user_id).first()
-    if not user:
-        raise BusinessError("用户不存在", code=40004, http_code=404)
-    return user.to_dict()
+    return dict(require_cached_user(user_id).profile)
 
 
 def is_user():
     user_id = get_jwt_identity()
-    user = User.query.filter(User.user_id == user_id).first()
-
-    if not user:
-        raise BusinessError("用户不存在", code=40004, http_code=404)
-    access_token = create_access_token(identity=user_id)
+    user = require_cached_user(user_id)
+    access_token = _create_access_token(
+        user.id, user_id, current_token_version(user_id)
+    )
     return {"access_token": access_token}
 
 
-def rotate_refresh_token(raw_refresh_token: str):
+def rotate_refresh_token(raw_refresh_token: str, token_version: int = 0):
+    """
+    refresh token 轮换
+    用一条带条件的 UPDATE 原子地撤销旧 token（未撤销且未过期才会命中），
+    rowcount/RETURNING 决定成败，并发的同一 token 只有一个请求能成功；
+    新 token 的 INSERT 与 UPDATE 在同一事务中提交
+    """
     user_identity = get_jwt_identity()
-    user = _find_user_by_identity(user_identity)
-
-    current_record = Refresh.query.filter_by(
-        user_id=user.id,
-        token=_hash_refresh_token(raw_refresh_token),
-        is_revoked=False,
-    ).first()
+    now = datetime.utcnow()
+    token_hash = _hash_refresh_token(raw_refresh_token)
+    stmt = (
+        update(Refresh)
+        .where(
+            Refresh.token == token_hash,
+            Refresh.is_revoked.is_(False),
+            Refresh.expires_at > now,
+        )
+        .values(is_revoked=True, revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        if supports_update_returning():
+            revoked = db.session.execute(
+                stmt.returning(Refresh.user_id, Refresh.device)
+            ).first()
+        else:
+            matched = db.session.execute(stmt).rowcount == 1
+            # 行已在本事务中被撤销，读回它的归属与设备不会与其他轮换竞争
+            revoked = (
+                db.session.execute(
+                    select(Refresh.user_id, Refresh.device).where(
+                        Refresh.token == token_hash
+                    )
+                ).first()
+                if matched
+                else None
+            )
+    except BusinessError:
+        db.session.rollback()
+        raise
+    except Exception as exc:
+        db.session.rollback()
+        raise BusinessError(
+            "refresh token 轮换失败", code=50001, http_code=500
+        ) from exc
 
-    if not current_record:
+    if revoked is None:
+        db.session.rollback()
         raise BusinessError("refresh token 无效或已撤销", code=40102, http_code=401)
+    user_pk, device = revoked
 
-    if current_record.expires_at <= datetime.utcnow():
-        current_record.is_revoked = True
-        _commit_or_raise("refresh token 状态更新失败", code=50001, http_code=500)
-        raise BusinessError("refresh token 已过期", code=40103, http_code=401)
-
-    access_token = create_access_token(identity=str(user.user_id))
-    new_refresh_token = create_refresh_token(
-        identity=str(user.user_id), expires_delta=timedelta(days=30)
-    )
-
-    current_record.is_revoked = True
-    next_record = Refresh(
-        user_id=user.id,
-        token=_hash_refresh_token(new_refresh_token),
-        is_revoked=False,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+    # logout-all 会同时撤销全部 refresh 记录，能轮换成功说明 ver 仍有效
+    access_token = _create_access_token(user_pk, user_identity, token_version)
+    new_refresh_token = _create_refresh_token(user_identity, token_version)
+    db.session.add(
+        Refresh(
+            user_id=user_pk,
+            token=_hash_refresh_token(new_refresh_token),
+            is_revoked=False,
+            expires_at=now + timedelta(days=30),
+            device=device,
+        )
     )
-    db.session.add(next_record)
     _commit_or_raise("refresh token 轮换失败", code=50001, http_code=500)
 
     return {"access_token": access_token, "refresh_token": new_refresh_token}
@@ -145,5 +283,20 @@ def revoke_refresh_token(raw_refresh_token: str):
         raise BusinessError("refresh token 无效或已撤销", code=40102, http_code=401)
 
     record.is_revoked = True
+    record.revoked_at = datetime.utcnow()
     _commit_or_raise("refresh token 撤销失败", code=50001, http_code=500)
     return {"revoked": True}
+
+
+def logout_all():
+    """令当前用户所有已签发的 access/refresh token 失效"""
+    user_identity = current_jwt_identity()
+    user = _find_user_by_identity(user_identity)
+    try:
+        version, revoked = bump_token_version(user.id, user.user_id)
+    except Exception as exc:
+        db.session.rollback()
+        raise BusinessError("注销失败，请重试", code=50001, http_code=500) from exc
+    _commit_or_raise("注销失败，请重试", code=50001, http_code=500)
+    push_token_version(user.user_id, version)
+    return {"revoked_sessions": revoked, "token_version": version}
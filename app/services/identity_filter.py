@@ -0,0 +1,126 @@
+"""
+已占用用户名/邮箱的 Bloom 过滤器
+- 每个 worker 启动后在后台线程流式扫描 users 构建（gunicorn post_worker_init），
+  不占用注册请求；重置或构建失败后由下一次注册在后台触发重建
+- 过滤器判定“一定不存在”时跳过注册前的 OR 查询，由唯一索引兜底并发/跨 worker 冲突
+- 过滤器未就绪或“可能存在”时回退到数据库查询
+"""
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.extensions.extensions import db
+from app.logger import app_logger
+from app.models.user import User
+from app.utils.bloom import BloomFilter
+
+# 构建失败后的重试冷却时间（秒）
+_RETRY_AFTER_SECONDS = 30.0
+
+
+def _username_key(username: str) -> str:
+    return f"u:{username}"
+
+
+def _email_key(email: str) -> str:
+    return f"e:{email}"
+
+
+class IdentityFilter:
+    def __init__(self):
+        self._bloom: BloomFilter | None = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._retry_at = 0.0
+        # reset 后递增，丢弃重置前开始的构建结果
+        self._generation = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._retry_at = 0.0
+            self._generation += 1
+
+    def build(self) -> None:
+        generation = self._generation
+        capacity = current_app.config.get("IDENTITY_FILTER_CAPACITY", 1_000_000)
+        error_rate = current_app.config.get("IDENTITY_FILTER_ERROR_RATE", 0.01)
+        total = db.session.execute(select(func.count(User.id))).scalar() or 0
+        bloom = BloomFilter(max(capacity, total * 2), error_rate)
+
+        rows = db.session.execute(
+            select(User.username, User.email).execution_options(yield_per=1000)
+        )
+        for username, email in rows:
+            bloom.add(_username_key(username))
+            if email:
+                bloom.add(_email_key(email))
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._bloom = bloom
+        app_logger.info(
+            "identity filter built: entries=%s bits=%s", bloom.count, bloom.num_bits
+        )
+
+    def build_in_background(self, app) -> threading.Thread | None:
+        """在后台线程中构建；已就绪、正在构建或处于失败冷却期时不重复启动"""
+        with self._lock:
+            if (
+                self._bloom is not None
+                or self._building
+                or time.monotonic() < self._retry_at
+            ):
+                return None
+            self._building = True
+        thread = threading.Thread(
+            target=self._build_with_app,
+            args=(app,),
+            name="identity-filter-build",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _build_with_app(self, app):
+        try:
+            with app.app_context():
+                try:
+                    self.build()
+                except Exception:
+                    db.session.rollback()
+                    self._retry_at = time.monotonic() + _RETRY_AFTER_SECONDS
+                    app_logger.exception("identity filter build failed")
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._building = False
+
+    def might_exist(self, username: str, email: str) -> bool:
+        bloom = self._bloom
+        if bloom is None:
+            # 未就绪时回退到数据库查询，构建放到后台，不阻塞当前请求
+            self.build_in_background(current_app._get_current_object())
+            return True
+        return _username_key(username) in bloom or _email_key(email) in bloom
+
+    def add(self, username: str, email: str) -> None:
+        bloom = self._bloom
+        if bloom is None:
+            return
+        bloom.add(_username_key(username))
+        bloom.add(_email_key(email))
+        # 超出容量后误判率上升，丢弃后由下一次注册在后台重建
+        if bloom.count > bloom.capacity:
+            self.reset()
+
+
+identity_filter = IdentityFilter()
@@ -1,15 +1,22 @@
 from app.models.poster import Poster
+from app.utils.pagination import clamp_page_size, keyset_paginate
 
 
-def list_messages(page: int = 1, page_size: int = 10):
-    pagination = (
-        Poster.query.filter(Poster.status == 256)
-        .order_by(Poster.id.desc())
-        .paginate(
-            page=max(page, 1),
-            per_page=min(max(page_size, 1), 100),
-            error_out=False,
-        )
+def list_messages(page: int = 1, page_size: int = 10, cursor: str | None = None):
+    query = Poster.query.options(Poster.list_options()).filter(Poster.status == 256)
+
+    if cursor is not None:
+        items, next_cursor = keyset_paginate(query, Poster.id, cursor, page_size)
+        return {
+            "list": [item.to_dict() for item in items],
+            "page_size": clamp_page_size(page_size),
+            "next_cursor": next_cursor,
+        }
+
+    pagination = query.order_by(Poster.id.desc()).paginate(
+        page=max(page, 1),
+        per_page=clamp_page_size(page_size),
+        error_out=False,
     )
     return {
         "list": [item.to_dict() for item in pagination.items],
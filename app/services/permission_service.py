@@ -0,0 +1,91 @@
+"""
+RBAC 权限
+- 签发 access token 时把用户权限压缩成位图写入 claims（perms，十六进制）
+- 权限表（code -> bit、role -> bits）每个 worker 缓存一份
+- 受保护接口只读 claims + 缓存，不访问数据库
+- Role / Permission 变更在事务提交后清空权限表缓存，回滚不影响缓存
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.extensions.extensions import db
+from app.models.user import Permission, Role, role_permission, user_role
+from app.utils.cache import TTLCache, invalidate_after_commit
+
+PERMISSION_CLAIM = "perms"
+
+
+@dataclass(frozen=True)
+class PermissionTable:
+    code_bits: dict[str, int]
+    role_bits: dict[int, int]
+
+
+permission_cache = TTLCache("permission", maxsize=1, ttl=300)
+
+
+def setup_permission_cache(app):
+    permission_cache.configure(ttl=app.config.get("PERMISSION_CACHE_TTL_SECONDS"))
+
+
+def _bit(permission_id: int) -> int:
+    return 1 << (permission_id - 1)
+
+
+def load_permission_table() -> PermissionTable:
+    table = permission_cache.get("table")
+    if table is not None:
+        return table
+
+    code_bits = {
+        code: _bit(permission_id)
+        for permission_id, code in db.session.execute(
+            select(Permission.id, Permission.code)
+        )
+    }
+    role_bits: dict[int, int] = {}
+    for role_id, permission_id in db.session.execute(
+        select(role_permission.c.role_id, role_permission.c.permission_id)
+    ):
+        role_bits[role_id] = role_bits.get(role_id, 0) | _bit(permission_id)
+
+    table = PermissionTable(code_bits=code_bits, role_bits=role_bits)
+    permission_cache.set("table", table)
+    return table
+
+
+def permission_bitset_for_user(user_pk: int) -> int:
+    table = load_permission_table()
+    role_ids = db.session.execute(
+        select(user_role.c.role_id).where(user_role.c.user_id == user_pk)
+    ).scalars()
+    bitset = 0
+    for role_id in role_ids:
+        bitset |= table.role_bits.get(role_id, 0)
+    return bitset
+
+
+def permission_claims(user_pk: int) -> dict[str, str]:
+    """create_access_token 的 additional_claims"""
+    return {PERMISSION_CLAIM: format(permission_bitset_for_user(user_pk), "x")}
+
+
+def has_permission(bitset, permission_code: str) -> bool:
+    if isinstance(bitset, str):
+        try:
+            bitset = int(bitset, 16)
+        except ValueError:
+            return False
+    bit = load_permission_table().code_bits.get(permission_code)
+    return bool(bit and bitset & bit)
+
+
+def _permission_table_changes(session):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, (Role, Permission)) for obj in changed):
+        yield "table"
+
+
+invalidate_after_commit(permission_cache, _permission_table_changes)
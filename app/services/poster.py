@@ -1,16 +1,15 @@
 from app.exceptions.base import BusinessError
 from app.models import Poster
-from app.models.user import User
 from app.extensions.extensions import db
+from app.services.user_cache import require_cached_user
+from app.utils.db import supports_update_returning
+from app.utils.pagination import clamp_page_size, keyset_paginate
 from flask import g
+from sqlalchemy import delete, select, update
 
 
 def _require_current_user():
-    user_identity = g.get("user_id")
-    user = User.query.filter(User.user_id == user_identity).first()
-    if not user:
-        raise BusinessError("用户不存在", code=40004, http_code=404)
-    return user
+    return require_cached_user(g.get("user_id"))
 
 
 def create_poster(data):
@@ -27,24 +26,45 @@ def create_poster(data):
     poster = Poster(content=content, title=title, status=status, user_id=user.id)
     try:
         db.session.add(poster)
+        # 主键在 flush 时回填，提交前取出，避免提交后过期重载
+        db.session.flush()
+        poster_id = poster.id
         db.session.commit()
     except Exception:
         db.session.rollback()
         raise BusinessError("新增失败", code=50001, http_code=500)
-    return {"id": poster.id}
+    return {"id": poster_id}
 
 
-def search_poster(page: int = 1, page_size: int = 10, status: int | None = None):
+def search_poster(
+    page: int = 1,
+    page_size: int = 10,
+    status: int | None = None,
+    cursor: str | None = None,
+):
     user = _require_current_user()
-    try:
-        query = Poster.query.filter(Poster.user_id == user.id).order_by(
-            Poster.id.desc()
-        )
-        if status is not None:
-            query = query.filter(Poster.status == status)
+    query = Poster.query.options(Poster.list_options()).filter(
+        Poster.user_id == user.id
+    )
+    if status is not None:
+        query = query.filter(Poster.status == status)
+
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_paginate(query, Poster.id, cursor, page_size)
+        except BusinessError:
+            raise
+        except Exception:
+            raise BusinessError("查询失败", code=50001, http_code=500)
+        return {
+            "list": [p.to_dict() for p in items],
+            "page_size": clamp_page_size(page_size),
+            "next_cursor": next_cursor,
+        }
 
-        pagination = query.paginate(
-            page=max(page, 1), per_page=min(max(page_size, 1), 100), error_out=False
+    try:
+        pagination = query.order_by(Poster.id.desc()).paginate(
+            page=max(page, 1), per_page=clamp_page_size(page_size), error_out=False
         )
     except Exception:
         raise BusinessError("查询失败", code=50001, http_code=500)
@@ -69,13 +89,11 @@ def get_poster_detail(poster_id: int):
 
 
 def update_poster(poster_id: int, data):
+    """
+    单条 UPDATE ... WHERE id=? AND user_id=? 完成归属校验和更新
+    支持 RETURNING 的方言直接取回结果，否则按 rowcount 判断后再投影查询
+    """
     user = _require_current_user()
-    poster = Poster.query.filter(
-        Poster.id == poster_id, Poster.user_id == user.id
-    ).first()
-    if not poster:
-        raise BusinessError("帖子不存在", code=40401, http_code=404)
-
     payload = data.model_dump(exclude_none=True)
     if not payload:
         raise BusinessError("至少提供一个更新字段", code=40002, http_code=400)
@@ -83,31 +101,58 @@ def update_poster(poster_id: int, data):
     if "status" in payload and payload["status"] not in (4, 256):
         raise BusinessError("状态错误", code=40002, http_code=400)
 
+    values = {}
     if "title" in payload:
-        poster.title = payload["title"].strip()
+        values["title"] = payload["title"].strip()
     if "content" in payload:
-        poster.content = payload["content"].strip()
+        values["content"] = payload["content"].strip()
     if "status" in payload:
-        poster.status = payload["status"]
-
+        values["status"] = payload["status"]
+
+    owned = (Poster.id == poster_id, Poster.user_id == user.id)
+    stmt = (
+        update(Poster)
+        .where(*owned)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
     try:
+        if supports_update_returning():
+            row = db.session.execute(stmt.returning(*Poster.list_columns())).first()
+        else:
+            matched = db.session.execute(stmt).rowcount == 1
+            row = (
+                db.session.execute(select(*Poster.list_columns()).where(*owned)).first()
+                if matched
+                else None
+            )
+        if row is None:
+            db.session.rollback()
+            raise BusinessError("帖子不存在", code=40401, http_code=404)
         db.session.commit()
+    except BusinessError:
+        raise
     except Exception:
         db.session.rollback()
         raise BusinessError("更新失败", code=50001, http_code=500)
-    return poster.to_dict()
+    return Poster(**row._mapping).to_dict()
 
 
 def delete_poster(poster_id: int):
     user = _require_current_user()
-    poster = Poster.query.filter(
-        Poster.id == poster_id, Poster.user_id == user.id
-    ).first()
-    if not poster:
-        raise BusinessError("帖子不存在", code=40401, http_code=404)
+    stmt = (
+        delete(Poster)
+        .where(Poster.id == poster_id, Poster.user_id == user.id)
+        .execution_options(synchronize_session=False)
+    )
     try:
-        db.session.delete(poster)
+        deleted = db.session.execute(stmt).rowcount
+        if deleted == 0:
+            db.session.rollback()
+            raise BusinessError("帖子不存在", code=40401, http_code=404)
         db.session.commit()
+    except BusinessError:
+        raise
     except Exception:
         db.session.rollback()
         raise BusinessError("删除失败", code=50001, http_code=500)
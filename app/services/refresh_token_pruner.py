@@ -0,0 +1,113 @@
+"""
+refresh_tokens 清理
+删除已过期或已撤销且超过宽限期的记录：
+- 每批先按索引 (is_revoked, expires_at) 取一批 id，再按 id 删除，单批独立提交
+- 批与批之间 sleep，避免长事务和持续占用数据库
+- 周期清理只在一个进程中运行：gunicorn 主进程 fork 出的独立清理进程
+  （REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS > 0 时），或由 cron 调用 flask prune-refresh-tokens
+"""
+
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select
+
+from app.extensions.extensions import db
+from app.logger import app_logger
+from app.models.user import Refresh
+
+
+def _prunable_condition(cutoff: datetime):
+    return or_(
+        and_(Refresh.is_revoked.is_(False), Refresh.expires_at < cutoff),
+        and_(
+            Refresh.is_revoked.is_(True),
+            or_(Refresh.expires_at < cutoff, Refresh.revoked_at < cutoff),
+        ),
+    )
+
+
+def prune_refresh_tokens(
+    grace: timedelta = timedelta(days=1),
+    batch_size: int = 1000,
+    throttle: float = 0.1,
+    max_batches: int | None = None,
+) -> dict:
+    """
+    分批删除可清理的 refresh token
+    返回 {"deleted": 删除行数, "batches": 批次数, "duration_seconds": 耗时}
+    """
+    start = time.monotonic()
+    cutoff = datetime.utcnow() - grace
+    condition = _prunable_condition(cutoff)
+    deleted = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = (
+            db.session.execute(select(Refresh.id).where(condition).limit(batch_size))
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+        try:
+            result = db.session.execute(
+                delete(Refresh)
+                .where(Refresh.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        # 按实际删除的行数计数，其他清理者先删掉的行不重复计入
+        deleted += result.rowcount
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if throttle > 0:
+            time.sleep(throttle)
+
+    return {
+        "deleted": deleted,
+        "batches": batches,
+        "duration_seconds": round(time.monotonic() - start, 3),
+    }
+
+
+def run_refresh_token_pruner(app, interval: float, stop: threading.Event):
+    """每隔 interval 秒清理一次，直到 stop 被设置"""
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                result = prune_refresh_tokens(**prune_options(app.config))
+                app_logger.info("refresh token prune finished: %s", result)
+            except Exception:
+                app_logger.exception("refresh token prune failed")
+            finally:
+                db.session.remove()
+
+
+def serve_refresh_token_pruner():
+    """独立清理进程入口（gunicorn 主进程通过 start_service 启动，整台机器只有一个）"""
+    from app import create_app
+
+    app = create_app()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    run_refresh_token_pruner(
+        app, app.config["REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS"], stop
+    )
+
+
+def prune_options(config) -> dict:
+    return {
+        "grace": timedelta(
+            seconds=config.get("REFRESH_TOKEN_PRUNE_GRACE_SECONDS", 86400)
+        ),
+        "batch_size": config.get("REFRESH_TOKEN_PRUNE_BATCH_SIZE", 1000),
+        "throttle": config.get("REFRESH_TOKEN_PRUNE_THROTTLE_SECONDS", 0.1),
+    }
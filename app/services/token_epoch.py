@@ -0,0 +1,115 @@
+"""
+用户 token 版本（epoch）
+- 签发 access/refresh token 时写入 ver claim
+- login_required 将 ver 与当前版本比较，不一致即视为已失效
+- 当前版本每个 worker 缓存一份（短 TTL）；bump 后通过 token_epoch_board 通知同机所有 worker，
+  下一次读取即回源数据库，立即生效
+- 多台机器之间没有共享的通知板，其他机器最迟在 TOKEN_EPOCH_CACHE_TTL_SECONDS 后生效
+"""
+
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.extensions.extensions import db
+from app.models.user import Refresh, User
+from app.services.user_cache import mark_user_stale
+from app.utils.cache import TTLCache
+
+TOKEN_VERSION_CLAIM = "ver"
+
+token_epoch_cache = TTLCache("token_epoch", maxsize=10000, ttl=5)
+
+
+class TokenEpochBoard:
+    """
+    跨 worker 的 token 版本变更通知板
+    user_id 按取模映射到固定数量的槽位，bump 时对应槽位 +1；
+    缓存条目记录回源前读到的槽位值，槽位值变化即视为失效
+    gunicorn 主进程创建共享数组并在 post_fork 中注入（use_shared），未注入时只在本进程内生效
+    """
+
+    def __init__(self, size: int = 4096):
+        self._slots = [0] * size
+        self._lock = threading.Lock()
+
+    def use_shared(self, array):
+        """array: multiprocessing.Array("q", size)，读取不加锁，bump 时加锁"""
+        self._slots = array.get_obj()
+        self._lock = array.get_lock()
+
+    def stamp(self, key: int) -> int:
+        return self._slots[key % len(self._slots)]
+
+    def bump(self, key: int) -> None:
+        with self._lock:
+            self._slots[key % len(self._slots)] += 1
+
+
+token_epoch_board = TokenEpochBoard()
+
+
+def setup_token_epoch_cache(app):
+    token_epoch_cache.configure(ttl=app.config.get("TOKEN_EPOCH_CACHE_TTL_SECONDS"))
+
+
+def _key(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def current_token_version(user_id) -> int | None:
+    key = _key(user_id)
+    if key is None:
+        return None
+    # 先读槽位再回源：回源期间发生的 bump 会让这次缓存的条目在下次读取时失效
+    stamp = token_epoch_board.stamp(key)
+    cached = token_epoch_cache.get(key)
+    if cached is not None and cached[1] == stamp:
+        return cached[0]
+    version = db.session.execute(
+        select(User.token_version).where(User.user_id == key)
+    ).scalar()
+    if version is not None:
+        token_epoch_cache.set(key, (version, stamp))
+    return version
+
+
+def token_version_claims(token_version) -> dict[str, int]:
+    return {TOKEN_VERSION_CLAIM: token_version or 0}
+
+
+def bump_token_version(user_pk: int, user_id) -> tuple[int, int]:
+    """
+    token 版本 +1 并一次性撤销该用户所有未撤销的 refresh token（同一事务）
+    返回 (新版本, 撤销的 refresh 数)，调用方负责提交
+    """
+    db.session.execute(
+        update(User)
+        .where(User.id == user_pk)
+        .values(token_version=User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    # 批量 update 不触发 flush 事件，显式让用户缓存在提交后失效
+    mark_user_stale(db.session, user_id)
+    revoked = db.session.execute(
+        update(Refresh)
+        .where(Refresh.user_id == user_pk, Refresh.is_revoked.is_(False))
+        .values(is_revoked=True, revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    version = db.session.execute(
+        select(User.token_version).where(User.id == user_pk)
+    ).scalar()
+    return version, revoked
+
+
+def push_token_version(user_id, version: int) -> None:
+    """提交 bump 之后调用：通知同机所有 worker，并更新本 worker 的缓存"""
+    key = _key(user_id)
+    if key is not None:
+        token_epoch_board.bump(key)
+        token_epoch_cache.set(key, (version, token_epoch_board.stamp(key)))
@@ -0,0 +1,78 @@
+"""
+已认证用户缓存
+snowflake user_id -> (内部主键, profile)，每个 worker 一份 LRU + TTL。
+本进程内 User 的更新/删除在事务提交后失效对应条目，其他 worker 依赖 TTL 过期。
+批量 update(User) 语句不经过 ORM flush，需要调用 mark_user_stale。
+"""
+
+from dataclasses import dataclass
+
+from app.exceptions.base import BusinessError
+from app.models.user import User
+from app.utils.cache import TTLCache, invalidate_after_commit, mark_stale
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    user_id: int
+    profile: dict
+
+
+user_cache = TTLCache("user", maxsize=10000, ttl=60)
+
+
+def setup_user_cache(app):
+    user_cache.configure(
+        maxsize=app.config.get("USER_CACHE_MAX_SIZE"),
+        ttl=app.config.get("USER_CACHE_TTL_SECONDS"),
+    )
+
+
+def _normalize_user_id(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_cached_user(user_id) -> CachedUser | None:
+    key = _normalize_user_id(user_id)
+    if key is None:
+        return None
+    cached = user_cache.get(key)
+    if cached is not None:
+        return cached
+
+    user = User.query.filter(User.user_id == key).first()
+    if not user:
+        return None
+    cached = CachedUser(id=user.id, user_id=user.user_id, profile=dict(user.to_dict()))
+    user_cache.set(key, cached)
+    return cached
+
+
+def require_cached_user(user_id) -> CachedUser:
+    cached = get_cached_user(user_id)
+    if not cached:
+        raise BusinessError("用户不存在", code=40004, http_code=404)
+    return cached
+
+
+def mark_user_stale(session, user_id):
+    """session 提交后失效该用户的缓存条目"""
+    key = _normalize_user_id(user_id)
+    if key is not None:
+        mark_stale(session, user_cache, key)
+
+
+def _changed_user_ids(session):
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            yield obj.user_id
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            yield obj.user_id
+
+
+invalidate_after_commit(user_cache, _changed_user_ids)
@@ -0,0 +1,105 @@
+"""
+进程内缓存
+线程安全的 LRU + TTL 缓存，每个 worker 一份，命中/未命中计入 Prometheus
+数据库变更引起的失效在事务提交后执行（见 invalidate_after_commit），回滚的变更不会失效缓存
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions.prometheus_metrics import cache_requests
+
+
+class TTLCache:
+    """有界 LRU 缓存，条目超过 ttl 秒后失效；值为 None 表示未命中，不缓存 None"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = cache_requests.labels(cache=name, result="hit")
+        self._misses = cache_requests.labels(cache=name, result="miss")
+
+    def configure(self, maxsize: int | None = None, ttl: float | None = None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self._hits.inc()
+                    return value
+                del self._data[key]
+        self._misses.inc()
+        return None
+
+    def set(self, key, value, ttl: float | None = None):
+        if value is None or self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def _pending_key(cache: TTLCache) -> str:
+    return f"app.cache_invalidations.{cache.name}"
+
+
+def mark_stale(session: Session, cache: TTLCache, key) -> None:
+    """记录 session 提交后要失效的 key；批量 update/delete 不触发 flush 事件，需要显式调用"""
+    session.info.setdefault(_pending_key(cache), set()).add(key)
+
+
+def invalidate_after_commit(cache: TTLCache, collect) -> None:
+    """
+    flush 时用 collect(session) 收集本次变更涉及的 key，记在 session 上；
+    事务提交后（after_commit）逐个失效，回滚时（最外层事务）丢弃
+    在提交前失效会留下窗口：并发请求可能把尚未提交的旧值重新写回缓存
+    """
+    pending = _pending_key(cache)
+
+    @event.listens_for(Session, "after_flush")
+    def _collect(session, flush_context):
+        for key in collect(session):
+            mark_stale(session, cache, key)
+
+    @event.listens_for(Session, "after_commit")
+    def _invalidate(session):
+        for key in session.info.pop(pending, ()):
+            cache.invalidate(key)
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _discard(session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(pending, None)
@@ -0,0 +1,10 @@
+"""
+数据库方言能力判断
+写路径优先用 RETURNING 在同一条语句里拿回结果，不支持的方言（如 MySQL）退回 rowcount
+"""
+
+from app.extensions.extensions import db
+
+
+def supports_update_returning() -> bool:
+    return bool(getattr(db.engine.dialect, "update_returning", False))
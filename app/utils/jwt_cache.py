@@ -0,0 +1,94 @@
+"""
+已验证 JWT 的 claims 缓存
+同一个 access token 会在短时间内被反复提交，命中缓存时跳过解析和验签。
+- 只经过 flask-jwt-extended 的公开接口：未命中时调用 verify_jwt_in_request，
+  再用 get_jwt 取出 claims 写入缓存，缓存只包住这一步
+- token 按 JWT_HEADER_NAME / JWT_HEADER_TYPE 从请求头读取；只缓存 access token
+- key 为原始 token 的 sha256，条目在 token 的 exp 到期时失效
+- 命中时不会再调用 token_in_blocklist_loader / user_lookup_loader 回调，
+  注册了这类回调的应用应设置 JWT_CLAIMS_CACHE_MAX_SIZE=0 关闭缓存
+- 本次请求的 claims 保存在 request.environ 中，通过 current_jwt_claims 读取
+"""
+
+import hashlib
+import time
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from app.utils.cache import TTLCache
+
+jwt_claims_cache = TTLCache("jwt_claims", maxsize=10000, ttl=1800)
+
+_ENVIRON_KEY = "app.jwt_claims"
+
+
+def setup_jwt_claims_cache(app):
+    jwt_claims_cache.configure(maxsize=app.config.get("JWT_CLAIMS_CACHE_MAX_SIZE"))
+
+
+def _header_token() -> str | None:
+    config = current_app.config
+    locations = config.get("JWT_TOKEN_LOCATION", ("headers",))
+    if isinstance(locations, str):
+        locations = (locations,)
+    if "headers" not in locations:
+        return None
+
+    auth_header = request.headers.get(config.get("JWT_HEADER_NAME", "Authorization"))
+    if not auth_header:
+        return None
+    header_type = config.get("JWT_HEADER_TYPE", "Bearer")
+    if not header_type:
+        return auth_header
+    prefix = f"{header_type} "
+    if not auth_header.startswith(prefix):
+        return None
+    return auth_header[len(prefix) :] or None
+
+
+def _load(key: str) -> dict | None:
+    claims = jwt_claims_cache.get(key)
+    if claims is None:
+        return None
+    if claims.get("exp", 0) <= time.time():
+        jwt_claims_cache.invalidate(key)
+        return None
+    return claims
+
+
+def _store(key: str, claims: dict) -> None:
+    if claims.get("type") != "access" or "exp" not in claims:
+        return
+    ttl = claims["exp"] - time.time()
+    if ttl > 0:
+        jwt_claims_cache.set(key, dict(claims), ttl=ttl)
+
+
+def verified_jwt_claims() -> dict:
+    """
+    校验请求中的 access token 并返回 claims（副本，请求内修改不会影响其他请求）
+    校验失败时抛出 verify_jwt_in_request 的原始异常
+    """
+    token = _header_token()
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest() if token else None
+    claims = _load(key) if key else None
+    if claims is None:
+        verify_jwt_in_request()
+        claims = get_jwt()
+        if key is not None:
+            _store(key, claims)
+
+    claims = dict(claims)
+    request.environ[_ENVIRON_KEY] = claims
+    return claims
+
+
+def current_jwt_claims() -> dict:
+    """login_required 校验过的 claims；jwt_required 保护的接口回退到 get_jwt"""
+    claims = request.environ.get(_ENVIRON_KEY)
+    return claims if claims is not None else get_jwt()
+
+
+def current_jwt_identity():
+    return current_jwt_claims().get(current_app.config.get("JWT_IDENTITY_CLAIM", "sub"))
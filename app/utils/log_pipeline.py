@@ -0,0 +1,330 @@
+"""
+非阻塞日志管道
+请求线程只把日志记录放进有界队列（满了直接丢弃并计数），文件写入和轮转由单独的写入线程完成。
+- 单进程（flask run / 测试）：进程内 queue.Queue + QueueListener
+- gunicorn：主进程在 fork 之前启动独立的日志进程，整台机器只有它持有日志文件、负责轮转；
+  其他进程首次写日志时各自建立进程内队列、转发线程和到日志进程的 Unix socket 连接，
+  不共享任何跨 fork 的队列或线程状态；主进程自身同步发送，不运行线程
+- 轮转出的文件在后台线程中 gzip 压缩
+"""
+
+import gzip
+import logging
+import os
+import queue
+import shutil
+import signal
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.connection import Client, Listener
+
+from app.extensions.prometheus_metrics import log_records_dropped
+from app.utils.service_process import start_service, stop_service
+
+
+class DroppingQueueHandler(QueueHandler):
+    """队列已满时丢弃记录并计数，不阻塞调用方"""
+
+    def __init__(self, queue, pipeline=None):
+        super().__init__(queue)
+        self.pipeline = pipeline
+
+    def enqueue(self, record):
+        if self.pipeline is not None:
+            self.pipeline.ensure_attached()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.labels(logger=record.name).inc()
+
+
+class RoutingHandler(logging.Handler):
+    """写入线程侧按 logger 名称把记录分发到对应的文件 handler"""
+
+    def __init__(self, routes: dict, default: logging.Handler):
+        super().__init__()
+        self.routes = routes
+        self.default = default
+
+    def emit(self, record):
+        target = self.routes.get(record.name, self.default)
+        if record.levelno >= target.level:
+            target.handle(record)
+
+    def handlers(self):
+        return {id(h): h for h in [self.default, *self.routes.values()]}.values()
+
+    def flush(self):
+        for handler in self.handlers():
+            handler.flush()
+
+    def close(self):
+        for handler in self.handlers():
+            handler.close()
+        super().close()
+
+
+class _BackgroundCompressor:
+    """
+    按顺序在后台线程中压缩轮转出的文件
+    空闲时线程退出，不在 gunicorn 主进程中常驻；fork 出的进程不继承父进程的任务
+    """
+
+    IDLE_SECONDS = 1.0
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, source: str, dest: str):
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            self._jobs.put((source, dest))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-compressor", daemon=True
+                )
+                self._thread.start()
+
+    def join(self):
+        # 继承自父进程的任务由父进程完成，这里等待会永远阻塞
+        if self._pid != os.getpid():
+            return
+        self._jobs.join()
+
+    def _run(self):
+        while True:
+            try:
+                source, dest = self._jobs.get(timeout=self.IDLE_SECONDS)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        self._thread = None
+                        return
+                continue
+            try:
+                with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(source)
+            except OSError:
+                pass
+            finally:
+                self._jobs.task_done()
+
+
+compressor = _BackgroundCompressor()
+
+
+def gzip_rotation(handler: logging.handlers.BaseRotatingHandler):
+    """
+    让轮转 handler 生成 .gz 备份：轮转时只做一次 rename，压缩交给后台线程
+    """
+
+    def namer(name):
+        return name + ".gz"
+
+    def rotator(source, dest):
+        pending = dest[: -len(".gz")] if dest.endswith(".gz") else dest + ".tmp"
+        os.replace(source, pending)
+        compressor.submit(pending, dest)
+
+    handler.namer = namer
+    handler.rotator = rotator
+    return handler
+
+
+class _RemoteWriter(logging.Handler):
+    """把记录发送给日志进程；连接失败时丢弃并计数，下一条记录重新连接"""
+
+    def __init__(self, address, authkey: bytes):
+        super().__init__()
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+
+    def emit(self, record):
+        try:
+            if self._conn is None:
+                self._conn = Client(self.address, authkey=self.authkey)
+            self._conn.send(record.__dict__)
+        except Exception as exc:
+            if isinstance(exc, (OSError, EOFError)):
+                self._disconnect()
+            log_records_dropped.labels(logger=record.name).inc()
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+    def close(self):
+        self._disconnect()
+        super().close()
+
+
+class _DirectQueue:
+    """gunicorn 主进程使用：put_nowait 直接同步发送，主进程内不启动转发线程"""
+
+    def __init__(self, handler: logging.Handler):
+        self.handler = handler
+
+    def put_nowait(self, record):
+        self.handler.handle(record)
+
+    def qsize(self) -> int:
+        return 0
+
+
+def _receive_records(conn, writer: logging.Handler):
+    with conn:
+        while True:
+            try:
+                data = conn.recv()
+            except (EOFError, OSError):
+                return
+            writer.handle(logging.makeLogRecord(data))
+
+
+def _serve_writer(listener: Listener, writer_factory):
+    """日志进程主循环：每个连接一个接收线程，记录交给唯一的文件 handler 写入"""
+    writer = writer_factory()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    receivers = []
+
+    def accept():
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return
+            except Exception:
+                # 认证失败等单个连接的错误不影响其他连接
+                continue
+            receiver = threading.Thread(
+                target=_receive_records, args=(conn, writer), daemon=True
+            )
+            receiver.start()
+            receivers.append(receiver)
+
+    threading.Thread(target=accept, name="log-accept", daemon=True).start()
+    stop.wait()
+    # 停止时各进程通常已经退出，等待接收线程读完连接中剩余的记录
+    for receiver in list(receivers):
+        receiver.join(timeout=1)
+    writer.flush()
+    writer.close()
+    compressor.join()
+
+
+class LogPipeline:
+    """
+    管理各 logger 的 QueueHandler 和写入线程
+    writer_factory 返回写入线程使用的 handler（通常是 RoutingHandler），
+    首次启动写入线程时才创建，因此 worker 进程不会打开日志文件
+    """
+
+    def __init__(self, writer_factory, queue_size: int = 10000):
+        self.writer_factory = writer_factory
+        self.queue_size = queue_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handlers = []
+        self._writer = None
+        self._listener = None
+        self._owner_pid = None
+        # 共享日志进程：地址、认证密钥、启动它的进程、各进程是否已连接
+        self._server = None
+        self._authkey = None
+        self._server_pid = None
+        self._writer_pid = None
+        self._attached_pid = None
+        self._attach_lock = threading.Lock()
+
+    def queue_handler(self) -> DroppingQueueHandler:
+        handler = DroppingQueueHandler(self.queue, self)
+        self.queue_handlers.append(handler)
+        return handler
+
+    def start(self):
+        """在当前进程内启动写入线程（单进程模式）"""
+        if self._listener is None:
+            if self._writer is None:
+                self._writer = self.writer_factory()
+            self._start_listener(self._writer)
+
+    def start_shared_writer(self, queue_size: int | None = None):
+        """
+        gunicorn 主进程在 fork worker 之前调用：启动独立的日志进程独占日志文件
+        返回日志进程的 socket 地址
+        """
+        self.stop()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.queue_size = queue_size or self.queue_size
+        self._authkey = os.urandom(32)
+        self._server = Listener(family="AF_UNIX", authkey=self._authkey)
+        self._writer_pid = start_service(
+            _serve_writer, self._server, self.writer_factory
+        )
+        self._server_pid = os.getpid()
+        self._attached_pid = self._server_pid
+        self._use_queue(_DirectQueue(self._remote_writer()))
+        return self._server.address
+
+    def ensure_attached(self):
+        """fork 出的进程首次写日志时连接日志进程"""
+        if self._server is None or self._attached_pid == os.getpid():
+            return
+        with self._attach_lock:
+            if self._attached_pid != os.getpid():
+                self._attach()
+
+    def stop(self):
+        """停止本进程的写入线程并写完队列中剩余的记录；日志进程只由启动它的进程停止"""
+        # fork 出的进程继承了父进程的 listener 对象但没有线程，不能操作
+        if self._listener is not None and self._owner_pid == os.getpid():
+            self._listener.stop()
+            forwarder = self._listener.handlers[0]
+            if forwarder is not self._writer:
+                forwarder.close()
+        self._listener = None
+        if self._writer is not None:
+            self._writer.flush()
+        if self._server is not None and self._server_pid == os.getpid():
+            if isinstance(self.queue, _DirectQueue):
+                self.queue.handler.close()
+            stop_service(self._writer_pid)
+            # 关闭时删除 socket 文件
+            self._server.close()
+            self._server = None
+        compressor.join()
+
+    def _attach(self):
+        # 丢弃从父进程继承的队列，建立本进程自己的队列和转发线程
+        self._listener = None
+        self._use_queue(queue.Queue(maxsize=self.queue_size))
+        self._start_listener(self._remote_writer())
+        self._attached_pid = os.getpid()
+
+    def _remote_writer(self) -> _RemoteWriter:
+        return _RemoteWriter(self._server.address, self._authkey)
+
+    def _use_queue(self, new_queue):
+        self.queue = new_queue
+        for handler in self.queue_handlers:
+            handler.queue = new_queue
+
+    def _start_listener(self, handler: logging.Handler):
+        self._listener = QueueListener(self.queue, handler)
+        self._listener.start()
+        self._owner_pid = os.getpid()
@@ -0,0 +1,135 @@
+"""
+日志限流
+按 key 维护令牌桶，桶内有令牌才写日志；被压制的条数累计下来，
+随该 key 下一条放行的日志一起输出（"N similar suppressed"），令牌按速率回填，
+因此持续刷错时每个 key 大约每 1/rate 秒产生一条带汇总的日志。
+key 之后不再出错（空闲超过一个回填周期）或被 LRU 淘汰时，剩余计数交给 on_suppressed 单独输出，不会丢失
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class ThrottleDecision(NamedTuple):
+    allowed: bool
+    suppressed: int
+
+
+class LogThrottle:
+    """线程安全的按 key 令牌桶；key 数量超过 max_keys 时淘汰最久未使用的"""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 10,
+        max_keys: int = 1024,
+        on_suppressed=None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # on_suppressed(key, count)：汇总输出未随日志带出的压制条数
+        self.on_suppressed = on_suppressed
+        # key -> [tokens, last_refill, suppressed]
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._flusher_stop = threading.Event()
+
+    def configure(self, rate: float | None = None, burst: int | None = None):
+        """只调整速率和容量，已有的桶和压制计数保留，按新参数继续回填"""
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+
+    def hit(self, key) -> ThrottleDecision:
+        """记录一次日志请求，返回是否放行以及此前被压制的条数（放行时清零）"""
+        if self.burst <= 0:
+            return ThrottleDecision(True, 0)
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+                while len(self._buckets) > self.max_keys:
+                    old_key, old_bucket = self._buckets.popitem(last=False)
+                    if old_bucket[2]:
+                        evicted.append((old_key, old_bucket[2]))
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                bucket[2] += 1
+                decision = ThrottleDecision(False, bucket[2])
+            else:
+                bucket[0] -= 1
+                suppressed, bucket[2] = bucket[2], 0
+                decision = ThrottleDecision(True, suppressed)
+
+        self._report(evicted)
+        if not decision.allowed:
+            self._ensure_flusher()
+        return decision
+
+    def flush_interval(self) -> float:
+        return max(1.0 / self.rate, 1.0) if self.rate > 0 else 60.0
+
+    def flush_idle(self):
+        """空闲超过一个回填周期、仍有压制计数的 key 单独汇总输出"""
+        now = time.monotonic()
+        interval = self.flush_interval()
+        pending = []
+        with self._lock:
+            for key, bucket in self._buckets.items():
+                if bucket[2] and now - bucket[1] >= interval:
+                    pending.append((key, bucket[2]))
+                    bucket[2] = 0
+        self._report(pending)
+
+    def _report(self, pending):
+        if self.on_suppressed is None:
+            return
+        for key, count in pending:
+            self.on_suppressed(key, count)
+
+    def _ensure_flusher(self):
+        # 首次出现压制时在本进程启动定时汇总线程（fork 出的进程各自启动）
+        if self.on_suppressed is None or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher_stop = stop = threading.Event()
+        threading.Thread(
+            target=self._flush_loop,
+            args=(stop,),
+            name="log-throttle-flush",
+            daemon=True,
+        ).start()
+
+    def _flush_loop(self, stop: threading.Event):
+        while not stop.wait(self.flush_interval()):
+            try:
+                self.flush_idle()
+            except Exception:
+                # 与 logging.Handler.handleError 一样输出到 stderr，汇总线程继续运行
+                sys.stderr.write("--- Log throttle flush error ---\n")
+                traceback.print_exc(file=sys.stderr)
+
+    def reset(self):
+        """清空所有桶并停止定时汇总线程（下一次压制时重新启动）"""
+        with self._lock:
+            self._buckets.clear()
+            self._flusher_stop.set()
+            self._flusher_pid = None
@@ -0,0 +1,64 @@
+"""
+分页工具
+- page/offset 模式：兼容旧接口，返回 total
+- cursor(keyset) 模式：按 id 倒序 seek，不做 OFFSET 扫描和 COUNT(*)
+"""
+
+import base64
+import json
+
+from app.exceptions.base import QueryError
+
+MAX_PAGE_SIZE = 100
+# id 列为 64 位有符号整数，超出范围的游标会在绑定参数时出错
+MAX_CURSOR_ID = 2**63 - 1
+
+
+def clamp_page_size(page_size: int) -> int:
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(last_id: int) -> str:
+    """将最后一条记录的 id 编码为不透明游标"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int | None:
+    """
+    解码游标
+    空字符串表示 cursor 模式的第一页，返回 None
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = payload["id"]
+    except (ValueError, TypeError, KeyError):
+        raise QueryError(message="cursor 参数无效")
+    if (
+        not isinstance(last_id, int)
+        or isinstance(last_id, bool)
+        or not 1 <= last_id <= MAX_CURSOR_ID
+    ):
+        raise QueryError(message="cursor 参数无效")
+    return last_id
+
+
+def keyset_paginate(query, id_column, cursor: str, page_size: int):
+    """
+    按 id 倒序的 keyset 分页
+    多取一行判断是否还有下一页，返回 (items, next_cursor)
+    """
+    per_page = clamp_page_size(page_size)
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        query = query.filter(id_column < last_id)
+    rows = query.order_by(id_column.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
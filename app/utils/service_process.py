@@ -0,0 +1,85 @@
+"""
+常驻辅助进程
+gunicorn 主进程用 os.fork 启动的辅助进程（共享哈希进程池、refresh token 清理等）。
+不用 multiprocessing.Process：它把子进程登记在模块级列表中，之后 fork 出的 worker 会继承这份列表，
+worker 退出时 multiprocessing 的 atexit 会去 terminate / join 并不属于自己的进程。
+"""
+
+import os
+import signal
+import threading
+import time
+import traceback
+
+# gunicorn 主进程安装了处理函数的信号
+_INHERITED_SIGNALS = (
+    signal.SIGHUP,
+    signal.SIGQUIT,
+    signal.SIGTERM,
+    signal.SIGCHLD,
+    signal.SIGUSR1,
+    signal.SIGUSR2,
+    signal.SIGTTIN,
+    signal.SIGTTOU,
+    signal.SIGWINCH,
+)
+
+
+def _exit_with_parent(parent_pid: int, interval: float):
+    """父进程意外退出（例如被 SIGKILL）时跟着退出，不留下孤儿进程"""
+    while True:
+        time.sleep(interval)
+        if os.getppid() != parent_pid:
+            os._exit(0)
+
+
+def start_service(target, *args, parent_check_interval: float = 1.0) -> int:
+    """fork 一个子进程执行 target(*args)，返回子进程 pid"""
+    parent_pid = os.getpid()
+    pid = os.fork()
+    if pid:
+        return pid
+
+    status = 0
+    try:
+        # 恢复从 gunicorn 主进程继承的信号处理；Ctrl-C 会发给整个进程组，由父进程负责停止辅助进程
+        for signum in _INHERITED_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        threading.Thread(
+            target=_exit_with_parent,
+            args=(parent_pid, parent_check_interval),
+            daemon=True,
+        ).start()
+        target(*args)
+    except BaseException:
+        status = 1
+        traceback.print_exc()
+    finally:
+        # 不执行从父进程继承的 atexit 回调
+        os._exit(status)
+
+
+def stop_service(pid: int, timeout: float = 5.0):
+    """发送 SIGTERM 并等待退出，超时后 SIGKILL"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            # 已被回收（gunicorn 主进程会回收所有退出的子进程）
+            return
+        if done:
+            return
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
+    try:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
@@ -4,7 +4,6 @@
 """
 
 from flask import request, jsonify, g
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from flask_jwt_extended.exceptions import NoAuthorizationError, JWTExtendedException
 from pydantic import ValidationError
 from functools import wraps
@@ -14,8 +13,20 @@ from app.exceptions.base import (
     NotFoundError,
     QueryError,
 )
+from app.extensions.request_tracking import set_request_user
 from app.logger import error_logger
-from app.models.user import User
+from app.services.permission_service import (
+    PERMISSION_CLAIM,
+    has_permission,
+    permission_bitset_for_user,
+)
+from app.services.token_epoch import TOKEN_VERSION_CLAIM, current_token_version
+from app.services.user_cache import get_cached_user
+from app.utils.jwt_cache import (
+    current_jwt_claims,
+    current_jwt_identity,
+    verified_jwt_claims,
+)
 
 
 def validate_request(schema_class):
@@ -90,11 +101,20 @@ def login_required():
                 # 1. 检查有没有 Authorization Header
                 # 2. 检查是否有 Bearer 前缀
                 # 3. 验证 Token 的合法性和有效期
-                verify_jwt_in_request()
+                # 同一 token 验证过一次后，在过期前直接复用缓存的 claims
+                claims = verified_jwt_claims()
 
                 # 只有验证通过，这一步才不会报错
-                g.user_id = get_jwt_identity()
+                g.user_id = current_jwt_identity()
+                set_request_user(g.user_id)
+
+                # token 版本落后（logout-all 之后签发的除外）则视为失效
+                token_version = claims.get(TOKEN_VERSION_CLAIM, 0)
+                if token_version != current_token_version(g.user_id):
+                    raise AuthorizationError("登录状态已失效，请重新登录")
 
+            except AuthorizationError:
+                raise
             except NoAuthorizationError:
                 # 这里的逻辑等同于 if not token
                 raise AuthorizationError("请先登录，未检测到认证信息")
@@ -137,20 +157,23 @@ def validate_query(schema_class):
 
 
 def permission_required(permission_code):
+    """
+    权限校验：需放在 login_required / jwt_required 之后
+    权限位图来自 access token claims，权限表来自进程内缓存，不访问数据库
+    """
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            if not user:
-                return jsonify({"message": "用户不存在"}), 404
-            # 汇总所有权限
-            permissions = set()
-            for role in user.roles:
-                for perm in role.permissions:
-                    permissions.add(perm.code)
-
-            if permission_code not in permissions:
+            bitset = current_jwt_claims().get(PERMISSION_CLAIM)
+            if bitset is None:
+                # 兼容未携带权限位图的旧 token：回退到数据库计算
+                user = get_cached_user(current_jwt_identity())
+                if not user:
+                    return jsonify({"message": "用户不存在"}), 404
+                bitset = permission_bitset_for_user(user.id)
+
+            if not has_permission(bitset, permission_code):
                 return jsonify({"message": "权限不足"}), 403
 
             return f(*args, **kwargs)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""对比 JSONFormatter 与 FastJSONFormatter 的格式化吞吐（records/sec）。
+
+在请求上下文中格式化同一条带访问字段的日志记录，模拟生产环境里
+QueueHandler 在请求线程上格式化的场景。
+
+tests/test_structured_logging.py 中标记为 benchmark 的用例复用 measure，
+对相对吞吐做粗粒度断言，防止 FastJSONFormatter 的优化退化。
+
+Usage:
+  python benchmarks/bench_json_formatter.py --records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask  # noqa: E402
+
+from app.extensions.structured_logging import (  # noqa: E402
+    FastJSONFormatter,
+    JSONFormatter,
+    resolve_json_encoder,
+)
+
+
+def _make_record() -> logging.LogRecord:
+    record = logging.LogRecord(
+        "access",
+        logging.INFO,
+        __file__,
+        1,
+        "%s %s %s",
+        ("GET", "/api/posters", 200),
+        None,
+        func="_record",
+    )
+    record.access = {
+        "method": "GET",
+        "route": "/api/posters",
+        "status": 200,
+        "duration_ms": 3.21,
+        "bytes": 512,
+        "request_id": "b1c2d3",
+        "user_id": 42,
+    }
+    return record
+
+
+def measure(formatter: logging.Formatter, records: int) -> float:
+    """返回格式化吞吐（records/sec），需在请求上下文中调用"""
+    record = _make_record()
+    fmt = formatter.format
+    start = time.perf_counter()
+    for _ in range(records):
+        # 每条日志都是新记录，清掉格式化缓存
+        record.created = time.time()
+        fmt(record)
+    return records / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    variants = {
+        "JSONFormatter": JSONFormatter(),
+        "Fast(json)": FastJSONFormatter(resolve_json_encoder("json")),
+    }
+    try:
+        variants["Fast(orjson)"] = FastJSONFormatter(resolve_json_encoder("orjson"))
+    except ImportError:
+        pass
+
+    app = Flask(__name__)
+    with app.test_request_context("/api/posters", headers={"X-Request-ID": "b1c2d3"}):
+        results = {}
+        for name, formatter in variants.items():
+            measure(formatter, min(args.records, 2000))
+            results[name] = measure(formatter, args.records)
+
+    baseline = results["JSONFormatter"]
+    print(f"records={args.records}")
+    for name, rate in results.items():
+        print(f"{name:<14} {rate:12,.0f} records/sec  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
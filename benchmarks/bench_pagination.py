@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""对比 page/offset 与 cursor(keyset) 两种分页在深页上的耗时。
+
+Usage:
+  python benchmarks/bench_pagination.py --rows 200000 --page-size 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask  # noqa: E402
+
+from app.extensions.extensions import db  # noqa: E402
+from app.models.poster import Poster  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.message_service import list_messages  # noqa: E402
+from app.utils.pagination import encode_cursor  # noqa: E402
+
+PAGES = (1, 100, 10_000)
+
+
+def _build_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def _seed(rows: int) -> None:
+    db.create_all()
+    user = User(username="bench", email="bench@example.com", user_id=1)
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.utcnow()
+    batch = []
+    for idx in range(rows):
+        batch.append(
+            {
+                "title": f"title-{idx}",
+                "content": "x" * 200,
+                "status": 256,
+                "user_id": user.id,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        if len(batch) == 10_000:
+            db.session.execute(Poster.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Poster.__table__.insert(), batch)
+    db.session.commit()
+
+
+def _cursor_for_page(page: int, page_size: int) -> str:
+    if page == 1:
+        return ""
+    last_id = (
+        db.session.query(Poster.id)
+        .filter(Poster.status == 256)
+        .order_by(Poster.id.desc())
+        .offset((page - 1) * page_size - 1)
+        .limit(1)
+        .scalar()
+    )
+    return encode_cursor(last_id)
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    needed = max(PAGES) * args.page_size
+    if args.rows < needed:
+        parser.error(f"--rows must be >= {needed} to reach page {max(PAGES)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.sqlite"))
+        with app.app_context():
+            _seed(args.rows)
+            print(f"rows={args.rows} page_size={args.page_size} repeat={args.repeat}")
+            print(f"{'page':>8} {'offset(ms)':>12} {'cursor(ms)':>12}")
+            for page in PAGES:
+                cursor = _cursor_for_page(page, args.page_size)
+                offset_ms = _timeit(
+                    lambda: list_messages(page=page, page_size=args.page_size),
+                    args.repeat,
+                )
+                cursor_ms = _timeit(
+                    lambda: list_messages(page_size=args.page_size, cursor=cursor),
+                    args.repeat,
+                )
+                print(f"{page:>8} {offset_ms:>12.3f} {cursor_ms:>12.3f}")
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""对比列表查询加载整行与只加载 to_dict 所需列的内存和耗时。
+
+Usage:
+  python benchmarks/bench_projection.py --rows 2000 --page-size 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask  # noqa: E402
+
+from app.extensions.extensions import db  # noqa: E402
+from app.models.poster import Poster  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+BODY_SIZES = (10 * 1024, 100 * 1024)
+
+
+def _build_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def _seed(rows: int, body_size: int) -> None:
+    db.drop_all()
+    db.create_all()
+    user = User(username="bench", email="bench@example.com", user_id=1)
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.utcnow()
+    body = "x" * body_size
+    db.session.execute(
+        Poster.__table__.insert(),
+        [
+            {
+                "title": f"title-{idx}",
+                "content": body,
+                "status": 256,
+                "user_id": user.id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for idx in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def _page(page_size: int, projected: bool) -> list[dict]:
+    query = Poster.query
+    if projected:
+        query = query.options(Poster.list_options())
+    items = (
+        query.filter(Poster.status == 256)
+        .order_by(Poster.id.desc())
+        .limit(page_size)
+        .all()
+    )
+    return [item.to_dict() for item in items]
+
+
+def _measure(page_size: int, projected: bool, repeat: int) -> tuple[float, float]:
+    db.session.expunge_all()
+    tracemalloc.start()
+    _page(page_size, projected)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db.session.expunge_all()
+        _page(page_size, projected)
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    return elapsed_ms, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.sqlite"))
+        with app.app_context():
+            print(f"rows={args.rows} page_size={args.page_size} repeat={args.repeat}")
+            print(f"{'body':>8} {'mode':>10} {'latency(ms)':>12} {'peak(KiB)':>12}")
+            for body_size in BODY_SIZES:
+                _seed(args.rows, body_size)
+                for mode, projected in (("full_row", False), ("projected", True)):
+                    latency, peak = _measure(args.page_size, projected, args.repeat)
+                    print(
+                        f"{body_size // 1024:>6}KB {mode:>10} "
+                        f"{latency:>12.3f} {peak:>12.1f}"
+                    )
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
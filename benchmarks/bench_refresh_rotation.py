@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""refresh token 轮换：旧的“查用户 + SELECT + ORM 更新 + INSERT”路径 vs 单条条件 UPDATE。
+
+Usage:
+  python benchmarks/bench_refresh_rotation.py --rotations 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask  # noqa: E402
+from flask_jwt_extended import JWTManager, create_refresh_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions.extensions import bcrypt, db  # noqa: E402
+from app.models.user import Refresh, User  # noqa: E402
+from app.services import auth_service  # noqa: E402
+
+
+def _legacy_rotate(raw_refresh_token: str, user_identity: str) -> str:
+    """轮换的旧实现，仅用于对比"""
+    user = User.query.filter(User.user_id == user_identity).first()
+    record = Refresh.query.filter_by(
+        user_id=user.id,
+        token=auth_service._hash_refresh_token(raw_refresh_token),
+        is_revoked=False,
+    ).first()
+    if record.expires_at <= datetime.utcnow():
+        raise RuntimeError("expired")
+    auth_service._create_access_token(user.id, user_identity)
+    new_token = create_refresh_token(
+        identity=user_identity, expires_delta=timedelta(days=30)
+    )
+    record.is_revoked = True
+    db.session.add(
+        Refresh(
+            user_id=user.id,
+            token=auth_service._hash_refresh_token(new_token),
+            is_revoked=False,
+            expires_at=datetime.utcnow() + timedelta(days=30),
+        )
+    )
+    db.session.commit()
+    return new_token
+
+
+def _build_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["JWT_SECRET_KEY"] = "bench-jwt-secret-key-with-32-bytes!!"
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+    db.init_app(app)
+    bcrypt.init_app(app)
+    JWTManager(app)
+    return app
+
+
+def _run(label: str, rotate, token: str, rotations: int) -> None:
+    statements = {"count": 0}
+
+    def count(conn, cursor, statement, parameters, context, many):
+        statements["count"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    for _ in range(rotations):
+        token = rotate(token)
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, "before_cursor_execute", count)
+    print(
+        f"{label:>8}: {elapsed / rotations * 1000:.3f} ms/rotation, "
+        f"{statements['count'] / rotations:.1f} statements/rotation"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rotations", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.sqlite"))
+        with app.app_context():
+            db.create_all()
+            auth_service.register_user(
+                SimpleNamespace(
+                    username="bench", email="bench@example.com", password="Strong123A"
+                )
+            )
+            user = User.query.filter_by(username="bench").first()
+            identity = str(user.user_id)
+            auth_service.get_jwt_identity = lambda: identity
+
+            login = auth_service.user_login("bench@example.com", None, "Strong123A")
+            _run(
+                "legacy",
+                lambda token: _legacy_rotate(token, identity),
+                login["refresh"],
+                args.rotations,
+            )
+
+            login = auth_service.user_login("bench@example.com", None, "Strong123A")
+            _run(
+                "atomic",
+                lambda token: auth_service.rotate_refresh_token(token)["refresh_token"],
+                login["refresh"],
+                args.rotations,
+            )
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""对比 /health 在不同横切实现下的单请求开销。
+
+- bare: 不挂任何横切逻辑
+- hooks: 原先的 before/after_request 钩子组合（请求追踪、Prometheus、安全头、访问日志）
+- middleware: 当前的单层 WSGI 中间件
+
+直接调用 WSGI 接口并消费、关闭响应体，不经过测试客户端。
+访问日志 handler 在所有变体中都关闭，只比较钩子本身的开销。
+
+Usage:
+  python benchmarks/bench_request_overhead.py --requests 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask, g, jsonify, request  # noqa: E402
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+from app.extensions.prometheus_metrics import (  # noqa: E402
+    active_requests,
+    error_count,
+    request_count,
+    request_duration,
+    request_size,
+    response_size,
+)
+from app.extensions.request_middleware import setup_request_middleware  # noqa: E402
+from app.logger import access_logger  # noqa: E402
+
+
+def _health_app() -> Flask:
+    app = Flask(__name__)
+
+    @app.route("/health")
+    def health_check():
+        return jsonify({"status": "healthy", "message": "Application is running"}), 200
+
+    return app
+
+
+def _install_legacy_hooks(app: Flask) -> None:
+    """重现中间件之前的钩子组合，作为对照组"""
+
+    @app.before_request
+    def before_request():
+        g.request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        g.start_time = time.time()
+
+    @app.before_request
+    def before_request_metrics():
+        g.metrics_start_time = time.time()
+        active_requests.inc()
+
+    @app.before_request
+    def log_request_info():
+        access_logger.info(f"访问路径: {request.path}, 方法: {request.method}")
+
+    @app.after_request
+    def set_security_headers(response):
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "SAMEORIGIN"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Content-Security-Policy"] = (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline'; "
+            "style-src 'self' 'unsafe-inline'; "
+            "img-src 'self' data: https:; "
+            "font-src 'self'"
+        )
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+    @app.after_request
+    def after_request_metrics(response):
+        try:
+            duration = time.time() - getattr(g, "metrics_start_time", time.time())
+            method = request.method
+            endpoint = request.endpoint or "unknown"
+            status = response.status_code
+            request_count.labels(method=method, endpoint=endpoint, status=status).inc()
+            request_duration.labels(method=method, endpoint=endpoint).observe(duration)
+            request_size.labels(method=method, endpoint=endpoint).observe(
+                request.content_length or 0
+            )
+            response_size.labels(method=method, endpoint=endpoint).observe(
+                len(response.get_data())
+            )
+            if status >= 400:
+                error_count.labels(type="http_error", status=status).inc()
+        finally:
+            active_requests.dec()
+        return response
+
+    @app.after_request
+    def after_request(response):
+        response.headers["X-Request-ID"] = g.get("request_id", "")
+        if hasattr(g, "start_time"):
+            elapsed = time.time() - g.start_time
+            response.headers["X-Response-Time"] = f"{elapsed:.3f}s"
+        return response
+
+
+def _build(variant: str) -> Flask:
+    app = _health_app()
+    if variant == "hooks":
+        _install_legacy_hooks(app)
+    elif variant == "middleware":
+        setup_request_middleware(app)
+    return app
+
+
+def _start_response(status, headers, exc_info=None):
+    return None
+
+
+def _run(app: Flask, environ: dict, requests: int) -> float:
+    wsgi = app.wsgi_app
+    start = time.perf_counter()
+    for _ in range(requests):
+        body = wsgi(dict(environ), _start_response)
+        try:
+            for _chunk in body:
+                pass
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=500)
+    args = parser.parse_args()
+
+    access_logger.disabled = True
+    environ = EnvironBuilder(path="/health", method="GET").get_environ()
+
+    results = {}
+    for variant in ("bare", "hooks", "middleware"):
+        app = _build(variant)
+        _run(app, environ, args.warmup)
+        results[variant] = _run(app, environ, args.requests) / args.requests * 1e6
+
+    print(f"requests={args.requests}")
+    for variant, per_request_us in results.items():
+        overhead = per_request_us - results["bare"]
+        print(
+            f"{variant:<11} {per_request_us:8.1f} us/request  "
+            f"overhead={overhead:7.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
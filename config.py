@@ -10,6 +10,68 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     RATE_LIMIT_STORAGE_URI = os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://")
+    # tiered+sqlite:// 存储：本地增量同步到共享存储的间隔（毫秒），
+    # 以及每个 worker 对每个限额可先行放行的未同步命中比例
+    RATE_LIMIT_SYNC_INTERVAL_MS = float(
+        os.environ.get("RATE_LIMIT_SYNC_INTERVAL_MS", "10")
+    )
+    RATE_LIMIT_OVER_ADMISSION = float(
+        os.environ.get("RATE_LIMIT_OVER_ADMISSION", "0.05")
+    )
+
+    # 已认证用户缓存（每个 worker 独立的 LRU + TTL）
+    USER_CACHE_MAX_SIZE = int(os.environ.get("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
+    # bcrypt cost，可用 `flask bcrypt-calibrate` 按机器性能推荐；修改后登录时自动迁移
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", "12"))
+
+    # 密码哈希执行器：整台机器同时执行的哈希数（默认一半的核），名额用完直接 503
+    PASSWORD_HASH_MAX_CONCURRENCY = int(
+        os.environ.get(
+            "PASSWORD_HASH_MAX_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2))
+        )
+    )
+    PASSWORD_HASH_USE_PROCESS_POOL = True
+    PASSWORD_HASH_TIMEOUT = 10.0
+
+    # 注册查重 Bloom 过滤器（容量不足时按现有用户数 2 倍扩容）
+    IDENTITY_FILTER_CAPACITY = int(
+        os.environ.get("IDENTITY_FILTER_CAPACITY", "1000000")
+    )
+    IDENTITY_FILTER_ERROR_RATE = 0.01
+
+    # refresh_tokens 清理：大于 0 时 gunicorn 主进程启动一个独立清理进程按该间隔运行；
+    # 为 0 时只通过 flask prune-refresh-tokens（cron）清理。多台机器部署时只在一台上开启
+    REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS = float(
+        os.environ.get("REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS", "0")
+    )
+    REFRESH_TOKEN_PRUNE_GRACE_SECONDS = 86400
+    REFRESH_TOKEN_PRUNE_BATCH_SIZE = 1000
+    REFRESH_TOKEN_PRUNE_THROTTLE_SECONDS = 0.1
+
+    # 每个用户最多保留的有效 refresh 会话数，超出时撤销最旧的（0 表示不限制）
+    REFRESH_SESSION_CAP = int(os.environ.get("REFRESH_SESSION_CAP", "10"))
+
+    # token 版本缓存：同机 worker 通过共享通知板立即失效，多机部署时其他机器最迟此秒数后生效
+    TOKEN_EPOCH_CACHE_TTL_SECONDS = float(
+        os.environ.get("TOKEN_EPOCH_CACHE_TTL_SECONDS", "5")
+    )
+
+    # 已验证 access token 的 claims 缓存条数（条目在 token 过期时失效）；
+    # 命中时不再调用 blocklist / user_lookup 回调，注册了这类回调时设为 0 关闭缓存
+    JWT_CLAIMS_CACHE_MAX_SIZE = int(
+        os.environ.get("JWT_CLAIMS_CACHE_MAX_SIZE", "10000")
+    )
+
+    # 角色 -> 权限表缓存
+    PERMISSION_CACHE_TTL_SECONDS = float(
+        os.environ.get("PERMISSION_CACHE_TTL_SECONDS", "300")
+    )
+
+    # 请求级 SQL 埋点：慢查询阈值（毫秒）、同一请求内重复语句达到多少次视为疑似 N+1
+    SQL_INSTRUMENTATION_ENABLED = True
+    SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", "200"))
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", "5"))
 
     # Cookie 安全通用配置
     SESSION_COOKIE_HTTPONLY = True
@@ -33,6 +95,23 @@ class Config:
         },
     }
 
+    # 生产环境 JSON 日志编码器：auto（有 orjson 时使用）/ json / orjson / "module:callable"
+    LOG_JSON_ENCODER = os.environ.get("LOG_JSON_ENCODER", "auto")
+
+    # 错误日志限流：每个 (错误类型, code, endpoint) 的令牌桶回填速率（条/秒）和容量
+    ERROR_LOG_RATE_PER_SECOND = float(os.environ.get("ERROR_LOG_RATE_PER_SECOND", "1"))
+    ERROR_LOG_BURST = int(os.environ.get("ERROR_LOG_BURST", "10"))
+
+    # 访问日志：2xx/3xx 采样率（0~1），状态码 >= 400 或耗时超过 ACCESS_LOG_SLOW_MS 的请求始终记录
+    ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_SLOW_MS = float(os.environ.get("ACCESS_LOG_SLOW_MS", "1000"))
+
+    # /metrics 渲染结果缓存时间（秒）
+    METRICS_CACHE_TTL_SECONDS = float(os.environ.get("METRICS_CACHE_TTL_SECONDS", "5"))
+
+    # 连接池饱和度达到该比例时 system-check 告警
+    DB_POOL_SATURATION_WARN = float(os.environ.get("DB_POOL_SATURATION_WARN", "0.8"))
+
     @staticmethod
     def init_app(app):
         pass
@@ -40,6 +119,8 @@ class Config:
 
 class DevConfig(Config):
     DEBUG = True
+    # 开发环境直接在请求线程内计算哈希
+    PASSWORD_HASH_USE_PROCESS_POOL = False
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL", "sqlite:///" + os.path.join(basedir, "data-dev.sqlite")
     )
@@ -1,6 +1,8 @@
 # gunicorn.conf.py
 
+import glob
 import multiprocessing
+import os
 
 # 绑定地址和端口
 bind = "127.0.0.1:8000"
@@ -26,3 +28,132 @@ accesslog = "-"
 
 # 错误日志（stderr）
 errorlog = "-"
+
+# Prometheus 多进程模式：所有 worker 把指标写入同一目录，/metrics 聚合全部 worker
+# 必须在导入 prometheus_client 之前设置，因此放在配置文件中
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc"
+)
+
+# 独立的 metrics 监听（独立子进程），留空则不启动
+metrics_bind = os.environ.get("METRICS_BIND", "127.0.0.1:9101")
+
+# 密码哈希：整台机器的 bcrypt CPU 预算（默认一半的核），至少留一个 worker 给其他请求
+# 写回环境变量，worker 中的应用配置读到同一个值
+password_hash_concurrency = max(
+    1,
+    min(
+        int(
+            os.environ.get(
+                "PASSWORD_HASH_MAX_CONCURRENCY",
+                str(max(1, (os.cpu_count() or 2) // 2)),
+            )
+        ),
+        workers - 1,
+    ),
+)
+os.environ["PASSWORD_HASH_MAX_CONCURRENCY"] = str(password_hash_concurrency)
+_password_hash_slots = multiprocessing.BoundedSemaphore(password_hash_concurrency)
+_password_hash_authkey = os.urandom(32)
+_password_hash_pool = None
+_refresh_token_pruner_pid = None
+_metrics_server_pid = None
+
+# token 版本变更通知板：logout-all 后同机所有 worker 立即回源数据库
+_token_epoch_slots = multiprocessing.Array("q", 4096)
+
+
+def on_starting(server):
+    # 主进程启动时清理上一次运行残留的指标文件，避免计数从旧值继续累加
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(prometheus_multiproc_dir, "*.db")):
+        os.remove(path)
+
+    # 日志单写者：独立的日志进程持有日志文件并负责轮转，各进程首次写日志时通过 Unix socket 连接它
+    from app.logger import LOG_QUEUE_SIZE, log_pipeline
+
+    log_pipeline.start_shared_writer(LOG_QUEUE_SIZE)
+
+    # 共享哈希进程池：所有 worker 共用，同时执行的哈希数 = password_hash_concurrency
+    global _password_hash_pool
+    from app.extensions.password_hasher import start_hash_pool
+
+    _password_hash_pool = start_hash_pool(
+        password_hash_concurrency, _password_hash_authkey
+    )
+
+
+def when_ready(server):
+    # refresh_tokens 周期清理：整台机器只在这一个独立进程中运行
+    global _refresh_token_pruner_pid, _metrics_server_pid
+    from app.utils.service_process import start_service
+
+    if float(os.environ.get("REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS", "0")) > 0:
+        from app.services.refresh_token_pruner import serve_refresh_token_pruner
+
+        _refresh_token_pruner_pid = start_service(serve_refresh_token_pruner)
+
+    if not metrics_bind:
+        return
+    from app.extensions.metrics_server import create_metrics_server, serve_metrics
+
+    # 端口在主进程中绑定，冲突时启动直接失败；监听交给子进程后主进程关闭自己的副本
+    metrics_server = create_metrics_server(
+        metrics_bind, ttl=float(os.environ.get("METRICS_CACHE_TTL_SECONDS", "5"))
+    )
+    _metrics_server_pid = start_service(serve_metrics, metrics_server)
+    metrics_server.server_close()
+    server.log.info("metrics listening at http://%s/metrics", metrics_bind)
+
+
+def post_fork(server, worker):
+    from app.extensions.password_hasher import password_hasher
+    from app.services.token_epoch import token_epoch_board
+
+    token_epoch_board.use_shared(_token_epoch_slots)
+
+    listener, _ = _password_hash_pool
+    password_hasher.use_shared_pool(
+        _password_hash_slots,
+        listener.address,
+        _password_hash_authkey,
+        password_hash_concurrency,
+    )
+
+
+def post_worker_init(worker):
+    # 应用加载完成后在后台构建注册查重过滤器，首个注册请求不必等待全表扫描
+    from app.services.identity_filter import identity_filter
+
+    identity_filter.build_in_background(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    from app.extensions.password_hasher import password_hasher
+    from app.extensions.rate_limiting import close_rate_limit_storage
+
+    password_hasher.shutdown()
+    # 两级限流存储：把本 worker 尚未同步的命中写入共享存储
+    close_rate_limit_storage()
+
+
+def on_exit(server):
+    from app.extensions.password_hasher import stop_hash_pool
+    from app.logger import log_pipeline
+    from app.utils.service_process import stop_service
+
+    if _password_hash_pool is not None:
+        stop_hash_pool(*_password_hash_pool)
+    if _refresh_token_pruner_pid is not None:
+        stop_service(_refresh_token_pruner_pid)
+    if _metrics_server_pid is not None:
+        stop_service(_metrics_server_pid)
+
+    log_pipeline.stop()
+
+
+def child_exit(server, worker):
+    # worker 退出后移除其 livesum gauge 文件，计数类指标仍保留在聚合结果中
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
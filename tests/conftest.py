@@ -2,9 +2,23 @@
 测试基础配置和 Fixtures
 """
 
+from contextlib import contextmanager
+from typing import NamedTuple
+
 import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from sqlalchemy import event
+
 from app import create_app
-from app.extensions.extensions import db
+from app.extensions.error_handle import error_log_throttle
+from app.extensions.extensions import bcrypt, db
+from app.extensions.metrics_server import exposition_cache
+from app.services.identity_filter import identity_filter
+from app.services.permission_service import permission_cache
+from app.services.token_epoch import token_epoch_cache
+from app.services.user_cache import user_cache
+from app.utils.jwt_cache import jwt_claims_cache
 
 
 @pytest.fixture(scope="session")
@@ -33,7 +47,72 @@ def db_init(app):
         db.drop_all()
 
 
+@pytest.fixture(scope="function")
+def sqlite_app():
+    """只挂载数据库、bcrypt 和 JWT 的最小应用（内存 SQLite），在 app_context 内运行测试"""
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["JWT_SECRET_KEY"] = "jwt-test-secret"
+    db.init_app(app)
+    bcrypt.init_app(app)
+    JWTManager(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class CapturedStatement(NamedTuple):
+    sql: str
+    parameters: object
+
+
+@pytest.fixture
+def capture_sql():
+    """
+    返回上下文管理器 capture_sql(app=None)，收集期间发往数据库的语句（CapturedStatement 列表）
+    不传 app 时使用当前 app_context 的 engine
+    """
+
+    @contextmanager
+    def _capture(app=None):
+        if app is not None:
+            with app.app_context():
+                engine = db.engine
+        else:
+            engine = db.engine
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(CapturedStatement(statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+    return _capture
+
+
 @pytest.fixture
 def runner(app):
     """CLI 测试运行器"""
     return app.test_cli_runner()
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """进程内缓存跨测试共享，每个测试前清空"""
+    user_cache.clear()
+    permission_cache.clear()
+    identity_filter.reset()
+    token_epoch_cache.clear()
+    jwt_claims_cache.clear()
+    exposition_cache.clear()
+    error_log_throttle.reset()
+    yield
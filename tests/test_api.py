@@ -10,7 +10,7 @@ from flask_limiter.util import get_remote_address
 from flask_jwt_extended import create_access_token
 
 from app.models.user import User
-from app.services.auth_service import register_user
+from app.services.auth_service import register_user, user_login
 
 
 class TestHealthCheck:
@@ -102,6 +102,46 @@ class TestAuthEndpoints:
         assert ok_response.status_code == 200
         assert ok_response.json["data"]["user_id"] == current_user.user_id
 
+    def test_logout_all_invalidates_existing_tokens(self, client, app, db_init):
+        with app.app_context():
+            register_user(
+                SimpleNamespace(
+                    username="logout_all",
+                    email="logout_all@example.com",
+                    password="Strong123A",
+                )
+            )
+            first = user_login("logout_all@example.com", None, "Strong123A")
+            second = user_login("logout_all@example.com", None, "Strong123A")
+        user_id = first["user_id"]
+
+        response = client.post(
+            "/auth/logout-all",
+            headers={"Authorization": f"Bearer {first['token']}"},
+        )
+        assert response.status_code == 200
+        assert response.json["data"]["revoked_sessions"] == 2
+
+        stale_access = client.get(
+            f"/auth/profile/{user_id}",
+            headers={"Authorization": f"Bearer {second['token']}"},
+        )
+        assert stale_access.status_code == 403
+
+        stale_refresh = client.post(
+            "/auth/refresh",
+            headers={"Authorization": f"Bearer {second['refresh']}"},
+        )
+        assert stale_refresh.status_code == 401
+
+        with app.app_context():
+            fresh = user_login("logout_all@example.com", None, "Strong123A")
+        fresh_access = client.get(
+            f"/auth/profile/{user_id}",
+            headers={"Authorization": f"Bearer {fresh['token']}"},
+        )
+        assert fresh_access.status_code == 200
+
 
 class TestMetricsEndpoint:
     """Prometheus 指标端点测试"""
@@ -113,6 +153,17 @@ class TestMetricsEndpoint:
         # 应该返回 Prometheus 格式的数据
         assert b"flask_requests_total" in response.data or b"HELP" in response.data
 
+    def test_metrics_include_db_queries_per_endpoint(self, client, db_init):
+        # 指标在响应体 close 时上报
+        client.get("/message?page=1&page_size=10").close()
+        response = client.get("/metrics")
+        assert b"flask_request_db_queries_bucket" in response.data
+        assert (
+            b'flask_request_db_queries_count{endpoint="message.find_post"'
+            in response.data
+        )
+        assert b"flask_request_db_duration_seconds_bucket" in response.data
+
 
 class TestRequestTracking:
     """请求追踪功能测试"""
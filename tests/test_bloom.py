@@ -0,0 +1,18 @@
+from app.utils.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"user-{idx}" for idx in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate_within_bound():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for idx in range(5000):
+        bloom.add(f"taken-{idx}")
+    false_positives = sum(f"free-{idx}" in bloom for idx in range(20000))
+    assert false_positives / 20000 < 0.02
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from app.extensions.extensions import db
+from app.models.user import User
+from app.services.auth_service import register_user, user_profile
+from app.services.token_epoch import bump_token_version
+from app.services.user_cache import get_cached_user, user_cache
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = {"value": 100.0}
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now["value"])
+    cache = TTLCache("test_ttl", maxsize=10, ttl=5)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now["value"] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_user_profile_served_from_cache(sqlite_app, capture_sql):
+    result = register_user(
+        SimpleNamespace(username="cached", email="c@example.com", password="x")
+    )
+    user_id = result["user_id"]
+    with capture_sql() as statements:
+        first = user_profile(str(user_id))
+        second = user_profile(user_id)
+
+    assert first == second
+    assert [s for s in statements if "FROM users" in s.sql] == statements[:1]
+
+
+def test_user_update_and_delete_invalidate_cache(sqlite_app):
+    result = register_user(
+        SimpleNamespace(username="cached", email="c@example.com", password="x")
+    )
+    user_id = result["user_id"]
+    assert get_cached_user(user_id).profile["username"] == "cached"
+
+    user = User.query.filter_by(user_id=user_id).first()
+    user.username = "renamed"
+    db.session.commit()
+    assert user_id not in user_cache._data
+    assert get_cached_user(user_id).profile["username"] == "renamed"
+
+    db.session.delete(user)
+    db.session.commit()
+    assert get_cached_user(user_id) is None
+
+
+def test_user_cache_invalidated_only_after_commit(sqlite_app):
+    result = register_user(
+        SimpleNamespace(username="cached", email="c@example.com", password="x")
+    )
+    user_id = result["user_id"]
+    get_cached_user(user_id)
+
+    user = User.query.filter_by(user_id=user_id).first()
+    user.username = "renamed"
+    db.session.flush()
+    # 尚未提交：条目保留，提交后才失效
+    assert user_id in user_cache._data
+    db.session.commit()
+    assert user_id not in user_cache._data
+
+
+def test_rolled_back_change_keeps_cache_and_drops_pending(sqlite_app):
+    result = register_user(
+        SimpleNamespace(username="cached", email="c@example.com", password="x")
+    )
+    user_id = result["user_id"]
+    get_cached_user(user_id)
+
+    user = User.query.filter_by(user_id=user_id).first()
+    user.username = "renamed"
+    db.session.flush()
+    db.session.rollback()
+    assert get_cached_user(user_id).profile["username"] == "cached"
+
+    # 回滚丢弃了待失效的 key，下一次提交不会误失效
+    db.session.commit()
+    assert user_id in user_cache._data
+
+
+def test_bulk_token_version_bump_invalidates_after_commit(sqlite_app):
+    result = register_user(
+        SimpleNamespace(username="cached", email="c@example.com", password="x")
+    )
+    user_id = result["user_id"]
+    cached = get_cached_user(user_id)
+
+    bump_token_version(cached.id, user_id)
+    assert user_id in user_cache._data
+    db.session.commit()
+    assert user_id not in user_cache._data
@@ -0,0 +1,84 @@
+import pytest
+from flask import Flask
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.extensions.db_pool_metrics import pool_status, setup_pool_metrics
+from app.extensions.extensions import db
+from app.extensions.prometheus_metrics import (
+    db_pool_checked_out,
+    db_pool_checkout_duration,
+    db_pool_idle,
+    db_pool_timeouts,
+)
+from app.extensions.system_checks import _check_sqlalchemy_pool_saturation
+
+
+@pytest.fixture
+def pool_app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'pool.sqlite'}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": 1,
+        "max_overflow": 1,
+        "pool_timeout": 0.05,
+    }
+    db.init_app(app)
+    setup_pool_metrics(app)
+    with app.app_context():
+        yield app
+        db.engine.dispose()
+
+
+def _gauge(metric):
+    return metric.labels(engine="default")._value.get()
+
+
+def _checkout_count():
+    for sample in db_pool_checkout_duration.collect()[0].samples:
+        if sample.name.endswith("_count") and sample.labels["engine"] == "default":
+            return sample.value
+    return 0
+
+
+def test_gauges_follow_checkout_and_checkin(pool_app):
+    before = _checkout_count()
+    first = db.engine.connect()
+    second = db.engine.connect()
+    assert _gauge(db_pool_checked_out) == 2
+    assert pool_status(db.engine.pool)["overflow"] == 1
+
+    second.close()
+    assert _gauge(db_pool_checked_out) == 1
+    first.close()
+    assert _gauge(db_pool_checked_out) == 0
+    assert _gauge(db_pool_idle) == 1
+    assert _checkout_count() == before + 2
+
+
+def test_pool_timeout_is_counted(pool_app):
+    before = _gauge(db_pool_timeouts)
+    conns = [db.engine.connect(), db.engine.connect()]
+    with pytest.raises(PoolTimeoutError):
+        db.engine.connect()
+    assert _gauge(db_pool_timeouts) == before + 1
+    for conn in conns:
+        conn.close()
+
+
+def test_instrumentation_survives_dispose(pool_app):
+    db.engine.dispose()
+    with db.engine.connect():
+        assert _gauge(db_pool_checked_out) == 1
+    assert _gauge(db_pool_checked_out) == 0
+
+
+def test_saturation_check_reports_live_usage(pool_app):
+    assert _check_sqlalchemy_pool_saturation().status == "pass"
+
+    conns = [db.engine.connect(), db.engine.connect()]
+    result = _check_sqlalchemy_pool_saturation()
+    assert result.status == "warn"
+    assert "checked_out=2" in result.detail
+    assert "saturation=100%" in result.detail
+    for conn in conns:
+        conn.close()
@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, g
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
+
+from app.exceptions.base import AuthorizationError
+from app.utils import jwt_cache, validators
+from app.utils.jwt_cache import current_jwt_claims, jwt_claims_cache
+from app.utils.validators import login_required
+
+
+@pytest.fixture
+def jwt_app(monkeypatch):
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["JWT_SECRET_KEY"] = "jwt-cache-test-secret-with-32-bytes!"
+    JWTManager(app)
+    monkeypatch.setattr(validators, "current_token_version", lambda _: 0)
+    return app
+
+
+def _count_verifications(monkeypatch):
+    calls = {"count": 0}
+    original = jwt_cache.verify_jwt_in_request
+
+    def counting_verify():
+        calls["count"] += 1
+        return original()
+
+    monkeypatch.setattr(jwt_cache, "verify_jwt_in_request", counting_verify)
+    return calls
+
+
+def _handler():
+    @login_required()
+    def handler():
+        return g.user_id
+
+    return handler
+
+
+def test_repeated_token_skips_verification(jwt_app, monkeypatch):
+    calls = _count_verifications(monkeypatch)
+    with jwt_app.app_context():
+        token = create_access_token(identity="42")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        with jwt_app.test_request_context("/", headers=headers):
+            assert _handler()() == "42"
+
+    assert calls["count"] == 1
+    assert len(jwt_claims_cache) == 1
+
+
+def test_expired_token_is_not_served_from_cache(jwt_app, monkeypatch):
+    calls = _count_verifications(monkeypatch)
+    with jwt_app.app_context():
+        token = create_access_token(identity="42", expires_delta=timedelta(seconds=30))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with jwt_app.test_request_context("/", headers=headers):
+        _handler()()
+
+    # 缓存条目过了 exp 后不再命中，回到完整验证
+    later = time.time() + 60
+    monkeypatch.setattr("app.utils.jwt_cache.time", SimpleNamespace(time=lambda: later))
+    with jwt_app.test_request_context("/", headers=headers):
+        _handler()()
+    assert calls["count"] == 2
+
+
+def test_refresh_token_is_never_cached(jwt_app):
+    with jwt_app.app_context():
+        token = create_refresh_token(identity="42")
+    headers = {"Authorization": f"Bearer {token}"}
+    with jwt_app.test_request_context("/", headers=headers):
+        with pytest.raises(AuthorizationError):
+            _handler()()
+    assert len(jwt_claims_cache) == 0
+
+
+def test_cached_token_still_checks_token_version(jwt_app, monkeypatch):
+    with jwt_app.app_context():
+        token = create_access_token(identity="42", additional_claims={"ver": 0})
+    headers = {"Authorization": f"Bearer {token}"}
+    with jwt_app.test_request_context("/", headers=headers):
+        _handler()()
+
+    monkeypatch.setattr(validators, "current_token_version", lambda _: 1)
+    with jwt_app.test_request_context("/", headers=headers):
+        with pytest.raises(AuthorizationError):
+            _handler()()
+
+
+def test_custom_header_type_is_cached(jwt_app, monkeypatch):
+    jwt_app.config["JWT_HEADER_NAME"] = "X-Auth"
+    jwt_app.config["JWT_HEADER_TYPE"] = "JWT"
+    calls = _count_verifications(monkeypatch)
+    with jwt_app.app_context():
+        token = create_access_token(identity="42")
+    headers = {"X-Auth": f"JWT {token}"}
+
+    for _ in range(2):
+        with jwt_app.test_request_context("/", headers=headers):
+            assert _handler()() == "42"
+    assert calls["count"] == 1
+
+
+def test_claims_are_scoped_to_the_request(jwt_app):
+    with jwt_app.app_context():
+        token = create_access_token(identity="42", additional_claims={"perm": 1})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with jwt_app.test_request_context("/", headers=headers):
+        _handler()()
+        claims = current_jwt_claims()
+        assert claims["perm"] == 1
+        claims["perm"] = 0
+
+    # 请求内修改的是副本，缓存命中仍拿到原值
+    with jwt_app.test_request_context("/", headers=headers):
+        _handler()()
+        assert current_jwt_claims()["perm"] == 1
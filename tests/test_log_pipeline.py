@@ -0,0 +1,127 @@
+import gzip
+import logging
+import multiprocessing
+import os
+from logging.handlers import RotatingFileHandler
+
+from app.extensions.prometheus_metrics import log_records_dropped
+from app.utils.log_pipeline import (
+    LogPipeline,
+    RoutingHandler,
+    compressor,
+    gzip_rotation,
+)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _record(name, msg, level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def test_full_queue_drops_and_counts():
+    pipeline = LogPipeline(_ListHandler, queue_size=1)
+    handler = pipeline.queue_handler()
+    before = log_records_dropped.labels(logger="drop_test")._value.get()
+
+    handler.handle(_record("drop_test", "first"))
+    handler.handle(_record("drop_test", "second"))
+
+    assert pipeline.queue.qsize() == 1
+    assert log_records_dropped.labels(logger="drop_test")._value.get() == before + 1
+
+
+def test_routing_handler_dispatches_by_logger_name():
+    access, default = _ListHandler(), _ListHandler()
+    router = RoutingHandler(routes={"access_logger": access}, default=default)
+
+    router.handle(_record("access_logger", "GET /health"))
+    router.handle(_record("app", "hello"))
+
+    assert access.messages == ["GET /health"]
+    assert default.messages == ["hello"]
+
+
+def test_rotated_files_are_gzipped(tmp_path):
+    path = tmp_path / "app.log"
+    handler = gzip_rotation(
+        RotatingFileHandler(path, maxBytes=64, backupCount=2, encoding="utf-8")
+    )
+    for idx in range(3):
+        handler.emit(_record("app", f"line-{idx}-" + "x" * 40))
+    handler.close()
+    compressor.join()
+
+    backup = tmp_path / "app.log.1.gz"
+    assert backup.exists()
+    assert not (tmp_path / "app.log.1").exists()
+    assert b"line-1" in gzip.decompress(backup.read_bytes())
+
+
+def _log_from_child(handler, pipeline):
+    logger = logging.getLogger("pipeline_child")
+    logger.propagate = False
+    logger.addHandler(handler)
+    for idx in range(3):
+        logger.warning("child-%d", idx)
+    # gunicorn worker 退出时由 atexit 调用
+    pipeline.stop()
+
+
+def _file_writer(path):
+    def writer():
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        return handler
+
+    return writer
+
+
+def test_shared_writer_collects_records_from_forked_workers(tmp_path):
+    path = tmp_path / "shared.log"
+    pipeline = LogPipeline(_file_writer(path), queue_size=100)
+    handler = pipeline.queue_handler()
+    pipeline.start_shared_writer()
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_log_from_child, args=(handler, pipeline)) for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+    pipeline.stop()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert sorted(lines) == sorted([f"child-{idx}" for idx in range(3)] * 2)
+
+
+def test_record_from_os_forked_child_arrives_after_parent_logged(tmp_path):
+    # 与 gunicorn 一致：主进程先写过日志，再用 os.fork 创建 worker
+    path = tmp_path / "shared.log"
+    pipeline = LogPipeline(_file_writer(path), queue_size=100)
+    handler = pipeline.queue_handler()
+    pipeline.start_shared_writer()
+    handler.handle(_record("master", "from-master"))
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            handler.handle(_record("worker", "from-worker"))
+            pipeline.stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    pipeline.stop()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert sorted(lines) == ["from-master", "from-worker"]
+    assert pipeline._server is None
@@ -0,0 +1,173 @@
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.exceptions.base import BusinessError
+from app.extensions.error_handle import error_log_throttle, register_error_handler
+from app.extensions.prometheus_metrics import business_errors
+from app.logger import error_logger
+from app.utils import log_throttle
+from app.utils.log_throttle import LogThrottle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=100.0)
+    monkeypatch.setattr(
+        log_throttle, "time", SimpleNamespace(monotonic=lambda: now.value)
+    )
+    return now
+
+
+def test_bucket_suppresses_then_reports_count(clock):
+    throttle = LogThrottle(rate=1.0, burst=2)
+    key = ("NotFoundError", 40401, "poster.detail")
+
+    assert throttle.hit(key) == (True, 0)
+    assert throttle.hit(key) == (True, 0)
+    assert throttle.hit(key).allowed is False
+    assert throttle.hit(key).allowed is False
+    # 其他 key 不受影响
+    assert throttle.hit(("HTTPException", 404, "unknown")) == (True, 0)
+
+    clock.value += 1
+    assert throttle.hit(key) == (True, 2)
+    assert throttle.hit(key) == (False, 1)
+
+
+def test_bucket_evicts_least_recently_used_keys(clock):
+    throttle = LogThrottle(rate=0.0, burst=1, max_keys=2)
+    throttle.hit("a")
+    throttle.hit("b")
+    throttle.hit("c")
+    # "a" 被淘汰后重新获得完整的桶
+    assert throttle.hit("a") == (True, 0)
+
+
+def test_evicted_key_reports_pending_suppressed_count(clock):
+    reported = []
+    throttle = LogThrottle(
+        rate=0.0,
+        burst=1,
+        max_keys=1,
+        on_suppressed=lambda key, count: reported.append((key, count)),
+    )
+    throttle.hit("a")
+    throttle.hit("a")
+    throttle.hit("a")
+    throttle.hit("b")
+    assert reported == [("a", 2)]
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def error_app():
+    app = Flask(__name__)
+    app.config["ERROR_LOG_BURST"] = 2
+    app.config["ERROR_LOG_RATE_PER_SECOND"] = 1.0
+
+    @app.route("/fail")
+    def fail():
+        raise BusinessError("重复提交", code=40901, http_code=409)
+
+    @app.route("/crash")
+    def crash():
+        raise RuntimeError("boom")
+
+    register_error_handler(app)
+    handler = _Collect()
+    error_logger.addHandler(handler)
+    previous_level = error_logger.level
+    error_logger.setLevel(logging.WARNING)
+    yield app, handler.messages
+    error_logger.setLevel(previous_level)
+    error_logger.removeHandler(handler)
+    error_log_throttle.configure(rate=1.0, burst=10)
+
+
+def test_error_logs_are_throttled_but_counted(error_app, clock):
+    app, messages = error_app
+    counter = business_errors.labels(error="BusinessError", code="40901")
+    before = counter._value.get()
+
+    client = app.test_client()
+    for _ in range(5):
+        assert client.get("/fail").status_code == 409
+
+    assert counter._value.get() == before + 5
+    assert messages == ["业务错误: 重复提交", "业务错误: 重复提交"]
+
+    clock.value += 1
+    client.get("/fail")
+    assert messages[-1] == "业务错误: 重复提交 (3 similar suppressed)"
+
+
+def test_idle_key_flushes_suppressed_count_without_next_error(error_app, clock):
+    app, messages = error_app
+    client = app.test_client()
+    for _ in range(5):
+        client.get("/fail")
+
+    # 未到一个回填周期时不输出
+    error_log_throttle.flush_idle()
+    assert len(messages) == 2
+
+    clock.value += 1
+    error_log_throttle.flush_idle()
+    assert messages[-1] == (
+        "BusinessError (code=40901, endpoint=fail): 3 similar suppressed"
+    )
+    error_log_throttle.flush_idle()
+    assert len(messages) == 3
+
+
+def test_unhandled_exceptions_are_never_throttled(error_app, clock):
+    app, messages = error_app
+    client = app.test_client()
+    for _ in range(5):
+        assert client.get("/crash").status_code == 500
+    assert messages == ["未处理的异常: boom"] * 5
+
+
+def test_configure_keeps_pending_suppressed_counts(clock):
+    reported = []
+    throttle = LogThrottle(
+        rate=1.0,
+        burst=1,
+        on_suppressed=lambda key, count: reported.append((key, count)),
+    )
+    throttle.hit("a")
+    throttle.hit("a")
+    throttle.configure(rate=2.0, burst=5)
+
+    clock.value += 1
+    throttle.flush_idle()
+    assert reported == [("a", 1)]
+
+
+def test_reset_stops_flush_thread_and_errors_go_to_stderr(capsys):
+    def broken(key, count):
+        raise RuntimeError("handler failed")
+
+    throttle = LogThrottle(rate=0.0, burst=1, on_suppressed=broken)
+    throttle.flush_interval = lambda: 0.01
+    throttle.hit("a")
+    throttle.hit("a")
+    stop = throttle._flusher_stop
+    time.sleep(0.1)
+    assert "handler failed" in capsys.readouterr().err
+
+    throttle.reset()
+    assert stop.is_set()
+    assert throttle._flusher_pid is None
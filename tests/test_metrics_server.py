@@ -0,0 +1,65 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.extensions import metrics_server
+from app.extensions.metrics_server import (
+    create_metrics_server,
+    exposition_cache,
+    serve_metrics,
+    start_metrics_server,
+)
+from app.utils.service_process import start_service, stop_service
+
+
+@pytest.fixture
+def server():
+    server = start_metrics_server("127.0.0.1:0", ttl=60)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    exposition_cache.configure(ttl=5.0)
+
+
+def test_serves_cached_exposition(server, monkeypatch):
+    calls = []
+
+    def fake_render():
+        calls.append(1)
+        return b"# HELP demo\n"
+
+    monkeypatch.setattr(metrics_server, "render_metrics", fake_render)
+    for _ in range(3):
+        with urllib.request.urlopen(f"{server}/metrics") as resp:
+            assert resp.status == 200
+            assert resp.read() == b"# HELP demo\n"
+            assert resp.headers["Content-Type"].startswith("text/plain")
+    assert len(calls) == 1
+
+
+def test_unknown_path_returns_404(server):
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        urllib.request.urlopen(f"{server}/health")
+    assert exc_info.value.code == 404
+
+
+def test_serves_from_separate_process():
+    server = create_metrics_server("127.0.0.1:0")
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    pid = start_service(serve_metrics, server)
+    # 父进程关闭自己的监听副本后，子进程仍在服务
+    server.server_close()
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            assert resp.status == 200
+    finally:
+        stop_service(pid)
+    with pytest.raises(urllib.error.URLError):
+        urllib.request.urlopen(url, timeout=1)
+
+
+def test_metrics_route_is_exempt_from_rate_limit(client):
+    # 默认限流为 50 次/小时
+    for _ in range(55):
+        assert client.get("/metrics").status_code == 200
@@ -0,0 +1,273 @@
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import pytest
+from flask import Flask
+
+from app.exceptions.base import ServiceUnavailableError
+from app.extensions.extensions import bcrypt
+from app.extensions.password_hasher import (
+    PasswordHasher,
+    RemoteHashExecutor,
+    get_hash_cost,
+    start_hash_pool,
+    stop_hash_pool,
+)
+
+
+def _sleep_hash(seconds):
+    time.sleep(seconds)
+    return "hash"
+
+
+def _make_app(**config):
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+    app.config.update(config)
+    bcrypt.init_app(app)
+    return app
+
+
+def test_inline_hash_is_compatible_with_flask_bcrypt():
+    app = _make_app()
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    with app.app_context():
+        pw_hash = hasher.generate_password_hash("Strong123A")
+        assert bcrypt.check_password_hash(pw_hash, "Strong123A")
+        assert hasher.check_password_hash(pw_hash, "Strong123A")
+        assert not hasher.check_password_hash(pw_hash, "wrong")
+
+
+def test_process_pool_hash_roundtrip():
+    app = _make_app(
+        PASSWORD_HASH_MAX_CONCURRENCY=1,
+        PASSWORD_HASH_USE_PROCESS_POOL=True,
+    )
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    try:
+        with app.app_context():
+            pw_hash = hasher.generate_password_hash("Strong123A")
+            assert hasher.check_password_hash(pw_hash, "Strong123A")
+    finally:
+        hasher.shutdown()
+
+
+def test_saturated_executor_fast_fails_with_503():
+    app = _make_app(PASSWORD_HASH_MAX_CONCURRENCY=1)
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_hash(password, rounds):
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    worker = threading.Thread(target=hasher._run, args=("generate", slow_hash, "x", 4))
+    worker.start()
+    started.wait(5)
+    try:
+        with app.app_context():
+            with pytest.raises(ServiceUnavailableError) as exc:
+                hasher.generate_password_hash("Strong123A")
+        assert exc.value.http_code == 503
+    finally:
+        release.set()
+        worker.join()
+
+    with app.app_context():
+        assert hasher.generate_password_hash("Strong123A")
+
+
+def test_more_callers_than_slots_get_503():
+    hasher = PasswordHasher()
+    hasher.init_app(_make_app(PASSWORD_HASH_MAX_CONCURRENCY=2))
+
+    release = threading.Event()
+    results = []
+
+    def slow_hash():
+        release.wait(5)
+        return "hash"
+
+    def call():
+        try:
+            results.append(hasher._run("generate", slow_hash))
+        except ServiceUnavailableError as e:
+            results.append(e.http_code)
+
+    callers = [threading.Thread(target=call) for _ in range(5)]
+    for caller in callers:
+        caller.start()
+    # 两个调用占住名额，其余三个立即被拒绝
+    deadline = time.monotonic() + 5
+    while len(results) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for caller in callers:
+        caller.join()
+    assert sorted(results, key=str) == [503, 503, 503, "hash", "hash"]
+
+
+def test_timed_out_hash_keeps_its_slot_until_done():
+    app = _make_app(
+        PASSWORD_HASH_MAX_CONCURRENCY=1,
+        PASSWORD_HASH_USE_PROCESS_POOL=True,
+        PASSWORD_HASH_TIMEOUT=0.2,
+    )
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    try:
+        with pytest.raises(ServiceUnavailableError):
+            hasher._run("generate", _sleep_hash, 1.0)
+        # 超时的哈希仍在执行，名额没有归还
+        with pytest.raises(ServiceUnavailableError):
+            hasher._run("generate", _sleep_hash, 0)
+        time.sleep(1.2)
+        assert hasher._run("generate", _sleep_hash, 0) == "hash"
+    finally:
+        hasher.shutdown()
+
+
+def test_shared_hash_pool_roundtrip():
+    app = _make_app(
+        PASSWORD_HASH_MAX_CONCURRENCY=1, PASSWORD_HASH_USE_PROCESS_POOL=True
+    )
+    authkey = b"test-authkey"
+    listener, supervisor = start_hash_pool(1, authkey)
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    hasher.use_shared_pool(threading.BoundedSemaphore(1), listener.address, authkey, 1)
+    try:
+        with app.app_context():
+            pw_hash = hasher.generate_password_hash("Strong123A")
+            assert bcrypt.check_password_hash(pw_hash, "Strong123A")
+            assert hasher.check_password_hash(pw_hash, "Strong123A")
+            assert not hasher.check_password_hash(pw_hash, "wrong")
+    finally:
+        hasher.shutdown()
+        stop_hash_pool(listener, supervisor)
+
+
+def _hash_processes(supervisor, exclude=(), timeout=5):
+    """等待监督进程启动哈希进程（排除 exclude 中的 pid），返回子进程 pid 列表"""
+    deadline = time.monotonic() + timeout
+    while True:
+        with open(f"/proc/{supervisor}/task/{supervisor}/children") as f:
+            pids = [int(pid) for pid in f.read().split()]
+        if (pids and not set(pids) & set(exclude)) or time.monotonic() > deadline:
+            return pids
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def hash_pool():
+    authkey = b"test-authkey"
+    listener, supervisor = start_hash_pool(1, authkey)
+    executor = RemoteHashExecutor(listener.address, authkey, 2, timeout=5)
+    yield listener, supervisor, executor
+    executor.shutdown()
+    stop_hash_pool(listener, supervisor)
+
+
+def test_hash_process_survives_broken_clients(hash_pool):
+    listener, supervisor, executor = hash_pool
+    assert executor.submit(_sleep_hash, 0).result(timeout=5) == "hash"
+    (hash_pid,) = _hash_processes(supervisor)
+
+    # 握手中途断开
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(listener.address)
+    # 认证失败
+    with pytest.raises(AuthenticationError):
+        Client(listener.address, authkey=b"wrong-authkey")
+    # 发出任务后不等结果就断开，结果发送失败
+    with Client(listener.address, authkey=b"test-authkey") as conn:
+        conn.send((_sleep_hash, (0.2,)))
+
+    assert executor.submit(_sleep_hash, 0).result(timeout=5) == "hash"
+    assert _hash_processes(supervisor) == [hash_pid]
+
+
+def test_dead_hash_process_is_restarted(hash_pool):
+    listener, supervisor, executor = hash_pool
+    (hash_pid,) = _hash_processes(supervisor)
+    os.kill(hash_pid, signal.SIGKILL)
+
+    pids = _hash_processes(supervisor, exclude=[hash_pid])
+    assert len(pids) == 1 and pids != [hash_pid]
+    assert executor.submit(_sleep_hash, 0).result(timeout=5) == "hash"
+
+
+def test_hung_hash_raises_timeout_and_releases_slot(hash_pool):
+    app = _make_app(
+        PASSWORD_HASH_MAX_CONCURRENCY=1,
+        PASSWORD_HASH_USE_PROCESS_POOL=True,
+        PASSWORD_HASH_TIMEOUT=5,
+    )
+    listener, supervisor, _ = hash_pool
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    hasher.use_shared_pool(
+        threading.BoundedSemaphore(1), listener.address, b"test-authkey", 1
+    )
+    hasher._executor.timeout = 0.2
+    try:
+        with pytest.raises(ServiceUnavailableError):
+            hasher._run("generate", _sleep_hash, 1.0)
+        # worker 侧的等待已结束，名额已归还
+        assert hasher._slots.acquire(False)
+        hasher._slots.release()
+    finally:
+        hasher.shutdown()
+
+
+def test_unresponsive_pool_fails_connect_within_timeout():
+    # 没有进程 accept 的 listener：连接进入 backlog，认证握手读不到数据
+    listener = Listener(family="AF_UNIX", authkey=b"test-authkey")
+    executor = RemoteHashExecutor(
+        listener.address, b"test-authkey", 1, connect_timeout=0.2
+    )
+    try:
+        start = time.monotonic()
+        with pytest.raises(OSError):
+            executor.submit(_sleep_hash, 0).result(timeout=5)
+        assert time.monotonic() - start < 2
+    finally:
+        executor.shutdown()
+        listener.close()
+
+
+def test_get_hash_cost_parses_bcrypt_hash():
+    assert get_hash_cost("$2b$12$abcdefghijklmnopqrstuv") == 12
+    assert get_hash_cost(b"$2b$04$abcdefghijklmnopqrstuv") == 4
+    assert get_hash_cost("plain") is None
+
+
+def test_bcrypt_calibrate_cli_recommends_rounds(runner):
+    result = runner.invoke(
+        args=[
+            "bcrypt-calibrate",
+            "--target-ms",
+            "100000",
+            "--min-rounds",
+            "4",
+            "--max-rounds",
+            "5",
+            "--samples",
+            "1",
+        ]
+    )
+    assert result.exit_code == 0
+    assert "rounds=4" in result.output
+    assert "recommended BCRYPT_LOG_ROUNDS=5" in result.output
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import decode_token
+
+from app.extensions.extensions import db
+from app.models.user import Permission, Role, User
+from app.services.auth_service import register_user, user_login
+from app.services.permission_service import (
+    PERMISSION_CLAIM,
+    has_permission,
+    permission_bitset_for_user,
+    permission_cache,
+)
+
+
+@pytest.fixture(scope="function")
+def rbac_app(sqlite_app):
+    read = Permission(code="poster:read")
+    write = Permission(code="poster:write")
+    admin = Permission(code="user:admin")
+    db.session.add_all(
+        [
+            Role(name="reader", permissions=[read]),
+            Role(name="editor", permissions=[read, write]),
+            admin,
+        ]
+    )
+    db.session.commit()
+    return sqlite_app
+
+
+def _user_with_roles(*role_names):
+    register_user(
+        SimpleNamespace(
+            username="rbac", email="rbac@example.com", password="Strong123A"
+        )
+    )
+    user = User.query.filter_by(username="rbac").first()
+    user.roles = Role.query.filter(Role.name.in_(role_names)).all()
+    db.session.commit()
+    return user
+
+
+def test_login_embeds_permission_bitset(rbac_app):
+    _user_with_roles("editor")
+    result = user_login("rbac@example.com", None, "Strong123A")
+    claims = decode_token(result["token"])
+
+    assert has_permission(claims[PERMISSION_CLAIM], "poster:read")
+    assert has_permission(claims[PERMISSION_CLAIM], "poster:write")
+    assert not has_permission(claims[PERMISSION_CLAIM], "user:admin")
+    assert not has_permission(claims[PERMISSION_CLAIM], "unknown")
+
+
+def test_permission_check_needs_no_queries_once_cached(rbac_app, capture_sql):
+    user = _user_with_roles("reader")
+    bitset = permission_bitset_for_user(user.id)
+
+    with capture_sql() as statements:
+        assert has_permission(bitset, "poster:read")
+        assert not has_permission(bitset, "poster:write")
+    assert statements == []
+
+
+def test_role_change_invalidates_permission_table(rbac_app):
+    user = _user_with_roles("reader")
+    assert not has_permission(permission_bitset_for_user(user.id), "user:admin")
+
+    role = Role.query.filter_by(name="reader").first()
+    role.permissions.append(Permission.query.filter_by(code="user:admin").first())
+    db.session.commit()
+
+    assert has_permission(permission_bitset_for_user(user.id), "user:admin")
+
+
+def test_permission_table_cleared_only_after_commit(rbac_app):
+    user = _user_with_roles("reader")
+    permission_bitset_for_user(user.id)
+
+    role = Role.query.filter_by(name="reader").first()
+    role.permissions.append(Permission.query.filter_by(code="user:admin").first())
+    db.session.flush()
+    assert permission_cache.get("table") is not None
+    db.session.rollback()
+    assert permission_cache.get("table") is not None
+
+    role = Role.query.filter_by(name="reader").first()
+    role.name = "viewer"
+    db.session.commit()
+    assert permission_cache.get("table") is None
@@ -74,3 +74,24 @@ def test_public_message_list_only_returns_published(client, app, db_init):
     assert resp.status_code == 200
     assert resp.json["data"]["total"] >= 1
     assert all(item["status"] == 256 for item in resp.json["data"]["list"])
+
+
+def test_public_message_list_cursor_mode(client, app, db_init):
+    headers = _auth_headers(app, username="cursor_user", email="cursor@example.com")
+    for idx in range(3):
+        client.post(
+            "/poster/add",
+            json={"title": f"pub{idx:02d}xx", "content": "public", "status": 256},
+            headers=headers,
+        )
+
+    first = client.get("/message?cursor=&page_size=2")
+    assert first.status_code == 200
+    assert len(first.json["data"]["list"]) == 2
+    next_cursor = first.json["data"]["next_cursor"]
+    assert next_cursor
+
+    second = client.get(f"/message?cursor={next_cursor}&page_size=2")
+    assert second.status_code == 200
+    assert len(second.json["data"]["list"]) == 1
+    assert second.json["data"]["next_cursor"] is None
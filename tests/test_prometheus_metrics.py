@@ -0,0 +1,60 @@
+from flask import Flask, Response
+
+from app.extensions.prometheus_metrics import response_size
+from app.extensions.request_middleware import setup_request_middleware
+
+
+def _size_sample(endpoint, suffix):
+    for sample in response_size.collect()[0].samples:
+        if sample.name.endswith(suffix) and sample.labels["endpoint"] == endpoint:
+            return sample.value
+    return 0
+
+
+def _make_app(produced):
+    app = Flask(__name__)
+
+    @app.route("/stream")
+    def stream():
+        def generate():
+            for chunk in (b"a" * 10, b"b" * 20, "中"):
+                produced.append(chunk)
+                yield chunk
+
+        return Response(generate(), mimetype="text/plain")
+
+    @app.route("/plain")
+    def plain():
+        return "hello"
+
+    setup_request_middleware(app)
+    return app
+
+
+def test_streamed_response_stays_lazy_and_is_measured_on_close():
+    produced = []
+    client = _make_app(produced).test_client()
+    count_before = _size_sample("stream", "_count")
+    sum_before = _size_sample("stream", "_sum")
+
+    resp = client.get("/stream", buffered=False)
+    # after_request 已执行，但生成器没有被整体读入内存
+    # （测试客户端只预取第一块来触发 start_response）
+    assert len(produced) <= 1
+    assert _size_sample("stream", "_count") == count_before
+
+    body = b"".join(resp.response)
+    resp.close()
+    assert len(produced) == 3
+    assert body == b"a" * 10 + b"b" * 20 + "中".encode()
+    assert _size_sample("stream", "_count") == count_before + 1
+    assert _size_sample("stream", "_sum") == sum_before + len(body)
+
+
+def test_sized_response_uses_content_length():
+    client = _make_app([]).test_client()
+    sum_before = _size_sample("plain", "_sum")
+    resp = client.get("/plain")
+    assert resp.data == b"hello"
+    resp.close()
+    assert _size_sample("plain", "_sum") == sum_before + 5
@@ -0,0 +1,63 @@
+"""
+Prometheus 多进程模式聚合
+每个 worker 用独立子进程模拟（multiprocess 模式在导入 prometheus_client 时决定）
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import os
+from app.extensions.prometheus_metrics import active_requests, request_count
+
+request_count.labels(method="GET", endpoint="health.health", status=200).inc()
+active_requests.inc()
+print(os.getpid())
+"""
+
+SCRAPE = """
+import sys
+from prometheus_client import multiprocess
+from app.extensions.prometheus_metrics import render_metrics
+
+for pid in sys.argv[1:]:
+    multiprocess.mark_process_dead(int(pid))
+sys.stdout.write(render_metrics().decode())
+"""
+
+
+def _run(code, env, *args):
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        env=env,
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout
+
+
+def _sample(exposition, prefix):
+    for line in exposition.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_scrape_aggregates_all_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    first_pid = _run(WORKER, env).strip()
+    _run(WORKER, env)
+
+    exposition = _run(SCRAPE, env)
+    assert _sample(exposition, "flask_requests_total{") == 2
+    assert _sample(exposition, "flask_active_requests ") == 2
+
+    # child_exit 标记退出的 worker 后，livesum gauge 不再计入它，计数器保留
+    exposition = _run(SCRAPE, env, first_pid)
+    assert _sample(exposition, "flask_requests_total{") == 2
+    assert _sample(exposition, "flask_active_requests ") == 1
@@ -0,0 +1,135 @@
+"""
+写路径的 SQL 条数断言
+缓存预热后逐个端点统计实际发出的语句，防止提交后重载、先查后改等额外往返回归。
+"""
+
+from types import SimpleNamespace
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions.extensions import db
+from app.models.poster import Poster
+from app.models.user import User
+from app.services.auth_service import register_user
+
+
+def _register(app, username="count_user", email="count@example.com"):
+    with app.app_context():
+        register_user(
+            SimpleNamespace(username=username, email=email, password="StrongPass123")
+        )
+        user = User.query.filter_by(username=username).first()
+        token = create_access_token(identity=str(user.user_id))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _create_poster(client, headers, title="poster"):
+    resp = client.post(
+        "/poster/add",
+        json={"title": title, "content": "content", "status": 256},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    return resp.json["data"]["id"]
+
+
+def test_register_issues_single_insert(client, app, db_init, capture_sql):
+    # 预热 Bloom 过滤器
+    _register(app)
+
+    with capture_sql(app) as statements:
+        resp = client.post(
+            "/auth/register",
+            json={
+                "username": "count_user2",
+                "email": "count2@example.com",
+                "password": "StrongPass123",
+            },
+        )
+    assert resp.status_code == 200
+    assert resp.json["data"]["username"] == "count_user2"
+    assert [s.sql.split()[0] for s in statements] == ["INSERT"]
+
+
+def test_create_poster_issues_single_insert(client, app, db_init, capture_sql):
+    headers = _register(app)
+    _create_poster(client, headers, title="warmup")
+
+    with capture_sql(app) as statements:
+        _create_poster(client, headers)
+    assert [s.sql.split()[0] for s in statements] == ["INSERT"]
+
+
+def test_update_poster_issues_single_update(client, app, db_init, capture_sql):
+    headers = _register(app)
+    poster_id = _create_poster(client, headers)
+
+    with capture_sql(app) as statements:
+        resp = client.put(
+            f"/poster/{poster_id}", json={"title": "renamed"}, headers=headers
+        )
+    assert resp.status_code == 200
+    assert resp.json["data"]["title"] == "renamed"
+    assert resp.json["data"]["id"] == poster_id
+    assert [s.sql.split()[0] for s in statements] == ["UPDATE"]
+
+
+def test_update_poster_of_other_user_is_not_found(client, app, db_init, capture_sql):
+    owner = _register(app)
+    poster_id = _create_poster(client, owner)
+    other = _register(app, username="other_user", email="other@example.com")
+    _create_poster(client, other, title="warmup")
+
+    with capture_sql(app) as statements:
+        resp = client.put(
+            f"/poster/{poster_id}", json={"title": "renamed"}, headers=other
+        )
+    assert resp.status_code == 404
+    assert [s.sql.split()[0] for s in statements] == ["UPDATE"]
+    with app.app_context():
+        assert db.session.get(Poster, poster_id).title == "poster"
+
+
+def test_delete_poster_issues_single_delete(client, app, db_init, capture_sql):
+    headers = _register(app)
+    poster_id = _create_poster(client, headers)
+
+    with capture_sql(app) as statements:
+        resp = client.delete(f"/poster/{poster_id}", headers=headers)
+    assert resp.status_code == 200
+    assert [s.sql.split()[0] for s in statements] == ["DELETE"]
+
+    with capture_sql(app) as statements:
+        resp = client.delete(f"/poster/{poster_id}", headers=headers)
+    assert resp.status_code == 404
+    assert [s.sql.split()[0] for s in statements] == ["DELETE"]
+
+
+def test_login_does_not_reload_user_after_commit(client, app, db_init, capture_sql):
+    _register(app)
+
+    with capture_sql(app) as statements:
+        resp = client.post(
+            "/auth/login",
+            json={"username": "count_user", "password": "StrongPass123"},
+        )
+    assert resp.status_code == 200
+    assert resp.json["data"]["username"] == "count_user"
+    # 最后一条是 refresh 会话的 INSERT，提交后不再有 SELECT users
+    assert statements[-1].sql.split()[0] == "INSERT"
+    assert sum(1 for s in statements if "FROM users" in s.sql) == 1
+
+
+def test_update_poster_without_returning_falls_back_to_projection(
+    client, app, db_init, monkeypatch, capture_sql
+):
+    monkeypatch.setattr("app.services.poster.supports_update_returning", lambda: False)
+    headers = _register(app)
+    poster_id = _create_poster(client, headers)
+
+    with capture_sql(app) as statements:
+        resp = client.put(f"/poster/{poster_id}", json={"status": 4}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json["data"]["status"] == 4
+    assert [s.sql.split()[0] for s in statements] == ["UPDATE", "SELECT"]
+    assert "content" not in statements[1].sql
@@ -0,0 +1,131 @@
+"""
+热点查询执行计划与列投影断言
+捕获 app/services 中实际发出的 SELECT，逐条 EXPLAIN QUERY PLAN，
+任何对 posters 的 SCAN（包括按覆盖索引整表扫描）或未使用预期索引的查询都会让测试失败。
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import text
+
+from app.extensions.extensions import db
+from app.models.poster import Poster
+from app.models.user import User
+from app.services.message_service import list_messages
+from app.services.poster import get_poster_detail, search_poster
+
+
+@pytest.fixture(scope="function")
+def plan_app(sqlite_app):
+    # 多用户数据，让 ANALYZE 统计出 user_id 的真实选择性
+    for uid in range(20):
+        user = User(
+            username=f"plan{uid}", email=f"plan{uid}@example.com", user_id=uid + 1
+        )
+        db.session.add(user)
+        db.session.flush()
+        for idx in range(20):
+            db.session.add(
+                Poster(
+                    title=f"title-{idx}",
+                    content="content",
+                    status=256 if idx % 2 else 4,
+                    user_id=user.id,
+                )
+            )
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+    return sqlite_app
+
+
+def _poster_selects(statements):
+    return [
+        s
+        for s in statements
+        if s.sql.lstrip().upper().startswith("SELECT") and "posters" in s.sql
+    ]
+
+
+def _assert_uses_index(statements, index):
+    """每条 posters 查询都必须是 SEARCH，且走 index（索引名或 INTEGER PRIMARY KEY）"""
+    statements = _poster_selects(statements)
+    assert statements, "未捕获到 posters 查询"
+    connection = db.session.connection().connection.driver_connection
+    for statement, parameters in statements:
+        plan = connection.execute(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+        details = [row[-1] for row in plan]
+        for detail in details:
+            if "posters" in detail:
+                assert detail.startswith(
+                    "SEARCH"
+                ), f"全表扫描: {detail}\nSQL: {statement}"
+                assert index in detail, f"未使用 {index}: {detail}\nSQL: {statement}"
+
+
+def _login_as(app):
+    user = User.query.filter_by(username="plan0").first()
+    g.user_id = user.user_id
+
+
+def test_list_messages_page_mode_uses_index(plan_app, capture_sql):
+    with capture_sql() as statements:
+        list_messages(page=2, page_size=10)
+    _assert_uses_index(statements, "ix_posters_status_id")
+
+
+def test_list_messages_cursor_mode_uses_index(plan_app, capture_sql):
+    first = list_messages(page_size=10, cursor="")
+    with capture_sql() as statements:
+        list_messages(page_size=10, cursor=first["next_cursor"])
+    _assert_uses_index(statements, "ix_posters_status_id")
+
+
+@pytest.mark.parametrize("status", [None, 256])
+def test_search_poster_uses_index(plan_app, status, capture_sql):
+    with plan_app.test_request_context("/poster/list"):
+        _login_as(plan_app)
+        with capture_sql() as statements:
+            search_poster(page=1, page_size=10, status=status)
+            search_poster(page_size=10, status=status, cursor="")
+    _assert_uses_index(statements, "ix_posters_user_id_status_id")
+
+
+def test_get_poster_detail_uses_index(plan_app, capture_sql):
+    user = User.query.filter_by(username="plan0").first()
+    poster_id = Poster.query.filter_by(user_id=user.id).first().id
+    with plan_app.test_request_context(f"/poster/{poster_id}"):
+        _login_as(plan_app)
+        with capture_sql() as statements:
+            get_poster_detail(poster_id)
+    _assert_uses_index(statements, "INTEGER PRIMARY KEY")
+
+
+def _assert_content_not_selected(statements):
+    statements = _poster_selects(statements)
+    assert statements, "未捕获到 posters 查询"
+    for statement, _ in statements:
+        # paginate 的 COUNT(*) 子查询不返回行，数据库会裁剪未使用的列
+        if statement.startswith("SELECT count(*)"):
+            continue
+        assert "posters.content" not in statement, statement
+
+
+def test_list_messages_does_not_load_content(plan_app, capture_sql):
+    with capture_sql() as statements:
+        list_messages(page=1, page_size=10)
+        list_messages(page_size=10, cursor="")
+    _assert_content_not_selected(statements)
+
+
+def test_search_poster_does_not_load_content(plan_app, capture_sql):
+    with plan_app.test_request_context("/poster/list"):
+        _login_as(plan_app)
+        with capture_sql() as statements:
+            result = search_poster(page=1, page_size=10)
+            search_poster(page_size=10, cursor="")
+    _assert_content_not_selected(statements)
+    assert result["list"] and "title" in result["list"][0]
@@ -0,0 +1,206 @@
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+from flask_limiter.util import get_remote_address
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from prometheus_client import REGISTRY
+
+from app.extensions.rate_limit_storage import SQLiteCounterStore, TieredStorage
+from app.extensions.rate_limiting import MeteredLimiter
+from app.extensions.request_middleware import setup_request_middleware
+
+
+@pytest.fixture
+def make_storage(tmp_path):
+    """同一个 SQLite 文件上的多个存储实例，模拟多个 worker"""
+    storages = []
+
+    def _make(**options):
+        options.setdefault("sync_interval", 3600)  # 测试中手动 flush
+        storage = storage_from_string(
+            f"tiered+sqlite:///{tmp_path / 'ratelimit.db'}", **options
+        )
+        storages.append(storage)
+        return storage
+
+    yield _make
+    for storage in storages:
+        storage.close()
+
+
+def test_store_accumulates_and_restarts_expired_keys(tmp_path):
+    path = str(tmp_path / "counters.db")
+    first, second = SQLiteCounterStore(path), SQLiteCounterStore(path)
+
+    assert first.sync({"k": (3, 200.0)}, (), now=100.0) == {"k": (3, 200.0)}
+    assert second.sync({"k": (2, 250.0)}, (), now=110.0) == {"k": (5, 200.0)}
+    # 过期后以新的增量和过期时间重新计数
+    assert first.sync({"k": (1, 400.0)}, (), now=300.0) == {"k": (1, 400.0)}
+    assert second.sync({}, ("k", "missing"), now=301.0) == {"k": (1, 400.0)}
+
+
+def test_storage_scheme_is_registered(make_storage):
+    storage = make_storage()
+    assert isinstance(storage, TieredStorage)
+    assert storage.check()
+
+
+def test_zero_tolerance_is_exact_across_workers(make_storage):
+    workers = [make_storage(over_admission=0), make_storage(over_admission=0)]
+    limiters = [SlidingWindowCounterRateLimiter(s) for s in workers]
+    item = parse("10 per minute")
+
+    allowed = sum(limiters[i % 2].hit(item, "client") for i in range(30))
+    assert allowed == 10
+
+
+def test_over_admission_is_bounded_by_tolerance(make_storage):
+    workers = [make_storage(over_admission=0.2) for _ in range(2)]
+    limiters = [SlidingWindowCounterRateLimiter(s) for s in workers]
+    item = parse("10 per minute")
+
+    allowed = sum(limiters[i % 2].hit(item, "client") for i in range(40))
+    # 每个 worker 最多先行放行 floor(10 * 0.2) 次未同步的命中
+    assert 10 <= allowed <= 10 + 2 * 2
+
+    for storage in workers:
+        storage.flush()
+    for limiter in limiters:
+        assert limiter.get_window_stats(item, "client").remaining == 0
+
+
+def test_local_hits_are_batched_until_flush(make_storage):
+    worker, other = make_storage(over_admission=0.5), make_storage()
+    limiter = SlidingWindowCounterRateLimiter(worker)
+    item = parse("10 per minute")
+
+    for _ in range(3):
+        assert limiter.hit(item, "client")
+    observer = SlidingWindowCounterRateLimiter(other)
+    assert observer.get_window_stats(item, "client").remaining == 10
+
+    worker.flush()
+    other.flush()
+    assert observer.get_window_stats(item, "client").remaining == 7
+
+
+def _global_hits(storage, item, identifier):
+    key, expiry = item.key_for(identifier), item.get_expiry()
+    # 先读一次，让 flush 取回这两个窗口的全局计数
+    storage.get_sliding_window(key, expiry)
+    storage.flush()
+    previous, _, current, _ = storage.get_sliding_window(key, expiry)
+    return previous + current
+
+
+def test_failed_revert_keeps_the_429_and_retries_later(make_storage):
+    worker, other = make_storage(over_admission=0), make_storage(over_admission=0)
+    limiter = SlidingWindowCounterRateLimiter(worker)
+    item = parse("1 per minute")
+    # 另一个 worker 用完限额，本 worker 的本地视图仍是 0，需要按全局计数判断
+    assert SlidingWindowCounterRateLimiter(other).hit(item, "client")
+
+    real_sync = worker.store.sync
+
+    def failing_revert(deltas, keys, now):
+        if any(amount < 0 for amount, _ in deltas.values()):
+            raise sqlite3.OperationalError("database is locked")
+        return real_sync(deltas, keys, now)
+
+    worker.store.sync = failing_revert
+    assert limiter.hit(item, "client") is False
+    assert _global_hits(other, item, "client") == 2
+
+    # 撤回留在本地，存储恢复后同步出去，被拒绝的命中不计入全局计数
+    worker.store.sync = real_sync
+    worker.flush()
+    assert _global_hits(other, item, "client") == 1
+
+
+def test_close_flushes_pending_hits_and_tolerates_store_errors(make_storage):
+    worker, other = make_storage(over_admission=0.5), make_storage()
+    limiter = SlidingWindowCounterRateLimiter(worker)
+    item = parse("10 per minute")
+    for _ in range(3):
+        assert limiter.hit(item, "client")
+
+    worker.close()
+    assert _global_hits(other, item, "client") == 3
+
+    broken = make_storage(over_admission=0.5)
+    assert SlidingWindowCounterRateLimiter(broken).hit(item, "client")
+
+    def unavailable(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    broken.store.sync = unavailable
+    broken.close()
+
+
+def _decisions(result, scope="limited"):
+    return (
+        REGISTRY.get_sample_value(
+            "rate_limit_decisions_total",
+            {"limit": "2 per 1 minute", "scope": scope, "result": result},
+        )
+        or 0
+    )
+
+
+def test_flask_limiter_with_tiered_storage_exports_decisions(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        RATELIMIT_STORAGE_URI=f"tiered+sqlite:///{tmp_path / 'ratelimit.db'}",
+        RATELIMIT_STRATEGY="sliding-window-counter",
+        RATELIMIT_STORAGE_OPTIONS={"sync_interval": 3600, "over_admission": 0},
+    )
+    limiter = MeteredLimiter(key_func=get_remote_address, default_limits=[])
+    limiter.init_app(app)
+    setup_request_middleware(app)
+
+    @app.route("/limited")
+    @limiter.limit("2 per minute")
+    def limited():
+        return "ok", 200
+
+    @app.route("/conditional")
+    @limiter.limit("2 per minute", deduct_when=lambda response: False)
+    def conditional():
+        return "ok", 200
+
+    allowed_before, blocked_before = _decisions("allowed"), _decisions("blocked")
+    conditional_before = _decisions("allowed", scope="conditional")
+    test_client = app.test_client()
+    statuses = []
+    for path in ["/limited"] * 3 + ["/conditional"]:
+        # 判断结果在响应结束时由请求中间件上报
+        resp = test_client.get(path)
+        statuses.append(resp.status_code)
+        resp.close()
+    limiter.storage.close()
+
+    assert statuses == [200, 200, 429, 200]
+    # 条件扣减的限额在判断时不扣减，不计入判断次数
+    assert _decisions("allowed", scope="conditional") == conditional_before
+    assert _decisions("allowed") - allowed_before == 2
+    assert _decisions("blocked") - blocked_before == 1
+
+
+def test_background_sync_propagates_hits(make_storage):
+    worker = make_storage(sync_interval=0.005, over_admission=0.5)
+    observer = make_storage(sync_interval=0.005)
+    limiter = SlidingWindowCounterRateLimiter(worker)
+    watcher = SlidingWindowCounterRateLimiter(observer)
+    item = parse("100 per minute")
+
+    for _ in range(5):
+        assert limiter.hit(item, "client")
+    deadline = time.monotonic() + 2
+    while watcher.get_window_stats(item, "client").remaining != 95:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions.extensions import db
+from app.models.user import Refresh, User
+from app.services.refresh_token_pruner import prune_refresh_tokens
+
+
+def _seed_tokens():
+    now = datetime.utcnow()
+    user = User(username="pruner", email="pruner@example.com", user_id=42)
+    db.session.add(user)
+    db.session.flush()
+    rows = {
+        "live": dict(is_revoked=False, expires_at=now + timedelta(days=10)),
+        "expired_recent": dict(is_revoked=False, expires_at=now - timedelta(hours=1)),
+        "expired_old": dict(is_revoked=False, expires_at=now - timedelta(days=3)),
+        "revoked_recent": dict(
+            is_revoked=True,
+            revoked_at=now - timedelta(hours=1),
+            expires_at=now + timedelta(days=10),
+        ),
+        "revoked_old": dict(
+            is_revoked=True,
+            revoked_at=now - timedelta(days=3),
+            expires_at=now + timedelta(days=10),
+        ),
+    }
+    for token, values in rows.items():
+        db.session.add(Refresh(user_id=user.id, token=token, **values))
+    db.session.commit()
+
+
+def test_prune_refresh_tokens_respects_grace_period(app, db_init):
+    with app.app_context():
+        _seed_tokens()
+        result = prune_refresh_tokens(grace=timedelta(days=1), throttle=0)
+        remaining = {r.token for r in Refresh.query.all()}
+
+    assert result["deleted"] == 2
+    assert remaining == {"live", "expired_recent", "revoked_recent"}
+
+
+def test_prune_refresh_tokens_deletes_in_bounded_batches(app, db_init):
+    with app.app_context():
+        _seed_tokens()
+        result = prune_refresh_tokens(
+            grace=timedelta(0), batch_size=1, throttle=0, max_batches=2
+        )
+        assert result["batches"] == 2
+        assert result["deleted"] == 2
+        assert Refresh.query.count() == 3
+
+
+def test_prune_refresh_tokens_cli(runner, app, db_init):
+    with app.app_context():
+        _seed_tokens()
+    result = runner.invoke(
+        args=["prune-refresh-tokens", "--grace-hours", "24", "--throttle-ms", "0"]
+    )
+    assert result.exit_code == 0
+    assert "deleted=2" in result.output
+
+
+def test_prune_counts_rows_actually_deleted(app, db_init):
+    """另一个清理者先删掉了选中的行时，不重复计数"""
+    with app.app_context():
+        _seed_tokens()
+        engine = db.engine
+        raced = []
+
+        def concurrent_delete(conn, cursor, statement, parameters, context, many):
+            if statement.startswith("DELETE FROM refresh_tokens") and not raced:
+                raced.append(True)
+                cursor.execute("DELETE FROM refresh_tokens WHERE token = 'expired_old'")
+
+        event.listen(engine, "before_cursor_execute", concurrent_delete)
+        try:
+            result = prune_refresh_tokens(grace=timedelta(days=1), throttle=0)
+        finally:
+            event.remove(engine, "before_cursor_execute", concurrent_delete)
+
+    assert raced
+    assert result["deleted"] == 1
@@ -0,0 +1,159 @@
+import io
+import logging
+
+import pytest
+from flask import Flask, send_file
+from werkzeug.test import EnvironBuilder
+from werkzeug.wsgi import FileWrapper
+
+from app.extensions.prometheus_metrics import active_requests
+from app.extensions.request_middleware import setup_request_middleware
+from app.extensions.request_tracking import get_request_id, set_request_user
+from app.logger import access_logger
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.access)
+
+
+@pytest.fixture
+def access_records():
+    handler = _Collect()
+    access_logger.addHandler(handler)
+    yield handler.records
+    access_logger.removeHandler(handler)
+
+
+@pytest.fixture
+def middleware_app():
+    app = Flask(__name__)
+
+    @app.route("/ok")
+    def ok():
+        return {"request_id": get_request_id()}
+
+    @app.route("/framed")
+    def framed():
+        return "x", 200, {"X-Frame-Options": "ALLOWALL"}
+
+    @app.route("/users/<int:user_pk>")
+    def user_detail(user_pk):
+        set_request_user("u-42")
+        return "user"
+
+    @app.route("/file")
+    def file():
+        return send_file(io.BytesIO(b"file-body"), mimetype="text/plain")
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    setup_request_middleware(app)
+    return app
+
+
+def test_adds_request_id_and_security_headers(middleware_app):
+    resp = middleware_app.test_client().get("/ok", headers={"X-Request-ID": "abc"})
+    resp.close()
+    assert resp.headers["X-Request-ID"] == "abc"
+    assert resp.json["request_id"] == "abc"
+    assert resp.headers["X-Content-Type-Options"] == "nosniff"
+    assert resp.headers["X-Response-Time"].endswith("s")
+    assert "Strict-Transport-Security" not in resp.headers
+
+
+def test_managed_headers_override_view_values(middleware_app):
+    resp = middleware_app.test_client().get("/framed")
+    resp.close()
+    assert resp.headers.getlist("X-Frame-Options") == ["SAMEORIGIN"]
+
+
+def test_hsts_only_in_production():
+    app = Flask(__name__)
+    app.config["ENV"] = "production"
+    app.add_url_rule("/", "index", lambda: "ok")
+    setup_request_middleware(app)
+    resp = app.test_client().get("/")
+    resp.close()
+    assert resp.headers["Strict-Transport-Security"].startswith("max-age=")
+
+
+def test_active_requests_released_on_close_and_on_error(middleware_app):
+    middleware_app.config["PROPAGATE_EXCEPTIONS"] = True
+    client = middleware_app.test_client()
+    before = active_requests._value.get()
+
+    resp = client.get("/ok")
+    assert active_requests._value.get() == before + 1
+    resp.close()
+    assert active_requests._value.get() == before
+
+    with pytest.raises(RuntimeError):
+        client.get("/boom")
+    assert active_requests._value.get() == before
+
+
+def test_access_record_is_structured(middleware_app, access_records):
+    client = middleware_app.test_client()
+    client.get("/users/7", headers={"X-Request-ID": "rid-7"}).close()
+
+    assert access_records == [
+        {
+            "method": "GET",
+            "route": "/users/<int:user_pk>",
+            "status": 200,
+            "duration_ms": access_records[0]["duration_ms"],
+            "bytes": 4,
+            "request_id": "rid-7",
+            "user_id": "u-42",
+        }
+    ]
+
+
+def test_sampling_keeps_errors_and_slow_requests(access_records):
+    app = Flask(__name__)
+    app.config["ACCESS_LOG_SAMPLE_RATE"] = 0.0
+    app.add_url_rule("/", "index", lambda: "ok")
+    setup_request_middleware(app)
+    client = app.test_client()
+
+    client.get("/").close()
+    assert access_records == []
+
+    client.get("/missing").close()
+    assert [r["status"] for r in access_records] == [404]
+    assert access_records[0]["route"] is None
+
+    app.wsgi_app.access_log_slow_seconds = 0
+    client.get("/").close()
+    assert [r["status"] for r in access_records] == [404, 200]
+
+
+def test_invalid_content_length_does_not_break_close(middleware_app, access_records):
+    client = middleware_app.test_client()
+    resp = client.get("/ok", environ_overrides={"CONTENT_LENGTH": "abc"})
+    resp.close()
+    assert access_records[-1]["status"] == 200
+
+
+def test_file_wrapper_response_is_passed_through(middleware_app, access_records):
+    before = active_requests._value.get()
+    environ = EnvironBuilder(path="/file").get_environ()
+    environ["wsgi.file_wrapper"] = FileWrapper
+
+    app_iter = middleware_app.wsgi_app(environ, lambda status, headers, exc=None: None)
+    # 原对象返回，服务器仍能识别为 file_wrapper 走 sendfile
+    assert isinstance(app_iter, FileWrapper)
+    assert b"".join(app_iter) == b"file-body"
+    assert active_requests._value.get() == before + 1
+    app_iter.close()
+    app_iter.close()
+    assert active_requests._value.get() == before
+    assert access_records[-1]["route"] == "/file"
+    assert access_records[-1]["bytes"] == len(b"file-body")
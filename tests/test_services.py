@@ -1,36 +1,28 @@
+import multiprocessing
+import threading
+import time
 from types import SimpleNamespace
 
 import pytest
 from flask import Flask, g
 from flask_jwt_extended import JWTManager
 
-from app.exceptions.base import BusinessError, ConflictError
+from app.exceptions.base import BusinessError, ConflictError, QueryError
 from app.extensions.extensions import bcrypt, db
 from app.models.poster import Poster
 from app.models.user import Refresh, User
 from app.services.auth_service import is_user, register_user, user_login, user_profile
 from app.services.auth_service import rotate_refresh_token, revoke_refresh_token
+from app.services.identity_filter import identity_filter
 from app.services.poster import create_poster, search_poster
+from app.services.token_epoch import current_token_version, token_epoch_board
+from app.utils.pagination import MAX_CURSOR_ID, decode_cursor, encode_cursor
 
 
 @pytest.fixture(scope="function")
-def service_app():
-    app = Flask(__name__)
-    app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["SECRET_KEY"] = "test-secret"
-    app.config["JWT_SECRET_KEY"] = "jwt-test-secret"
-
-    db.init_app(app)
-    bcrypt.init_app(app)
-    JWTManager(app)
-
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+def service_app(sqlite_app):
+    sqlite_app.config["SECRET_KEY"] = "test-secret"
+    return sqlite_app
 
 
 def _register_data(username="demo", email="demo@example.com", password="Strong123A"):
@@ -251,3 +243,258 @@ def test_search_poster_paginated(service_app):
             assert result["page_size"] == 2
             assert result["total"] == 3
             assert len(result["list"]) == 2
+
+
+def test_search_poster_cursor_mode_walks_all_pages(service_app):
+    with service_app.app_context():
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        for idx in range(5):
+            db.session.add(
+                Poster(
+                    title=f"title-{idx}",
+                    content="content",
+                    status=4,
+                    user_id=user.id,
+                )
+            )
+        db.session.commit()
+
+        with service_app.test_request_context("/poster/list", method="GET"):
+            g.user_id = user.user_id
+            first = search_poster(page_size=2, cursor="")
+            second = search_poster(page_size=2, cursor=first["next_cursor"])
+            third = search_poster(page_size=2, cursor=second["next_cursor"])
+
+        ids = [item["id"] for page in (first, second, third) for item in page["list"]]
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 5
+        assert "total" not in first
+        assert third["next_cursor"] is None
+
+
+def test_search_poster_rejects_invalid_cursor(service_app):
+    with service_app.app_context():
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        with service_app.test_request_context("/poster/list", method="GET"):
+            g.user_id = user.user_id
+            with pytest.raises(QueryError):
+                search_poster(page_size=2, cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("last_id", [0, MAX_CURSOR_ID + 1, 10**30])
+def test_decode_cursor_rejects_out_of_range_ids(last_id):
+    with pytest.raises(QueryError):
+        decode_cursor(encode_cursor(last_id))
+
+
+def test_out_of_range_cursor_is_a_query_error(service_app):
+    with service_app.app_context():
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        with service_app.test_request_context("/poster/list", method="GET"):
+            g.user_id = user.user_id
+            assert decode_cursor(encode_cursor(MAX_CURSOR_ID)) == MAX_CURSOR_ID
+            with pytest.raises(QueryError):
+                search_poster(page_size=2, cursor=encode_cursor(10**30))
+
+
+def test_user_login_rehashes_when_cost_changes(service_app):
+    with service_app.app_context():
+        service_app.config["BCRYPT_LOG_ROUNDS"] = 4
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        assert user.password.startswith("$2b$04$")
+
+        service_app.config["BCRYPT_LOG_ROUNDS"] = 5
+        user_login("demo@example.com", "demo", "Strong123A")
+        user = User.query.filter_by(username="demo").first()
+        assert user.password.startswith("$2b$05$")
+
+        user_login("demo@example.com", "demo", "Strong123A")
+
+
+def test_register_user_conflict_caught_by_unique_index_when_filter_misses(
+    service_app,
+):
+    with service_app.app_context():
+        identity_filter.build()
+        register_user(_register_data())
+        assert identity_filter.ready
+        # 模拟其他 worker 注册的用户：本进程过滤器中不存在
+        db.session.add(User(username="other", email="other@example.com", user_id=1))
+        db.session.commit()
+
+        with pytest.raises(ConflictError):
+            register_user(_register_data(username="other", email="x@example.com"))
+        assert User.query.filter_by(email="x@example.com").first() is None
+
+
+def test_identity_filter_builds_in_background_without_blocking(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'users.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username="taken", email="taken@example.com", user_id=1))
+        db.session.commit()
+
+        # 未就绪时直接回退到数据库查询，构建在后台线程进行
+        assert identity_filter.might_exist("taken", "taken@example.com")
+        assert identity_filter.build_in_background(app) is None
+    deadline = time.monotonic() + 5
+    while not identity_filter.ready:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    with app.app_context():
+        assert identity_filter.might_exist("taken", "new@example.com")
+        assert not identity_filter.might_exist("free", "free@example.com")
+        db.drop_all()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_rotate_refresh_token_with_and_without_returning(
+    service_app, monkeypatch, returning
+):
+    monkeypatch.setattr(
+        "app.services.auth_service.supports_update_returning", lambda: returning
+    )
+    with service_app.app_context():
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        login_data = user_login("demo@example.com", "demo", "Strong123A")
+        monkeypatch.setattr(
+            "app.services.auth_service.get_jwt_identity", lambda: str(user.user_id)
+        )
+
+        rotate_refresh_token(login_data["refresh"])
+        with pytest.raises(BusinessError) as exc:
+            rotate_refresh_token(login_data["refresh"])
+        assert exc.value.code == 40102
+
+
+def test_rotate_refresh_token_concurrent_exactly_one_wins(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'rotate.sqlite'}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    app.config["JWT_SECRET_KEY"] = "jwt-test-secret"
+    app.config["BCRYPT_LOG_ROUNDS"] = 4
+    db.init_app(app)
+    bcrypt.init_app(app)
+    JWTManager(app)
+
+    with app.app_context():
+        db.create_all()
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        login_data = user_login("demo@example.com", "demo", "Strong123A")
+        identity = str(user.user_id)
+        user_pk = user.id
+
+    monkeypatch.setattr("app.services.auth_service.get_jwt_identity", lambda: identity)
+
+    parallel = 8
+    barrier = threading.Barrier(parallel)
+    outcomes = []
+    lock = threading.Lock()
+
+    def worker():
+        with app.app_context():
+            barrier.wait()
+            try:
+                rotate_refresh_token(login_data["refresh"])
+                outcome = "ok"
+            except BusinessError as exc:
+                outcome = exc.code
+            finally:
+                db.session.remove()
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=worker) for _ in range(parallel)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        live = Refresh.query.filter_by(user_id=user_pk, is_revoked=False).count()
+        db.drop_all()
+
+    assert outcomes.count("ok") == 1
+    assert outcomes.count(40102) == parallel - 1
+    assert live == 1
+
+
+def test_user_login_evicts_oldest_sessions_over_cap(service_app):
+    service_app.config["REFRESH_SESSION_CAP"] = 2
+    with service_app.app_context():
+        register_user(_register_data())
+        for _ in range(3):
+            user_login("demo@example.com", "demo", "Strong123A")
+
+        records = Refresh.query.order_by(Refresh.id).all()
+        assert [r.is_revoked for r in records] == [True, False, False]
+        assert records[0].revoked_at is not None
+
+
+def test_user_login_same_device_replaces_previous_session(service_app):
+    with service_app.app_context():
+        register_user(_register_data())
+        user_login("demo@example.com", "demo", "Strong123A", device="phone")
+        user_login("demo@example.com", "demo", "Strong123A", device="laptop")
+        user_login("demo@example.com", "demo", "Strong123A", device="phone")
+
+        live = Refresh.query.filter_by(is_revoked=False).all()
+        assert sorted(r.device for r in live) == ["laptop", "phone"]
+        assert Refresh.query.filter_by(device="phone", is_revoked=True).count() == 1
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_rotated_session_keeps_device(service_app, monkeypatch, returning):
+    monkeypatch.setattr(
+        "app.services.auth_service.supports_update_returning", lambda: returning
+    )
+    with service_app.app_context():
+        register_user(_register_data())
+        user = User.query.filter_by(username="demo").first()
+        monkeypatch.setattr(
+            "app.services.auth_service.get_jwt_identity", lambda: str(user.user_id)
+        )
+        login_data = user_login(
+            "demo@example.com", "demo", "Strong123A", device="phone"
+        )
+        rotate_refresh_token(login_data["refresh"])
+        # 轮换后的会话仍属于 phone，再次从 phone 登录会替换它
+        user_login("demo@example.com", "demo", "Strong123A", device="phone")
+
+        live = Refresh.query.filter_by(is_revoked=False).all()
+        assert [r.device for r in live] == ["phone"]
+
+
+def test_token_version_bump_from_another_worker_is_seen_immediately(service_app):
+    shared = multiprocessing.Array("q", 64)
+    saved = token_epoch_board._slots, token_epoch_board._lock
+    token_epoch_board.use_shared(shared)
+    try:
+        with service_app.app_context():
+            register_user(_register_data())
+            user = User.query.filter_by(username="demo").first()
+            assert current_token_version(user.user_id) == 0
+
+            # 模拟其他 worker 提交了 logout-all：数据库已更新，本 worker 缓存仍是旧值
+            user.token_version = 1
+            db.session.commit()
+            assert current_token_version(user.user_id) == 0
+
+            other_worker = multiprocessing.get_context("fork").Process(
+                target=token_epoch_board.bump, args=(user.user_id,)
+            )
+            other_worker.start()
+            other_worker.join(5)
+            assert current_token_version(user.user_id) == 1
+    finally:
+        token_epoch_board._slots, token_epoch_board._lock = saved
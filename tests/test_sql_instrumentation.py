@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+from flask import Flask, jsonify, request
+from sqlalchemy import text
+
+from app.extensions.extensions import db
+from app.extensions.prometheus_metrics import db_n_plus_one_suspected
+from app.extensions.request_tracking import REQUEST_ID_ENVIRON_KEY
+from app.extensions.sql_instrumentation import get_sql_stats, setup_sql_instrumentation
+
+
+@pytest.fixture
+def sql_app():
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQL_SLOW_QUERY_MS"] = 10_000
+    app.config["SQL_N_PLUS_ONE_THRESHOLD"] = 3
+    db.init_app(app)
+    setup_sql_instrumentation(app)
+
+    @app.route("/queries/<int:n>")
+    def queries(n):
+        request.environ[REQUEST_ID_ENVIRON_KEY] = "req-1"
+        for idx in range(n):
+            db.session.execute(text("SELECT :idx"), {"idx": idx})
+        stats = get_sql_stats()
+        return jsonify(count=stats.count if stats else 0)
+
+    return app
+
+
+def _n_plus_one_total(endpoint):
+    return db_n_plus_one_suspected.labels(endpoint=endpoint)._value.get()
+
+
+def test_counts_queries_per_request(sql_app):
+    client = sql_app.test_client()
+    assert client.get("/queries/2").json["count"] == 2
+    # 统计不跨请求累积
+    assert client.get("/queries/1").json["count"] == 1
+
+
+def test_flags_repeated_statement_as_n_plus_one(sql_app, caplog):
+    before = _n_plus_one_total("queries")
+    with caplog.at_level(logging.WARNING, logger="app_logger"):
+        sql_app.test_client().get("/queries/5")
+
+    warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "request_id=req-1" in warnings[0]
+    assert _n_plus_one_total("queries") == before + 1
+
+
+def test_logs_slow_queries_with_request_id(caplog):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQL_SLOW_QUERY_MS"] = 0
+    db.init_app(app)
+    setup_sql_instrumentation(app)
+
+    with caplog.at_level(logging.WARNING, logger="app_logger"):
+        with app.test_request_context("/"):
+            request.environ[REQUEST_ID_ENVIRON_KEY] = "slow-req"
+            db.session.execute(text("SELECT 1"))
+            assert get_sql_stats().count == 1
+            db.session.remove()
+
+    slow = [r.getMessage() for r in caplog.records if "slow query" in r.getMessage()]
+    assert slow and "request_id=slow-req" in slow[0]
+    assert "SELECT 1" in slow[0]
+
+
+def test_skips_request_stats_outside_request(sql_app):
+    with sql_app.app_context():
+        db.session.execute(text("SELECT 1"))
+        assert get_sql_stats() is None
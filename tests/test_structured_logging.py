@@ -0,0 +1,100 @@
+import json
+import logging
+import sys
+
+import pytest
+
+from app.extensions.structured_logging import (
+    FastJSONFormatter,
+    JSONFormatter,
+    _stdlib_dumps,
+    resolve_json_encoder,
+)
+
+
+def _record(msg="用户 %s 登录", args=("alice",), exc_info=None, **extra):
+    record = logging.LogRecord(
+        "app", logging.INFO, __file__, 10, msg, args, exc_info, func="handler"
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.mark.parametrize("encoder", ["json", "auto"])
+def test_fast_formatter_matches_json_formatter(app, encoder):
+    fast = FastJSONFormatter(resolve_json_encoder(encoder))
+    access = {"method": "GET", "route": "/health", "status": 200}
+    with app.test_request_context("/health", headers={"X-Request-ID": "rid-1"}):
+        record = _record(access=access)
+        expected = json.loads(JSONFormatter().format(record))
+        actual = json.loads(fast.format(record))
+
+    assert actual.keys() == expected.keys()
+    for key in expected.keys() - {"timestamp"}:
+        assert actual[key] == expected[key]
+    assert actual["message"] == "用户 alice 登录"
+    assert actual["status"] == 200
+
+
+def test_timestamp_is_derived_from_record_created():
+    formatter = FastJSONFormatter(_stdlib_dumps)
+    record = _record()
+    record.created = 1700000000.25
+    first = json.loads(formatter.format(record))["timestamp"]
+    assert first == "2023-11-14T22:13:20.250000+00:00"
+
+    record.created = 1700000001.000001
+    second = json.loads(formatter.format(record))["timestamp"]
+    assert second == "2023-11-14T22:13:21.000001+00:00"
+
+
+def test_request_context_is_cached_per_request(app):
+    from flask import request
+
+    formatter = FastJSONFormatter(_stdlib_dumps)
+    with app.test_request_context("/a", method="POST"):
+        formatter.format(_record())
+        cached = request.environ["app.log_context"]
+        formatter.format(_record())
+        assert request.environ["app.log_context"] is cached
+        assert cached["http_method"] == "POST"
+        assert cached["http_path"] == "/a"
+
+
+def test_request_context_does_not_leak_across_requests_in_one_app_context(app):
+    formatter = FastJSONFormatter(_stdlib_dumps)
+    with app.app_context():
+        # 两个请求共用同一个应用上下文（同一个 g）
+        with app.test_request_context("/a"):
+            first = json.loads(formatter.format(_record()))
+        with app.test_request_context("/b", method="POST"):
+            second = json.loads(formatter.format(_record()))
+
+    assert (first["http_method"], first["http_path"]) == ("GET", "/a")
+    assert (second["http_method"], second["http_path"]) == ("POST", "/b")
+
+
+def test_exception_is_included():
+    formatter = FastJSONFormatter(_stdlib_dumps)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(exc_info=sys.exc_info())
+    data = json.loads(formatter.format(record))
+    assert "ValueError: boom" in data["exception"]
+
+
+def test_custom_encoder_by_dotted_path():
+    dumps = resolve_json_encoder("app.extensions.structured_logging:_stdlib_dumps")
+    assert dumps is _stdlib_dumps
+
+
+@pytest.mark.benchmark
+def test_fast_formatter_keeps_its_throughput_advantage(app):
+    from benchmarks.bench_json_formatter import measure
+
+    baseline, fast = JSONFormatter(), FastJSONFormatter(resolve_json_encoder("auto"))
+    with app.test_request_context("/api/posters"):
+        # 取三轮中的最好成绩，降低共享 CI 机器的抖动；阈值只防止明显退化
+        ratio = max(measure(fast, 3000) / measure(baseline, 3000) for _ in range(3))
+    assert ratio > 1.1
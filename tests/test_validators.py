@@ -93,8 +93,9 @@ def test_validate_query_error():
 def test_login_required_success(monkeypatch):
     app = _make_app()
 
-    monkeypatch.setattr("app.utils.validators.verify_jwt_in_request", lambda: None)
-    monkeypatch.setattr("app.utils.validators.get_jwt_identity", lambda: "u-1")
+    monkeypatch.setattr("app.utils.jwt_cache.verify_jwt_in_request", lambda: None)
+    monkeypatch.setattr("app.utils.jwt_cache.get_jwt", lambda: {"sub": "u-1", "ver": 0})
+    monkeypatch.setattr("app.utils.validators.current_token_version", lambda _: 0)
 
     @login_required()
     def handler():
@@ -104,13 +105,30 @@ def test_login_required_success(monkeypatch):
         assert handler() == "u-1"
 
 
+def test_login_required_rejects_stale_token_version(monkeypatch):
+    app = _make_app()
+
+    monkeypatch.setattr("app.utils.jwt_cache.verify_jwt_in_request", lambda: None)
+    monkeypatch.setattr("app.utils.jwt_cache.get_jwt", lambda: {"sub": "u-1", "ver": 0})
+    monkeypatch.setattr("app.utils.validators.current_token_version", lambda _: 1)
+
+    @login_required()
+    def handler():
+        return "ok"
+
+    with app.test_request_context("/", method="GET"):
+        with pytest.raises(AuthorizationError) as exc:
+            handler()
+        assert "已失效" in exc.value.message
+
+
 def test_login_required_no_auth(monkeypatch):
     app = _make_app()
 
     def _raise_auth():
         raise NoAuthorizationError("missing")
 
-    monkeypatch.setattr("app.utils.validators.verify_jwt_in_request", _raise_auth)
+    monkeypatch.setattr("app.utils.jwt_cache.verify_jwt_in_request", _raise_auth)
 
     @login_required()
     def handler():
@@ -128,7 +146,7 @@ def test_login_required_unexpected_error(monkeypatch):
         raise RuntimeError("boom")
 
     monkeypatch.setattr(
-        "app.utils.validators.verify_jwt_in_request", _raise_runtime_error
+        "app.utils.jwt_cache.verify_jwt_in_request", _raise_runtime_error
     )
 
     @login_required()
@@ -141,17 +159,11 @@ def test_login_required_unexpected_error(monkeypatch):
         assert "系统处理认证时出错" in str(exc.value)
 
 
-def test_permission_required_user_not_found(monkeypatch):
+def test_permission_required_legacy_token_user_not_found(monkeypatch):
     app = _make_app()
 
-    class DummyUser:
-        class query:
-            @staticmethod
-            def get(_):
-                return None
-
-    monkeypatch.setattr("app.utils.validators.get_jwt_identity", lambda: 1)
-    monkeypatch.setattr("app.utils.validators.User", DummyUser)
+    monkeypatch.setattr("app.utils.jwt_cache.get_jwt", lambda: {"sub": "1"})
+    monkeypatch.setattr("app.utils.validators.get_cached_user", lambda _: None)
 
     @permission_required("manage")
     def handler():
@@ -165,25 +177,10 @@ def test_permission_required_user_not_found(monkeypatch):
 def test_permission_required_forbidden(monkeypatch):
     app = _make_app()
 
-    class Perm:
-        def __init__(self, code):
-            self.code = code
-
-    class Role:
-        def __init__(self, permissions):
-            self.permissions = permissions
-
-    class UserObj:
-        roles = [Role([Perm("read")])]
-
-    class DummyUser:
-        class query:
-            @staticmethod
-            def get(_):
-                return UserObj()
-
-    monkeypatch.setattr("app.utils.validators.get_jwt_identity", lambda: 1)
-    monkeypatch.setattr("app.utils.validators.User", DummyUser)
+    monkeypatch.setattr("app.utils.jwt_cache.get_jwt", lambda: {"perms": "1"})
+    monkeypatch.setattr(
+        "app.utils.validators.has_permission", lambda bitset, code: code == "read"
+    )
 
     @permission_required("manage")
     def handler():
@@ -197,25 +194,10 @@ def test_permission_required_forbidden(monkeypatch):
 def test_permission_required_success(monkeypatch):
     app = _make_app()
 
-    class Perm:
-        def __init__(self, code):
-            self.code = code
-
-    class Role:
-        def __init__(self, permissions):
-            self.permissions = permissions
-
-    class UserObj:
-        roles = [Role([Perm("manage")])]
-
-    class DummyUser:
-        class query:
-            @staticmethod
-            def get(_):
-                return UserObj()
-
-    monkeypatch.setattr("app.utils.validators.get_jwt_identity", lambda: 1)
-    monkeypatch.setattr("app.utils.validators.User", DummyUser)
+    monkeypatch.setattr("app.utils.jwt_cache.get_jwt", lambda: {"perms": "2"})
+    monkeypatch.setattr(
+        "app.utils.validators.has_permission", lambda bitset, code: bitset == "2"
+    )
 
     @permission_required("manage")
     def handler():